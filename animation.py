@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# 프레임 클럭 기반 애니메이션 런타임
+#  - 기존: show() → time.sleep(delay) 반복이라 실제 주기 = delay + show 시간 + 파이썬 오버헤드 (누적 지연)
+#  - 변경: time.monotonic() 기준 절대 마감시각(start + i × period)에 맞춰 프레임을 그림
+#          늦어지면 지난 프레임은 그리지 않고 건너뜀(skipped) → 전체 길이는 항상 duration 그대로
+#  - 효과는 "프레임 생성기"(그리기 함수를 yield)로 만들고 run_frames()가 클럭에 맞춰 실행
+import time
+import threading
+from typing import Callable, Iterable, Optional
+
+FPS = 50  # 기본 목표 프레임레이트
+
+
+class FrameClock:
+    """절대 마감시각 기반 프레임 스케줄러"""
+    def __init__(self, fps: float = FPS):
+        self.period = 1.0 / fps
+        self.fps = fps
+        self.t0 = 0.0
+        self.index = 0        # 다음에 그릴 프레임 번호
+        self.drawn = 0
+        self.skipped = 0
+        self.max_late = 0.0   # 마감시각 대비 가장 늦게 그린 시간(초)
+
+    def start(self, at: Optional[float] = None) -> None:
+        """at: 0번 프레임 시각(monotonic). 주면 여러 사이클을 한 절대 타임라인에 이어 붙일 수 있음"""
+        self.t0 = time.monotonic() if at is None else at
+        self.index = 0
+
+    def deadline(self, index: Optional[int] = None) -> float:
+        return self.t0 + (self.index if index is None else index) * self.period
+
+    def wait(self, stop_event: Optional[threading.Event] = None) -> int:
+        """
+        현재 프레임 마감시각까지 대기. 반환: 이미 지나버린 뒤 프레임 수(건너뛸 수)
+        """
+        now = time.monotonic()
+        remaining = self.deadline() - now
+        if remaining > 0:
+            if stop_event is not None:
+                stop_event.wait(remaining)
+            else:
+                time.sleep(remaining)
+            return 0
+        late = -remaining
+        self.max_late = max(self.max_late, late)
+        return int(late / self.period)
+
+    def advance(self, drawn: bool = True) -> None:
+        self.index += 1
+        if drawn:
+            self.drawn += 1
+        else:
+            self.skipped += 1
+
+    def stats(self) -> dict:
+        total = self.drawn + self.skipped
+        return {
+            "fps": self.fps,
+            "drawn": self.drawn,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / total if total else 0.0,
+            "max_late_ms": self.max_late * 1000.0,
+        }
+
+
+def run_frames(frames: Iterable[Callable[[], None]], fps: float = FPS,
+               stop_event: Optional[threading.Event] = None,
+               should_stop: Optional[Callable[[], bool]] = None,
+               clock: Optional[FrameClock] = None,
+               start_at: Optional[float] = None) -> bool:
+    """
+    프레임 생성기를 클럭에 맞춰 재생. 중단되면 False, 끝까지 재생하면 True.
+    늦은 만큼 다음 프레임들을 그리지 않고 건너뛰되, 마지막 프레임(최종 상태)은 항상 그린다.
+    start_at(monotonic)을 주면 지금이 아니라 그 시각을 0번 프레임으로 삼음
+    """
+    clock = clock or FrameClock(fps)
+    clock.start(start_at)
+    it = iter(frames)
+    draw = next(it, None)
+    while draw is not None:
+        if (stop_event and stop_event.is_set()) or (should_stop and should_stop()):
+            return False
+        behind = clock.wait(stop_event)
+        if stop_event and stop_event.is_set():
+            return False
+        # 늦었으면 지난 프레임은 버리고 지금 시각에 맞는 프레임으로 점프
+        while behind > 0:
+            nxt = next(it, None)
+            if nxt is None:
+                break
+            draw = nxt
+            clock.advance(drawn=False)
+            behind -= 1
+        draw()
+        clock.advance()
+        draw = next(it, None)
+    return True
+
+
+def fade_frames(fill: Callable[[float], None], start: float, end: float,
+                duration: float, fps: float = FPS):
+    """start→end 레벨 선형 페이드 프레임 (duration 동안, 마지막 프레임은 정확히 end)"""
+    n = max(1, int(round(duration * fps)))
+    for i in range(n + 1):
+        level = start + (end - start) * i / n
+        yield lambda level=level: fill(level)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# 스트리밍 녹음 + 에너지 기반 발화 끝점(endpoint) 검출
+#  - arecord를 raw PCM으로 stdout에 흘리게 하고 프레임 단위로 읽음
+#  - 말이 끝난 뒤 hangover 동안 조용하면 바로 녹음 종료 (고정 8초 대기 제거)
+#  - 테스트/벤치에서는 WAV 파일을 같은 프레임 스트림으로 대체 가능
+import math
+import time
+import wave
+import array
+import subprocess
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2       # S16_LE
+CHANNELS = 1
+FRAME_MS = 30
+
+
+@dataclass
+class EndpointConfig:
+    frame_ms: int = FRAME_MS
+    hangover_ms: int = 700          # 발화 후 이 시간만큼 무음이면 종료
+    max_duration: float = 8.0       # 최대 녹음 길이(기존 -d 8과 동일한 상한)
+    no_speech_timeout: float = 5.0  # 이 시간 동안 말이 없으면 종료
+    calibration_ms: int = 300       # 발화 전 조용한 프레임 이만큼으로 잡음 레벨 추정
+    start_frames: int = 3           # 연속 유성 프레임 수 → 발화 시작 판정
+    min_rms: float = 300.0          # 절대 임계값 (16bit 기준)
+    noise_ratio: float = 3.0        # 잡음 대비 배수 임계값
+    max_noise_rms: float = 1000.0   # 이보다 큰 프레임은 잡음 추정에서 제외 (시작부터 말하는 경우)
+
+
+@dataclass
+class CaptureMetrics:
+    speech_start: Optional[float] = None   # 오디오 시간(초)
+    speech_end: Optional[float] = None     # 마지막 유성 프레임 끝(오디오 시간)
+    audio_duration: float = 0.0            # 실제 녹음된 길이
+    time_to_endpoint: Optional[float] = None  # 발화 끝 → 녹음 종료까지 걸린 시간(벽시계)
+    wall_time: float = 0.0                 # 캡처 전체 소요 시간
+    reason: str = ""                       # endpoint / max_duration / no_speech / eof
+    threshold: float = 0.0
+    ended_at: float = 0.0                  # 캡처 종료 시각 (time.monotonic)
+
+
+def frame_rms(frame: bytes) -> float:
+    samples = array.array("h")
+    samples.frombytes(frame[: len(frame) - (len(frame) % SAMPLE_WIDTH)])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class EnergyEndpointer:
+    """프레임 RMS로 발화 시작/끝을 판정하는 간단한 VAD"""
+    def __init__(self, cfg: EndpointConfig = None):
+        self.cfg = cfg or EndpointConfig()
+        self._calib_frames = max(1, self.cfg.calibration_ms // self.cfg.frame_ms)
+        self._hang_frames = max(1, self.cfg.hangover_ms // self.cfg.frame_ms)
+        self._noise = []
+        self.threshold = self.cfg.min_rms
+        self.n = 0
+        self.voiced_run = 0
+        self.silence_run = 0
+        self.start_frame = None
+        self.last_voiced = None
+
+    def update(self, frame: bytes) -> Optional[str]:
+        """프레임 1개 처리. 종료 조건이면 사유 문자열, 아니면 None"""
+        cfg = self.cfg
+        rms = frame_rms(frame)
+        idx = self.n
+        self.n += 1
+
+        # 처음부터 말하면 그 음성이 잡음 바닥이 되어 버리므로, 큰 프레임은 추정에 넣지 않음
+        if (len(self._noise) < self._calib_frames and self.start_frame is None
+                and rms < cfg.max_noise_rms):
+            self._noise.append(rms)
+            noise = sum(self._noise) / len(self._noise)
+            self.threshold = max(cfg.min_rms, noise * cfg.noise_ratio)
+
+        voiced = rms >= self.threshold
+        if voiced:
+            self.voiced_run += 1
+            self.silence_run = 0
+            self.last_voiced = idx
+            if self.start_frame is None and self.voiced_run >= cfg.start_frames:
+                self.start_frame = idx - cfg.start_frames + 1
+        else:
+            self.voiced_run = 0
+            self.silence_run += 1
+
+        elapsed = self.n * cfg.frame_ms / 1000.0
+        if self.start_frame is not None and self.silence_run >= self._hang_frames:
+            return "endpoint"
+        if elapsed >= cfg.max_duration:
+            return "max_duration"
+        if self.start_frame is None and elapsed >= cfg.no_speech_timeout:
+            return "no_speech"
+        return None
+
+    def frame_time(self, idx: Optional[int], end: bool = False) -> Optional[float]:
+        if idx is None:
+            return None
+        return (idx + (1 if end else 0)) * self.cfg.frame_ms / 1000.0
+
+
+# ===== 메모리 버퍼 =====
+class PcmRingBuffer:
+    """
+    미리 잡아둔 bytearray에 PCM 프레임을 쌓는 링 버퍼.
+    용량(기본: 최대 녹음 길이)을 넘으면 오래된 데이터부터 덮어씀.
+    view()는 복사 없이 memoryview를 돌려줌 (감겨 있을 때만 1회 정렬 복사).
+    """
+    def __init__(self, seconds: float = 8.0, rate: int = SAMPLE_RATE):
+        self.capacity = int(seconds * rate) * SAMPLE_WIDTH * CHANNELS
+        self._buf = bytearray(self.capacity)
+        self._mv = memoryview(self._buf)
+        self.pos = 0          # 다음 쓰기 위치
+        self.size = 0         # 유효 데이터 길이
+
+    def clear(self) -> None:
+        self.pos = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def write(self, frame) -> None:
+        data = memoryview(frame)
+        n = len(data)
+        if n >= self.capacity:
+            data = data[n - self.capacity:]
+            n = self.capacity
+        first = min(n, self.capacity - self.pos)
+        self._mv[self.pos:self.pos + first] = data[:first]
+        if first < n:
+            self._mv[0:n - first] = data[first:]
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.capacity, self.size + n)
+
+    def view(self) -> memoryview:
+        if self.size < self.capacity or self.pos == 0:
+            return self._mv[:self.size]
+        # 감긴 상태: 시간 순서대로 한 번만 재배열
+        self._buf[:] = self._buf[self.pos:] + self._buf[:self.pos]
+        self.pos = 0
+        return self._mv[:self.size]
+
+
+# ===== 프레임 소스 =====
+def frame_bytes(frame_ms: int = FRAME_MS, rate: int = SAMPLE_RATE) -> int:
+    return rate * frame_ms // 1000 * SAMPLE_WIDTH * CHANNELS
+
+def open_arecord(device: Optional[str], rate: int = SAMPLE_RATE) -> subprocess.Popen:
+    """arecord를 raw PCM(stdout) 모드로 실행"""
+    cmd = ["arecord"]
+    if device:
+        cmd += ["-D", device]
+    cmd += ["-f", "S16_LE", "-r", str(rate), "-c", str(CHANNELS), "-t", "raw", "-q"]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+
+def stream_frames(stream, frame_ms: int = FRAME_MS, rate: int = SAMPLE_RATE) -> Iterator[bytes]:
+    size = frame_bytes(frame_ms, rate)
+    while True:
+        buf = b""
+        while len(buf) < size:
+            chunk = stream.read(size - len(buf))
+            if not chunk:
+                break
+            buf += chunk
+        if len(buf) < size:
+            return
+        yield buf
+
+def wav_frames(path: str, frame_ms: int = FRAME_MS, realtime: bool = False) -> Iterator[bytes]:
+    """WAV 파일을 마이크 스트림 대신 프레임 단위로 흘려줌 (realtime=True면 실제 속도로)"""
+    with wave.open(path, "rb") as w:
+        n = w.getframerate() * frame_ms // 1000
+        period = frame_ms / 1000.0
+        next_t = time.monotonic()
+        while True:
+            data = w.readframes(n)
+            if len(data) < n * w.getsampwidth() * w.getnchannels():
+                return
+            if realtime:
+                next_t += period
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield data
+
+
+# ===== 캡처 =====
+def capture_until_endpoint(frames: Iterable[bytes], cfg: EndpointConfig = None,
+                           buffer: Optional[PcmRingBuffer] = None,
+                           on_frame: Optional[Callable[[bytes], None]] = None):
+    """
+    프레임 스트림을 읽다가 끝점에서 멈춤.
+    반환: (pcm memoryview, CaptureMetrics) — buffer를 넘기면 그 버퍼를 재사용
+    on_frame: 프레임마다 호출 (스트리밍 인식으로 녹음 중에 바로 넘길 때)
+    """
+    ep = EnergyEndpointer(cfg)
+    pcm = buffer if buffer is not None else PcmRingBuffer(ep.cfg.max_duration + 1.0)
+    pcm.clear()
+    metrics = CaptureMetrics()
+    t0 = time.monotonic()
+    voiced_wall = None
+    reason = "eof"
+    for frame in frames:
+        pcm.write(frame)
+        if on_frame:
+            on_frame(frame)
+        reason = ep.update(frame)
+        if ep.last_voiced == ep.n - 1:
+            voiced_wall = time.monotonic()
+        if reason:
+            break
+    else:
+        reason = "eof"
+    end_wall = time.monotonic()
+
+    metrics.reason = reason
+    metrics.threshold = ep.threshold
+    metrics.speech_start = ep.frame_time(ep.start_frame)
+    metrics.speech_end = ep.frame_time(ep.last_voiced, end=True) if ep.start_frame is not None else None
+    metrics.audio_duration = len(pcm) / (SAMPLE_RATE * SAMPLE_WIDTH * CHANNELS)
+    metrics.wall_time = end_wall - t0
+    metrics.ended_at = end_wall
+    if voiced_wall is not None and ep.start_frame is not None:
+        metrics.time_to_endpoint = end_wall - voiced_wall
+    return pcm.view(), metrics
+
+def record_with_endpoint(device: Optional[str], cfg: EndpointConfig = None,
+                         buffer: Optional[PcmRingBuffer] = None,
+                         on_frame: Optional[Callable[[bytes], None]] = None):
+    """마이크(arecord)에서 끝점까지 녹음. 반환: (pcm memoryview, CaptureMetrics)"""
+    cfg = cfg or EndpointConfig()
+    proc = open_arecord(device)
+    try:
+        return capture_until_endpoint(stream_frames(proc.stdout, cfg.frame_ms), cfg, buffer, on_frame)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def write_wav(path: str, pcm, rate: int = SAMPLE_RATE) -> None:
+    with wave.open(path, "wb") as w:
+        w.setnchannels(CHANNELS)
+        w.setsampwidth(SAMPLE_WIDTH)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+
+def format_metrics(m: CaptureMetrics) -> str:
+    tte = f"{m.time_to_endpoint * 1000:.0f}ms" if m.time_to_endpoint is not None else "-"
+    return (f"reason={m.reason} audio={m.audio_duration:.2f}s wall={m.wall_time:.2f}s "
+            f"speech=[{m.speech_start}, {m.speech_end}] time_to_endpoint={tte} "
+            f"threshold={m.threshold:.0f}")
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# STT 업로드 전 오디오 전처리
+#  - 앞/뒤 무음 제거 (audio_capture의 프레임 RMS 사용, 앞뒤 여유 padding 유지)
+#  - FLAC / OGG_OPUS 인코딩 (soundfile 있을 때만, 없으면 LINEAR16 그대로)
+import io
+from typing import Tuple
+
+from audio_capture import SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS, FRAME_MS, frame_rms
+
+ENCODINGS = ("LINEAR16", "FLAC", "OGG_OPUS")
+
+try:
+    import numpy as np
+    import soundfile as sf
+except ImportError:  # 라즈베리파이에 없으면 압축 없이 전송
+    np = None
+    sf = None
+
+
+def trim_silence(pcm, rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS,
+                 threshold: float = 300.0, pad_ms: int = 150) -> memoryview:
+    """
+    앞/뒤 무음 구간을 잘라낸 memoryview 반환 (복사 없음).
+    유성 프레임이 하나도 없으면 원본 그대로.
+    """
+    mv = memoryview(pcm).cast("B")
+    step = rate * frame_ms // 1000 * SAMPLE_WIDTH * CHANNELS
+    n_frames = len(mv) // step
+    voiced = [i for i in range(n_frames) if frame_rms(mv[i * step:(i + 1) * step]) >= threshold]
+    if not voiced:
+        return mv
+    pad = pad_ms // frame_ms
+    start = max(0, voiced[0] - pad) * step
+    end = min(n_frames, voiced[-1] + 1 + pad) * step
+    return mv[start:end]
+
+
+def encode(pcm, encoding: str = "FLAC", rate: int = SAMPLE_RATE) -> Tuple[bytes, str]:
+    """
+    PCM(S16_LE mono)을 지정 포맷으로 인코딩.
+    반환: (payload bytes, 실제 사용된 encoding 이름) — 인코더가 없으면 LINEAR16
+    """
+    encoding = encoding.upper()
+    if encoding not in ENCODINGS:
+        raise ValueError(f"unsupported encoding: {encoding}")
+    if encoding == "LINEAR16" or sf is None:
+        return bytes(pcm), "LINEAR16"
+
+    samples = np.frombuffer(pcm, dtype="<i2")
+    out = io.BytesIO()
+    if encoding == "FLAC":
+        sf.write(out, samples, rate, format="FLAC", subtype="PCM_16")
+    else:
+        sf.write(out, samples, rate, format="OGG", subtype="OPUS")
+    return out.getvalue(), encoding
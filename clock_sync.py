@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+# 라즈4 ↔ 라즈3 시계 동기화 (UART 위 NTP 방식) + 시각 지정 명령
+#  - 기존: relief는 _safe_sleep(13)/(21), healing은 고정 대기(→ cue)로 라즈3 링 타이밍을 맞춤
+#          → 명령이 도착·처리되는 시점에 실행되므로 라즈3가 늦으면 그만큼 밀림
+#  - 변경: PING/PONG 타임스탬프 4개(t1 송신, t2 라즈3 수신, t3 라즈3 응답, t4 수신)로
+#            offset = ((t2 - t1) + (t3 - t4)) / 2     (라즈3 시계 - 라즈4 시계)
+#            delay  = (t4 - t1) - (t3 - t2)           (왕복 지연)
+#          한 번에 여러 번 주고받아 왕복 지연이 가장 짧은 샘플만 쓰고(클럭 필터),
+#          최근 샘플들을 시간에 대한 직선으로 맞춰 drift(ppm)까지 추정
+#          명령에는 라즈3 시계 기준 실행 시각(uart_proto AT)을 붙여 미리 보내고,
+#          라즈3 Receiver가 그 시각에 꺼내 실행 → 두 링이 같은 타임라인 위에서 움직임
+#  - 동기 오차(ms): 최소 왕복 지연/2(경로 비대칭 최대 오차) + 직선 맞춤 잔차
+#
+#  pty 두 프로세스 검사 (지연·지터·비대칭·라즈3 시계 offset/drift 주입):
+#    python clock_sync.py [--delay-ms 8] [--jitter-ms 4] [--asym-ms 0]
+#                         [--offset 1234.5] [--drift-ppm 80] [--seconds 10]
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import statistics
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+import uart_proto
+
+SYNC_INTERVAL = 5.0      # refresh()가 다시 동기화하는 주기 (초)
+BURST = 6                # 동기화 1회당 PING 수 (왕복이 가장 짧은 1개만 사용)
+WINDOW = 8               # drift 추정에 쓰는 최근 샘플 수
+MIN_DRIFT_SPAN = 10.0    # 샘플이 이 시간(초) 이상 퍼져 있어야 drift 추정 (짧으면 지터가 기울기로 보임)
+MAX_DRIFT = 500e-6       # 크리스털 오차 범위 밖의 기울기는 잡음으로 보고 자름
+PING_TIMEOUT = 0.2
+
+# 115200 8N1에서 1바이트 전송 시간. PING(짧음)/PONG(김) 길이 차이로 생기는 비대칭 보정
+WIRE_S_PER_BYTE = 10.0 / uart_proto.BAUD
+_PING_BYTES = uart_proto.FRAME_OVERHEAD + 9
+_PONG_BYTES = uart_proto.FRAME_OVERHEAD + 25
+
+
+class ClockSync:
+    """라즈4(송신측)에서 라즈3 시계를 추정. to_remote(t)로 로컬 시각 → 라즈3 시각"""
+    def __init__(self, uart, rx: Optional[uart_proto.Receiver] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 timeout: float = PING_TIMEOUT, wire_s_per_byte: float = WIRE_S_PER_BYTE):
+        self.uart = uart
+        self.rx = rx or uart_proto.Receiver(uart, clock=clock)
+        self.clock = clock
+        self.timeout = timeout
+        self.wire = wire_s_per_byte
+        self.lock = threading.Lock()
+        self.samples: Deque[Tuple[float, float, float]] = deque(maxlen=WINDOW)  # (로컬 시각, offset, 왕복 지연)
+        self.base_t = 0.0
+        self.offset = 0.0
+        self.drift = 0.0
+        self.residual = 0.0
+        self.last_sync: Optional[float] = None
+        self.exchanges = 0
+        self.lost = 0
+        self._bg: Optional[threading.Thread] = None
+
+    def exchange(self) -> Optional[Tuple[float, float, float]]:
+        """PING 1회 → (로컬 중간 시각, offset, 왕복 지연). 응답 없으면 None"""
+        t1 = self.clock()
+        uart_proto.send(self.uart, uart_proto.ping(t1))
+        deadline = time.monotonic() + self.timeout
+        while True:
+            cmd = self.rx.wait_for("pong", max(0.0, deadline - time.monotonic()))
+            if cmd is None:
+                self.lost += 1
+                return None
+            if cmd.stamps[0] == t1:
+                break   # 앞서 시간 초과된 PING의 늦은 PONG은 버림
+        _, t2, t3, t4 = cmd.stamps
+        up = self.wire * _PING_BYTES
+        down = self.wire * _PONG_BYTES
+        self.exchanges += 1
+        offset = ((t2 - t1 - up) + (t3 - t4 + down)) / 2
+        delay = (t4 - t1) - (t3 - t2)
+        return (t1 + t4) / 2, offset, delay
+
+    def sync(self, count: int = BURST) -> bool:
+        """PING count번 중 왕복이 가장 짧은 샘플로 추정 갱신. 샘플이 하나도 없으면 False"""
+        got = [s for s in (self.exchange() for _ in range(count)) if s is not None]
+        if not got:
+            return False
+        best = min(got, key=lambda s: s[2])
+        with self.lock:
+            self.samples.append(best)
+            self._fit()
+            self.last_sync = self.clock()
+        return True
+
+    def refresh(self, max_age: float = SYNC_INTERVAL) -> bool:
+        """마지막 동기화가 max_age보다 오래됐으면 다시. 동기화된 상태면 True"""
+        if self.last_sync is None or self.clock() - self.last_sync >= max_age:
+            return self.sync() or self.last_sync is not None
+        return True
+
+    def refresh_async(self, max_age: float = SYNC_INTERVAL) -> None:
+        """
+        refresh()를 백그라운드 스레드에서 (PING 버스트 최대 BURST×timeout 동안 프레임 루프를 막지 않음).
+        갱신 전까지는 기존 offset/drift로 계속 변환. 이미 도는 중이면 무시
+        """
+        if self.last_sync is not None and self.clock() - self.last_sync < max_age:
+            return
+        with self.lock:
+            if self._bg is not None and self._bg.is_alive():
+                return
+            self._bg = threading.Thread(target=self.sync, name="clock-sync", daemon=True)
+            self._bg.start()
+
+    def _fit(self) -> None:
+        # offset(t) = offset + drift × (t - base_t), 최소제곱 직선
+        ts = [s[0] for s in self.samples]
+        offs = [s[1] for s in self.samples]
+        mean_t = sum(ts) / len(ts)
+        mean_o = sum(offs) / len(offs)
+        if len(ts) >= 3 and ts[-1] - ts[0] >= MIN_DRIFT_SPAN:
+            var = sum((t - mean_t) ** 2 for t in ts)
+            cov = sum((t - mean_t) * (o - mean_o) for t, o in zip(ts, offs))
+            self.drift = max(-MAX_DRIFT, min(MAX_DRIFT, cov / var))
+        self.base_t, self.offset = mean_t, mean_o
+        res = [o - (mean_o + self.drift * (t - mean_t)) for t, o in zip(ts, offs)]
+        self.residual = (sum(r * r for r in res) / len(res)) ** 0.5
+
+    @property
+    def synced(self) -> bool:
+        return self.last_sync is not None
+
+    def offset_at(self, t_local: float) -> float:
+        with self.lock:
+            return self.offset + self.drift * (t_local - self.base_t)
+
+    def to_remote(self, t_local: float) -> float:
+        return t_local + self.offset_at(t_local)
+
+    def to_local(self, t_remote: float) -> float:
+        return t_remote - self.offset_at(t_remote - self.offset)
+
+    def send_at(self, t_local: float, *cmds: uart_proto.Command) -> None:
+        """로컬 시각 t_local에 라즈3에서 실행되도록 시각을 붙여 지금 전송"""
+        uart_proto.send(self.uart, *uart_proto.timed(self.to_remote(t_local), *cmds))
+
+    def error_ms(self) -> float:
+        """추정 동기 오차: 최소 왕복 지연/2 + 잔차"""
+        with self.lock:
+            if not self.samples:
+                return float("inf")
+            return 1000.0 * (min(s[2] for s in self.samples) / 2 + self.residual)
+
+    def stats(self) -> dict:
+        with self.lock:
+            rtt = min((s[2] for s in self.samples), default=float("nan"))
+            offset, drift = self.offset, self.drift
+        return {"offset_s": offset, "drift_ppm": drift * 1e6, "rtt_ms": rtt * 1000.0,
+                "error_ms": self.error_ms(), "exchanges": self.exchanges, "lost": self.lost}
+
+
+_sync: Optional[ClockSync] = None
+_lock = threading.Lock()
+
+def get_sync() -> ClockSync:
+    """공용 UART 위 ClockSync 1개 (healing/relief 공유)"""
+    global _sync
+    with _lock:
+        if _sync is None:
+            from hw_registry import get_receiver, get_uart
+            _sync = ClockSync(get_uart(), rx=get_receiver())   # focus와 같은 Receiver
+        return _sync
+
+
+# ===== pty 두 프로세스 검사 =====
+class DelayedLink:
+    """쓴 바이트를 delay(+0~jitter) 뒤에, 바이트당 wire 시간만큼 늦춰 내보냄 (UART처럼 순서 유지)"""
+    def __init__(self, ser, delay: float, jitter: float = 0.0,
+                 wire_s_per_byte: float = WIRE_S_PER_BYTE, seed: int = 0):
+        self.ser = ser
+        self.delay = delay
+        self.jitter = jitter
+        self.wire = wire_s_per_byte
+        self._rng = random.Random(seed)
+        self._q: Deque[Tuple[float, bytes]] = deque()
+        self._cv = threading.Condition()
+        self._last_due = 0.0
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def write(self, data: bytes) -> int:
+        with self._cv:
+            due = max(self._last_due, time.monotonic() + self.delay + self._rng.uniform(0, self.jitter))
+            due += len(data) * self.wire
+            self._last_due = due
+            self._q.append((due, bytes(data)))
+            self._cv.notify()
+        return len(data)
+
+    def _pump(self) -> None:
+        while True:
+            with self._cv:
+                while not self._q:
+                    self._cv.wait()
+                due, data = self._q[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cv.wait(wait)
+                    continue
+                self._q.popleft()
+            self.ser.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.ser, name)
+
+
+def _tag(i: int) -> Tuple[int, int, int]:
+    return (i >> 8 & 0xFF, i & 0xFF, 0)
+
+def _peer(path: str, args) -> None:
+    """라즈3 역할: offset/drift가 있는 시계로 Receiver를 돌리고, 명령이 실행된 실제 시각을 기록"""
+    import tty
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(fd)
+    drift = args.drift_ppm * 1e-6
+    clock = lambda: time.monotonic() * (1 + drift) + args.offset
+    link = DelayedLink(uart_proto.FdSerial(fd), args.delay_ms / 1000.0,
+                       args.jitter_ms / 1000.0, seed=2)
+    rx = uart_proto.Receiver(link, clock=clock).start()   # 라즈3처럼 읽기 스레드
+    fired = {"C": {}, "D": {}}
+    while True:
+        cmd = rx.get(timeout=0.5)
+        if cmd is None:
+            continue
+        if cmd.kind == "ack":
+            break
+        if cmd.kind == "strip" and cmd.strip in fired:
+            r, g, _ = cmd.color
+            fired[cmd.strip][r << 8 | g] = time.monotonic()
+    print(json.dumps({"fired": fired, "timing": rx.timing_stats()}), flush=True)
+
+def _ms_summary(errors: List[float]) -> str:
+    if not errors:
+        return "(none)"
+    a = sorted(abs(e) for e in errors)
+    p95 = a[min(len(a) - 1, int(0.95 * len(a)))]
+    return (f"{statistics.mean(errors):7.2f} {statistics.median(a):7.2f} "
+            f"{p95:7.2f} {a[-1]:7.2f}")
+
+def harness(args) -> dict:
+    """라즈4 역할: 동기화 → 시각 지정 명령(C) + 예전 방식 즉시 명령(D)을 보내고 실행 오차 비교"""
+    import subprocess
+    master, slave = uart_proto.open_pty_pair()
+    peer = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--peer", os.ttyname(slave),
+         "--delay-ms", str(args.delay_ms), "--jitter-ms", str(args.jitter_ms),
+         "--offset", str(args.offset), "--drift-ppm", str(args.drift_ppm)],
+        stdout=subprocess.PIPE, text=True)
+    link = DelayedLink(uart_proto.FdSerial(master), (args.delay_ms + args.asym_ms) / 1000.0,
+                       args.jitter_ms / 1000.0, seed=1)
+    sync = ClockSync(link)
+    time.sleep(0.5)   # 상대 프로세스 시작 대기
+
+    targets = {}
+    lead, period = 0.25, 0.2
+    end = time.monotonic() + args.seconds
+    i = 0
+    while time.monotonic() < end:
+        if not sync.refresh(args.interval):
+            print("sync failed: no PONG")
+            break
+        target = time.monotonic() + lead
+        sync.send_at(target, uart_proto.strip("C", 100, _tag(i)))
+        # 예전 방식: 그 시각에 보내고 라즈3가 받는 대로 실행
+        time.sleep(max(0.0, target - time.monotonic()))
+        uart_proto.send(link, uart_proto.strip("D", 100, _tag(i)))
+        targets[i] = target
+        i += 1
+        time.sleep(max(0.0, target + period - lead - time.monotonic()))
+
+    now = time.monotonic()
+    true_offset = now * args.drift_ppm * 1e-6 + args.offset
+    offset_error_ms = (sync.offset_at(now) - true_offset) * 1000.0
+    est = sync.stats()
+    uart_proto.send(link, uart_proto.ack())
+    out, _ = peer.communicate(timeout=10)
+    result = json.loads(out.strip().splitlines()[-1])
+    os.close(slave)
+    errors = {s: [(result["fired"][s][str(k)] - t) * 1000.0 for k, t in targets.items()
+                  if str(k) in result["fired"][s]] for s in ("C", "D")}
+
+    print(f"link: {args.delay_ms:.1f}+0~{args.jitter_ms:.1f} ms each way (+{args.asym_ms:.1f} ms Pi4→Pi3), "
+          f"{uart_proto.BAUD} baud wire time; Pi3 clock offset {args.offset:.3f} s, drift {args.drift_ppm:+.1f} ppm")
+    print(f"sync: offset error {offset_error_ms:+.3f} ms, "
+          f"drift {est['drift_ppm']:+.1f} ppm (true {args.drift_ppm:+.1f}), estimated error ±{est['error_ms']:.2f} ms, "
+          f"min rtt {est['rtt_ms']:.2f} ms, exchanges {est['exchanges']} lost {est['lost']}")
+    print(f"fire time - target (ms), {len(targets)} commands   mean  |p50|  |p95|  |max|")
+    print(f"  timed (AT, scheduled on Pi3)    {_ms_summary(errors['C'])}")
+    print(f"  untimed (sent at target)        {_ms_summary(errors['D'])}")
+    print(f"Pi3 receiver: {result['timing']}")
+    return {"sync": est, "offset_error_ms": offset_error_ms, "errors": errors, "peer": result["timing"]}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="UART 시계 동기화 / 시각 지정 명령 pty 검사")
+    ap.add_argument("--delay-ms", type=float, default=8.0, help="한 방향 기본 지연")
+    ap.add_argument("--jitter-ms", type=float, default=4.0, help="한 방향 추가 지연 0~jitter (균등)")
+    ap.add_argument("--asym-ms", type=float, default=0.0, help="라즈4→라즈3 방향만 추가 지연 (추정 불가, 오차 ≈ asym/2)")
+    ap.add_argument("--offset", type=float, default=1234.5, help="라즈3 시계 offset (초)")
+    ap.add_argument("--drift-ppm", type=float, default=80.0)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--interval", type=float, default=2.0, help="재동기화 주기 (초)")
+    ap.add_argument("--peer", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.peer:
+        _peer(args.peer, args)
+    else:
+        harness(args)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# LED 색 계산용 감마/밝기 룩업 테이블
+#  - 기존 scale_color: 채널마다 float 곱/나눗셈, 감마 보정 없음 → 낮은 밝기에서 페이드 계단이 눈에 띔
+#  - GAMMA_LUT[v]           : 0~255 선형 값 → 감마 보정 값 (256개)
+#  - LEVEL_LUT[level][v]    : 선형 값 v를 밝기 level(0~100)로 줄인 뒤 감마 보정 (101 × 256)
+#  - DIM_LUT[level][v]      : 이미 보정된 값 v(스트립에서 읽은 색)를 level로 줄임 (이중 보정 방지)
+#  - 테이블이 bytes라서 스트립 전체 프레임은 bytes.translate()로 C 루프 한 번에 변환
+#    (numpy가 있으면 배열 단위 scale_array()도 사용 가능)
+#  - 픽셀 1개 scale_color(채널마다 lut[r])는 기존 float 계산보다 오히려 느림 (24px: 21.7 us vs 17.1 us,
+#    tuple(bytes.translate()) 버전은 더 느림) → 픽셀 단위 함수는 감마 보정용이지 속도 개선이 아님.
+#    속도 이득은 프레임 단위 translate와 캐시에서만 나옴: 픽셀 루프에서는 scale_pixel()/fade_steps()
+#    (translate로 한 번 계산 후 lru_cache)를 사용
+#  - 감마 곡선만 쓰면 흰색 level 1~9가 전부 1로 뭉개짐 → 어두운 구간은 1%당 최소 1씩 오르는 선형 toe
+#    (흰색 기준 level 46 근처에서 감마 곡선과 만남)
+#
+# 마이크로벤치마크: python color_lut.py [--rounds 20000]
+import os
+import time
+import argparse
+from functools import lru_cache
+from typing import Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 라즈3에는 numpy 없이도 동작
+    np = None
+
+GAMMA = float(os.environ.get("LED_GAMMA", "2.2"))
+
+
+def _gamma(x: float) -> int:
+    # x: 0~1 선형 밝기 → 0~255 출력. 0이 아닌 입력은 최소 1 (가장 어두운 단계가 꺼지지 않게)
+    # 어두운 구간은 x*100 toe: 밝기 1% 차이가 출력 1 이상 차이 → 낮은 단계도 서로 구분됨
+    if x <= 0:
+        return 0
+    return max(1, int(round(255 * x ** GAMMA)), int(round(x * 100)))
+
+GAMMA_LUT = bytes(_gamma(v / 255) for v in range(256))
+LEVEL_LUT = tuple(bytes(_gamma(v / 255 * level / 100) for v in range(256)) for level in range(101))
+DIM_LUT = tuple(bytes(int(round(v * (level / 100) ** GAMMA)) for v in range(256)) for level in range(101))
+
+if np is not None:
+    _LEVEL_NP = np.frombuffer(b"".join(LEVEL_LUT), dtype=np.uint8).reshape(101, 256)
+
+
+def _clamp_level(level) -> int:
+    return max(0, min(100, int(level)))
+
+def gamma(color) -> Tuple[int, int, int]:
+    """선형 RGB → 감마 보정 RGB"""
+    r, g, b = color
+    return (GAMMA_LUT[r], GAMMA_LUT[g], GAMMA_LUT[b])
+
+def scale_color(color, level) -> Tuple[int, int, int]:
+    """기존 scale_color 대체: 밝기 level(0~100) 적용 + 감마 보정 (반복 호출이면 scale_pixel)"""
+    lut = LEVEL_LUT[_clamp_level(level)]
+    r, g, b = color
+    return (lut[r], lut[g], lut[b])
+
+@lru_cache(maxsize=1024)
+def scale_pixel(color: Tuple[int, int, int], level: int) -> Tuple[int, int, int]:
+    """픽셀 루프용: translate로 한 번 계산한 뒤 (color, level) 캐시"""
+    return tuple(bytes(color).translate(LEVEL_LUT[_clamp_level(level)]))
+
+def scale_fraction(color, fraction: float) -> Tuple[int, int, int]:
+    """밝기를 0~1 비율로 받는 버전 (relief 페어 페이드)"""
+    return scale_color(color, round(fraction * 100))
+
+def dim(color, fraction: float) -> Tuple[int, int, int]:
+    """스트립에서 읽은(이미 보정된) 색을 0~1 비율로 어둡게"""
+    lut = DIM_LUT[_clamp_level(round(fraction * 100))]
+    r, g, b = color
+    return (lut[r], lut[g], lut[b])
+
+@lru_cache(maxsize=256)
+def fade_steps(color: Tuple[int, int, int], max_fraction: float, steps: int) -> Tuple[Tuple[int, int, int], ...]:
+    """0 → max_fraction 페이드 인 steps단계 색 (relief 페어 페이드). 첫 단계는 max_fraction/steps"""
+    linear = bytes(color)
+    return tuple(tuple(linear.translate(LEVEL_LUT[_clamp_level(round(max_fraction * (i + 1) / steps * 100))]))
+                 for i in range(steps))
+
+def scale_frame(frame: bytes, level) -> bytes:
+    """스트립 1장(선형 RGB bytes) 전체를 level로 스케일 + 감마 (bytes.translate)"""
+    return frame.translate(LEVEL_LUT[_clamp_level(level)])
+
+def gamma_frame(frame: bytes) -> bytes:
+    return frame.translate(GAMMA_LUT)
+
+def scale_array(arr, level):
+    """numpy uint8 배열(…×3) 버전. numpy 없으면 RuntimeError"""
+    if np is None:
+        raise RuntimeError("numpy not installed")
+    return _LEVEL_NP[_clamp_level(level)][arr]
+
+
+# ===== 마이크로벤치마크 =====
+def _float_scale(color, level):
+    # 변경 전 scale_color
+    r, g, b = color
+    return (int(r * level / 100), int(g * level / 100), int(b * level / 100))
+
+
+def _bench(fn, rounds: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        fn(i % 101)
+    return (time.perf_counter() - t0) / rounds * 1e6
+
+def benchmark(rounds: int = 20000, count: int = 24) -> None:
+    color = (255, 180, 40)
+    linear = bytes(color) * count
+    cases = [
+        ("float scale_color x px", lambda lv: [_float_scale(color, lv) for _ in range(count)]),
+        ("LUT scale_color x px",   lambda lv: [scale_color(color, lv) for _ in range(count)]),
+        ("LUT scale_pixel x px",   lambda lv: [scale_pixel(color, lv) for _ in range(count)]),
+        ("LUT scale_color once",   lambda lv: [scale_color(color, lv)] * count),
+        ("bytes.translate frame",  lambda lv: scale_frame(linear, lv)),
+    ]
+    if np is not None:
+        arr = np.frombuffer(linear, dtype=np.uint8).reshape(count, 3)
+        cases.append(("numpy LUT frame", lambda lv: scale_array(arr, lv)))
+    print(f"per-frame cost, {count}px strip, {rounds} rounds, gamma={GAMMA}")
+    base = None
+    for name, fn in cases:
+        us = _bench(fn, rounds)
+        base = base or us
+        # float 대비 비율: 1.0보다 크면 픽셀 단위 LUT가 오히려 느린 것
+        print(f"  {name:24s} {us:8.2f} us  x{us / base:.2f} vs float")
+    low = [scale_color((255, 255, 255), lv)[0] for lv in range(0, 11)]
+    print(f"levels 0..10 → {low} (before: {[_float_scale((255, 255, 255), lv)[0] for lv in range(0, 11)]})")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="감마/밝기 LUT 마이크로벤치마크")
+    ap.add_argument("--rounds", type=int, default=20000)
+    ap.add_argument("--pixels", type=int, default=24)
+    args = ap.parse_args()
+    benchmark(args.rounds, args.pixels)
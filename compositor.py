@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# 여러 링을 한 프레임에 같이 그리는 컴포지터
+#  - 기존: _fade(pixels_a ...) 가 끝나야 _fade(pixels_b ...) 시작 (블로킹 루프를 순서대로 호출)
+#  - 변경: 스트립마다 레이어 목록을 두고, 프레임 틱마다 모든 스트립의 모든 레이어를 시각 t로 평가
+#          → 레이어끼리 시간이 겹쳐도 되고, 한 틱의 show()는 hw_registry.frame()으로 묶어서 전송
+#  - 레이어: 시작 시각/길이, 블렌드 모드(normal/add/max/multiply), 픽셀별 마스크(0~1), 불투명도
+#  - cue(t, fn): 같은 타임라인에서 t초에 한 번 호출 (UART 트리거 등)
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import frame_table
+from animation import FPS, FrameClock, run_frames
+from hw_registry import frame
+
+Color = Tuple[int, int, int]
+OFF = (0, 0, 0)
+
+BLEND_MODES = ("normal", "add", "max", "multiply")
+
+
+def _blend(mode: str, dst: Color, src: Color, alpha: float) -> Color:
+    if mode == "add":
+        out = tuple(min(255, d + s * alpha) for d, s in zip(dst, src))
+    elif mode == "max":
+        out = tuple(max(d, s * alpha) for d, s in zip(dst, src))
+    elif mode == "multiply":
+        # alpha=0이면 그대로, 1이면 dst*src/255
+        out = tuple(d * (1 - alpha + alpha * s / 255) for d, s in zip(dst, src))
+    else:  # normal
+        out = tuple(d + (s - d) * alpha for d, s in zip(dst, src))
+    return out
+
+
+class Layer:
+    """
+    render(t, count) → 픽셀 색 리스트 또는 단색 튜플. t는 레이어 시작 기준 초(0~duration).
+    duration=None이면 끝나지 않는 레이어 (Compositor.run에 길이를 줘야 함)
+    """
+    def __init__(self, render: Callable[[float, int], object], start: float = 0.0,
+                 duration: Optional[float] = None, blend: str = "normal",
+                 mask: Optional[Sequence[float]] = None, opacity: float = 1.0):
+        if blend not in BLEND_MODES:
+            raise ValueError(f"unknown blend mode: {blend}")
+        self.render = render
+        self.start = start
+        self.duration = duration
+        self.blend = blend
+        self.mask = mask
+        self.opacity = opacity
+
+    @property
+    def end(self) -> Optional[float]:
+        return None if self.duration is None else self.start + self.duration
+
+    def active(self, t: float) -> bool:
+        return t >= self.start and (self.end is None or t <= self.end)
+
+
+def keyframe_level(keyframes: Sequence[Tuple[float, float]], t: float) -> float:
+    """[(시각, 레벨), ...] 구간 선형 보간"""
+    if t <= keyframes[0][0]:
+        return keyframes[0][1]
+    for (t0, l0), (t1, l1) in zip(keyframes, keyframes[1:]):
+        if t <= t1:
+            return l0 if t1 == t0 else l0 + (l1 - l0) * (t - t0) / (t1 - t0)
+    return keyframes[-1][1]
+
+def fade_layer(color: Color, keyframes: Sequence[Tuple[float, float]], start: float = 0.0, **kw) -> Layer:
+    """단색 레이어, 밝기(0~100)는 키프레임으로"""
+    def render(t, count):
+        level = int(keyframe_level(keyframes, t))
+        return frame_table._scaled(color, max(0, min(100, level)))
+    return Layer(render, start, keyframes[-1][0], **kw)
+
+def pulse_layer(color: Color, start: float = 0.0, rise: float = 0.5, fall: float = 0.5,
+                peak: float = 100, **kw) -> Layer:
+    """0 → peak → 0 한 번 (healing 페이드 1사이클)"""
+    return fade_layer(color, [(0.0, 0), (rise, peak), (rise + fall, 0)], start, **kw)
+
+
+class Compositor:
+    def __init__(self, strips: Dict[str, object]):
+        self.strips = strips
+        self.layers: Dict[str, List[Layer]] = {name: [] for name in strips}
+        self._cues: List[Tuple[float, Callable[[], None]]] = []
+        self._fired = 0
+
+    def add(self, strip_name: str, layer: Layer) -> Layer:
+        self.layers[strip_name].append(layer)
+        return layer
+
+    def cue(self, at: float, fn: Callable[[], None]) -> None:
+        self._cues.append((at, fn))
+        self._cues.sort(key=lambda c: c[0])
+
+    def clear(self) -> None:
+        for layers in self.layers.values():
+            layers.clear()
+        self._cues.clear()
+        self._fired = 0
+
+    @property
+    def duration(self) -> Optional[float]:
+        ends = [l.end for ls in self.layers.values() for l in ls] + [c[0] for c in self._cues]
+        if any(e is None for e in ends):
+            return None
+        return max(ends, default=0.0)
+
+    def compose(self, strip_name: str, t: float, count: int) -> List[Color]:
+        out = [OFF] * count
+        for layer in self.layers[strip_name]:
+            if not layer.active(t):
+                continue
+            src = layer.render(t - layer.start, count)
+            uniform = isinstance(src, tuple)
+            for i in range(count):
+                alpha = layer.opacity * (layer.mask[i] if layer.mask is not None else 1.0)
+                if alpha <= 0:
+                    continue
+                out[i] = _blend(layer.blend, out[i], src if uniform else src[i], alpha)
+        return [(int(r), int(g), int(b)) for r, g, b in out]
+
+    def render(self, t: float) -> None:
+        """시각 t의 모든 스트립을 한 틱으로 그림 + 지난 cue 실행"""
+        shared = [s for s in self.strips.values() if hasattr(s, "deferred")]
+        with frame(*shared):
+            for name, strip in self.strips.items():
+                colors = self.compose(name, t, len(strip))
+                frame_table.blit(strip, frame_table.pack(colors, frame_table.layout_of(strip)))
+                strip.show()
+        while self._fired < len(self._cues) and self._cues[self._fired][0] <= t:
+            self._cues[self._fired][1]()
+            self._fired += 1
+
+    def run(self, duration: Optional[float] = None, fps: float = FPS,
+            stop_event: Optional[threading.Event] = None,
+            should_stop: Optional[Callable[[], bool]] = None,
+            clock: Optional[FrameClock] = None, start_at: Optional[float] = None) -> bool:
+        """
+        타임라인 재생 (기본 길이: 마지막 레이어/cue가 끝날 때까지). 중단되면 False
+        start_at(monotonic): t=0 시각. 사이클마다 이전 start_at + 길이를 넘기면 누적 지연 없음
+        """
+        duration = self.duration if duration is None else duration
+        if duration is None:
+            raise ValueError("open-ended layer: pass duration")
+        self._fired = 0
+        n = max(1, int(round(duration * fps)))
+        frames = (lambda i=i: self.render(i / fps) for i in range(n + 1))
+        return run_frames(frames, fps, stop_event=stop_event, should_stop=should_stop, clock=clock,
+                          start_at=start_at)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# KoELECTRA 감정 분류기 ONNX(int8) 변환 + ONNX Runtime 추론
+#  - export: model_path의 파인튜닝 모델 → model.onnx → 동적 int8 양자화(model.int8.onnx)
+#  - 런타임: EMOTION_BACKEND=onnx 로 emotion_service가 이 분류기를 사용
+#  - compare: torch vs onnx 정확도 일치율 / 지연 / 메모리(RSS) 비교
+#  예) python emotion_onnx.py --tiny /tmp/tiny --out /tmp/tiny_onnx --compare
+import os
+import time
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List
+
+from emotion_service import SAMPLE_TEXTS, _BatchPredictor
+
+ONNX_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+
+def export_onnx(model_path: str, out_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """파인튜닝 모델을 ONNX로 내보내고(선택) 동적 int8 양자화. 반환: 사용할 onnx 경로"""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    sample = tokenizer("샘플 문장", return_tensors="pt")
+    names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    fp32_path = os.path.join(out_dir, ONNX_FILE)
+    torch.onnx.export(
+        model,
+        tuple(sample[k] for k in names),
+        fp32_path,
+        input_names=names,
+        output_names=["logits"],
+        dynamic_axes={**{k: {0: "batch", 1: "seq"} for k in names}, "logits": {0: "batch"}},
+        opset_version=opset,
+    )
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    int8_path = os.path.join(out_dir, INT8_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxEmotionClassifier(_BatchPredictor):
+    """EmotionClassifier와 같은 predict_emotion()/predict_batch() 인터페이스의 ONNX Runtime 분류기 (torch 불필요)"""
+    _tensor_type = "np"
+
+    def __init__(self, model_dir: str, threads: int = 0, dynamic: bool = True):
+        t0 = time.perf_counter()
+        import numpy as np
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self._np = np
+        self.model_path = model_dir
+        self.dynamic = dynamic
+        path = os.path.join(model_dir, INT8_FILE)
+        if not os.path.exists(path):
+            path = os.path.join(model_dir, ONNX_FILE)
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.load_time = time.perf_counter() - t0
+
+    def _probs(self, batch) -> List[List[float]]:
+        np = self._np
+        feed = {k: batch[k].astype(np.int64) for k in self.input_names}
+        logits = self.session.run(None, feed)[0]
+        e = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities = e / e.sum(axis=1, keepdims=True)
+        return probabilities.tolist()
+
+
+# ===== 일치율 / 성능 비교 =====
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return 0.0
+
+def parity_check(torch_clf, onnx_clf, texts=SAMPLE_TEXTS) -> dict:
+    """같은 문장에서 라벨 일치율과 확률 최대 오차"""
+    agree, max_diff = 0, 0.0
+    for text in texts:
+        l1, p1 = torch_clf.predict_emotion(text)
+        l2, p2 = onnx_clf.predict_emotion(text)
+        agree += (l1 == l2)
+        if l1 == l2:
+            max_diff = max(max_diff, abs(p1 - p2))
+    return {"agreement": agree / len(texts), "max_prob_diff": max_diff}
+
+def measure(backend: str, model_path: str, texts=SAMPLE_TEXTS, rounds: int = 5) -> dict:
+    """현재 프로세스에서 백엔드 1개를 로드해 지연/RSS 측정 (백엔드별로 별도 프로세스에서 호출)"""
+    from emotion_service import load_classifier
+    rss0 = _rss_mb()
+    clf = load_classifier(model_path, backend)
+    rss1 = _rss_mb()
+    clf.predict_emotion(texts[0])  # warmup
+    lat = []
+    for _ in range(rounds):
+        for text in texts:
+            t0 = time.perf_counter()
+            clf.predict_emotion(text)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+    lat.sort()
+    return {
+        "backend": backend,
+        "load_s": clf.load_time,
+        "p50_ms": statistics.median(lat),
+        "p95_ms": lat[int(len(lat) * 0.95) - 1],
+        "rss_mb": _rss_mb(),
+        "model_rss_mb": rss1 - rss0,
+    }
+
+def compare(model_path: str, onnx_dir: str, rounds: int = 5) -> None:
+    from emotion_service import EmotionClassifier
+    p = parity_check(EmotionClassifier(model_path), OnnxEmotionClassifier(onnx_dir))
+    print(f"parity: label agreement {p['agreement']:.1%}, max prob diff {p['max_prob_diff']:.4f}")
+
+    # 메모리는 서로 섞이지 않도록 백엔드마다 새 프로세스에서 측정
+    for backend, path in (("torch", model_path), ("onnx", onnx_dir)):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--measure", backend,
+             "--model", path, "--rounds", str(rounds)],
+            capture_output=True, text=True, check=True
+        )
+        print(out.stdout.strip())
+
+
+def main(argv=None):
+    from emotion_service import MODEL_PATH, make_tiny_model
+    ap = argparse.ArgumentParser(description="KoELECTRA → ONNX int8 변환/비교")
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--out", default=MODEL_PATH + "_onnx", help="ONNX 출력 폴더")
+    ap.add_argument("--tiny", metavar="DIR", help="랜덤 초기화 소형 ELECTRA로 검증")
+    ap.add_argument("--no-quantize", action="store_true")
+    ap.add_argument("--compare", action="store_true", help="변환 후 torch vs onnx 비교 리포트")
+    ap.add_argument("--measure", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    if args.measure:
+        r = measure(args.measure, args.model, rounds=args.rounds)
+        print(f"{r['backend']:6s} load={r['load_s']:.2f}s p50={r['p50_ms']:.1f}ms p95={r['p95_ms']:.1f}ms "
+              f"rss={r['rss_mb']:.0f}MB (model +{r['model_rss_mb']:.0f}MB)")
+        return
+
+    model_path = make_tiny_model(args.tiny) if args.tiny else args.model
+    path = export_onnx(model_path, args.out, quantize=not args.no_quantize)
+    print(f"exported: {path}")
+    if args.compare:
+        compare(model_path, args.out, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
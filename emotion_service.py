@@ -0,0 +1,564 @@
+# -*- coding: utf-8 -*-
+# KoELECTRA 감정 분류 상주(warm) 서비스
+#  - 모델/토크나이저를 1회만 로드하고 Unix 소켓으로 분류 요청을 처리
+#  - main.py 시작 시 --serve 로 띄워두면 stt&koelectra.py는 torch를 다시 import하지 않음
+#  - 요청/응답: JSON 한 줄 ({"text": "..."} → {"label": 0, "prob": 0.93, "name": "happy"})
+#  - 추론 백엔드: EMOTION_BACKEND=torch(기본) | onnx (emotion_onnx.py로 변환한 int8 모델)
+#  - 스레드 수/워밍업 횟수: tune_inference.py가 만든 프로파일(EMOTION_PROFILE)을 시작 시 적용
+#  - 같은 문장(정규화 기준)은 LRU 캐시에서 바로 응답 ({"cmd": "stats"}로 hit/miss 확인)
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+MODEL_PATH = "/home/capstone/Downloads/go_to_raspberrypi2"
+SOCKET_PATH = "/tmp/emotion_service.sock"
+EMOTION_BACKEND = os.environ.get("EMOTION_BACKEND", "torch")
+ONNX_MODEL_PATH = os.environ.get("EMOTION_ONNX_PATH", MODEL_PATH + "_onnx")
+PROFILE_PATH = os.environ.get("EMOTION_PROFILE", "/home/capstone/project/inference_profile.json")
+CACHE_SIZE = int(os.environ.get("EMOTION_CACHE_SIZE", "256"))
+READY_TIMEOUT = 120.0   # 상주 서비스 모델 로드(워밍업)를 기다리는 최대 시간
+
+emotion_labels = {
+    0: "happy",
+    1: "sad",
+    2: "angry"
+}
+
+
+SAMPLE_TEXTS = [
+    "오늘 기분이 정말 좋아요",
+    "너무 슬퍼서 눈물이 나",
+    "진짜 화가 나서 참을 수가 없어",
+    "친구랑 맛있는 거 먹어서 행복해",
+    "아무것도 하기 싫고 우울해",
+    "왜 자꾸 나한테만 그러는지 짜증나",
+    "시험에 합격했어",
+    "비가 와서 마음이 가라앉아",
+]
+
+MAX_LENGTH = 128
+
+
+# ===== 분류기 (프로세스 내 API) =====
+class _BatchPredictor:
+    """
+    토큰화 → 길이 버킷 → 배치 forward 공통 로직.
+    하위 클래스는 tokenizer, _tensor_type, _probs(batch)만 제공.
+    - dynamic=True : 배치 내 가장 긴 문장 길이까지만 패딩 (짧은 발화는 짧게 계산)
+    - dynamic=False: 기존처럼 항상 max_length=128 패딩
+    """
+    dynamic = True
+    _tensor_type = "pt"
+
+    def _probs(self, batch) -> List[List[float]]:
+        raise NotImplementedError
+
+    def predict_emotion(self, text: str) -> Tuple[int, float]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str], batch_size: int = 16) -> List[Tuple[int, float]]:
+        """
+        여러 문장을 한 번에 분류. 입력 순서대로 (label, prob) 리스트 반환.
+        비슷한 길이끼리 묶어서(길이 버킷) 패딩 낭비를 줄임.
+        """
+        if not texts:
+            return []
+        enc = self.tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)
+        keys = list(enc.keys())
+        order = sorted(range(len(texts)), key=lambda i: len(enc["input_ids"][i]))
+        padding = "longest" if self.dynamic else "max_length"
+
+        results = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            idxs = order[start:start + batch_size]
+            batch = self.tokenizer.pad(
+                [{k: enc[k][i] for k in keys} for i in idxs],
+                padding=padding, max_length=MAX_LENGTH, return_tensors=self._tensor_type
+            )
+            for i, probs in zip(idxs, self._probs(batch)):
+                label = max(range(len(probs)), key=probs.__getitem__)
+                results[i] = (label, float(probs[label]))
+        return results
+
+
+class EmotionClassifier(_BatchPredictor):
+    """
+    모델을 한 번 로드해 두고 predict_emotion()/predict_batch()를 반복 호출하는 분류기.
+    torch/transformers는 생성 시점에만 import 한다.
+    """
+    def __init__(self, model_path: str = MODEL_PATH, dynamic: bool = True):
+        t0 = time.perf_counter()
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self._torch = torch
+        self.model_path = model_path
+        self.dynamic = dynamic
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.model.eval()
+        self.load_time = time.perf_counter() - t0
+
+    def _probs(self, batch) -> List[List[float]]:
+        torch = self._torch
+        with torch.no_grad():
+            outputs = self.model(**batch)
+            logits = outputs.logits
+            probabilities = torch.softmax(logits, dim=1)
+        return probabilities.tolist()
+
+
+def load_profile(path: str = PROFILE_PATH, backend: str = EMOTION_BACKEND) -> dict:
+    """
+    튜닝 프로파일 읽기. 백엔드별 항목이 있으면 그것을 사용.
+    예) {"torch": {"num_threads": 2, "interop_threads": 1, "warmup": 3}}
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return profile.get(backend, {})
+
+def _set_torch_threads(num_threads: int = 0, interop_threads: int = 0) -> None:
+    import torch
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            # 병렬 작업이 한 번이라도 돈 뒤에는 바꿀 수 없음 → 모델 로드 전에 호출
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
+
+def load_classifier(model_path: str = None, backend: str = EMOTION_BACKEND, profile: dict = None):
+    """
+    백엔드 이름(torch/onnx)에 맞는 분류기 생성.
+    profile(기본: PROFILE_PATH)의 스레드 수를 적용하고, warmup 횟수만큼 미리 추론해 둔다.
+    """
+    if profile is None:
+        profile = load_profile(backend=backend)
+    threads = int(profile.get("num_threads", 0))
+
+    if backend == "onnx":
+        from emotion_onnx import OnnxEmotionClassifier
+        clf = OnnxEmotionClassifier(model_path or ONNX_MODEL_PATH, threads=threads)
+    elif backend == "torch":
+        _set_torch_threads(threads, int(profile.get("interop_threads", 0)))
+        clf = EmotionClassifier(model_path or MODEL_PATH)
+    else:
+        raise ValueError(f"unknown emotion backend: {backend}")
+
+    # 첫 추론이 느린 문제(메모리 할당/커널 준비)를 서비스 시작 시점에 미리 소모
+    for i in range(int(profile.get("warmup", 0))):
+        clf.predict_emotion(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)])
+    return clf
+
+
+# ===== 예측 캐시 =====
+def normalize_text(text: str) -> str:
+    """캐시 키: 유니코드 NFC + 공백 정리 (STT 결과의 띄어쓰기 차이 흡수)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class CachedClassifier:
+    """
+    분류기 앞단 LRU 캐시. 반복되는 문장은 토큰화/forward 없이 바로 반환.
+    벤치마크 측정이 왜곡되지 않도록 load_classifier()는 캐시 없이 돌려주고,
+    상주 서버/파이프라인에서만 감싸서 사용.
+    """
+    def __init__(self, classifier, capacity: int = CACHE_SIZE):
+        self.classifier = classifier
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.classifier, name)
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            return None
+
+    def _put(self, key, value) -> None:
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def predict_emotion(self, text: str) -> Tuple[int, float]:
+        key = normalize_text(text)
+        result = self._get(key)
+        if result is None:
+            result = self.classifier.predict_emotion(key)
+            self._put(key, result)
+        return result
+
+    def predict_batch(self, texts: List[str], batch_size: int = 16) -> List[Tuple[int, float]]:
+        keys = [normalize_text(t) for t in texts]
+        results = [self._get(k) for k in keys]
+        missing = list(dict.fromkeys(k for k, r in zip(keys, results) if r is None))
+        if missing:
+            fresh = dict(zip(missing, self.classifier.predict_batch(missing, batch_size)))
+            for k, r in fresh.items():
+                self._put(k, r)
+            results = [r if r is not None else fresh[k] for k, r in zip(keys, results)]
+        return results
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._cache),
+            "capacity": self.capacity,
+        }
+
+
+# ===== 소켓 서버 =====
+class EmotionServer:
+    """Unix 소켓 위에서 EmotionClassifier를 공유하는 상주 서버"""
+    def __init__(self, classifier: EmotionClassifier, socket_path: str = SOCKET_PATH):
+        self.classifier = classifier
+        self.socket_path = socket_path
+        self.lock = threading.Lock()       # 모델 forward는 한 번에 하나씩
+        self.stop_evt = threading.Event()
+        self.sock = None
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(4)
+        self.sock.settimeout(0.5)
+
+    def serve_forever(self):
+        if self.sock is None:
+            self.start()
+        try:
+            while not self.stop_evt.is_set():
+                try:
+                    conn, _ = self.sock.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        self.stop_evt.set()
+
+    def close(self):
+        try:
+            if self.sock:
+                self.sock.close()
+        except Exception:
+            pass
+        self.sock = None
+        for path in (self.socket_path, _pid_path(self.socket_path)):
+            try:
+                if os.path.exists(path):
+                    os.unlink(path)
+            except Exception:
+                pass
+
+    def _handle(self, conn):
+        with conn:
+            f = conn.makefile("rwb")
+            for raw in f:
+                try:
+                    req = json.loads(raw.decode("utf-8"))
+                    reply = self._dispatch(req)
+                except Exception as e:
+                    reply = {"error": str(e)}
+                f.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+                f.flush()
+
+    def _dispatch(self, req: dict) -> dict:
+        if req.get("cmd") == "ping":
+            return {"ok": True, "load_time": self.classifier.load_time}
+        if req.get("cmd") == "stats":
+            return self.classifier.stats() if hasattr(self.classifier, "stats") else {}
+        if "texts" in req:
+            t0 = time.perf_counter()
+            with self.lock:
+                results = self.classifier.predict_batch(req["texts"])
+            return {
+                "results": [[label, prob] for label, prob in results],
+                "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
+            }
+        text = (req.get("text") or "").strip()
+        if not text:
+            return {"error": "empty text"}
+        t0 = time.perf_counter()
+        with self.lock:
+            label, prob = self.classifier.predict_emotion(text)
+        return {
+            "label": label,
+            "prob": prob,
+            "name": emotion_labels.get(label),
+            "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
+        }
+
+
+# ===== 클라이언트 =====
+def _request(payload: dict, socket_path: str = SOCKET_PATH, timeout: float = 10.0) -> Optional[dict]:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(socket_path)
+            f = s.makefile("rwb")
+            f.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            line = f.readline()
+        return json.loads(line.decode("utf-8")) if line else None
+    except (OSError, ValueError):
+        return None
+
+def is_running(socket_path: str = SOCKET_PATH) -> bool:
+    reply = _request({"cmd": "ping"}, socket_path, timeout=1.0)
+    return bool(reply and reply.get("ok"))
+
+def wait_until_ready(socket_path: str = SOCKET_PATH, timeout: float = 120.0) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        if is_running(socket_path):
+            return True
+        time.sleep(0.2)
+    return False
+
+def _pid_path(socket_path: str) -> str:
+    return socket_path + ".pid"
+
+def _write_pid(socket_path: str, pid: int) -> None:
+    with open(_pid_path(socket_path), "w") as f:
+        f.write(str(pid))
+
+def daemon_alive(socket_path: str = SOCKET_PATH) -> bool:
+    """상주 서비스 프로세스가 살아 있는지 (모델 로드 중이어도 True). pid 파일 기준"""
+    try:
+        with open(_pid_path(socket_path)) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False
+    try:
+        # 부모(main.py)가 아직 거두지 않은 죽은 자식(좀비)도 kill(0)은 성공하므로 상태 확인,
+        # 남은 pid 파일의 번호를 다른 프로세스가 재사용한 경우도 걸러냄
+        with open(f"/proc/{pid}/stat") as f:
+            state = f.read().rsplit(")", 1)[1].split()[0]
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read()
+    except (OSError, IndexError):
+        return True   # /proc 없는 환경: kill(0) 결과만 사용
+    return state != "Z" and b"emotion_service" in cmdline
+
+def classify_or_wait(text: str, socket_path: str = SOCKET_PATH,
+                     ready_timeout: float = READY_TIMEOUT) -> Optional[Tuple[int, float]]:
+    """
+    상주 서비스로 분류. 서비스 프로세스가 살아 있으면(워밍업 중 / 응답 지연) 준비될 때까지 기다렸다 다시 요청.
+    프로세스가 없거나 죽었을 때만 None → 호출측이 로컬 로드로 대체 (라즈베리파이에서 모델 2개 동시 로드 방지)
+    """
+    deadline = time.time() + ready_timeout
+    while True:
+        result = classify(text, socket_path)
+        if result is not None:
+            return result
+        while not is_running(socket_path):
+            if not daemon_alive(socket_path) or time.time() >= deadline:
+                return None
+            time.sleep(0.2)
+        if time.time() >= deadline:
+            return None
+
+def classify(text: str, socket_path: str = SOCKET_PATH, timeout: float = 10.0) -> Optional[Tuple[int, float]]:
+    """
+    상주 서비스에 분류 요청. 서비스가 없거나 오류면 None (호출측에서 로컬 로드로 대체).
+    """
+    reply = _request({"text": text}, socket_path, timeout)
+    if not reply or "label" not in reply:
+        return None
+    return int(reply["label"]), float(reply["prob"])
+
+def cache_stats(socket_path: str = SOCKET_PATH) -> Optional[dict]:
+    """상주 서비스의 캐시 hit/miss 카운터"""
+    return _request({"cmd": "stats"}, socket_path, timeout=1.0)
+
+def classify_batch(texts: List[str], socket_path: str = SOCKET_PATH,
+                   timeout: float = 30.0) -> Optional[List[Tuple[int, float]]]:
+    """여러 문장을 한 번의 요청/forward로 분류. 서비스가 없으면 None"""
+    reply = _request({"texts": list(texts)}, socket_path, timeout)
+    if not reply or "results" not in reply:
+        return None
+    return [(int(label), float(prob)) for label, prob in reply["results"]]
+
+def spawn_daemon(model_path: str = None, socket_path: str = SOCKET_PATH,
+                 backend: str = EMOTION_BACKEND) -> subprocess.Popen:
+    """main.py에서 호출: 서비스를 백그라운드 프로세스로 띄움"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve",
+           "--socket", socket_path, "--backend", backend]
+    if model_path:
+        cmd += ["--model", model_path]
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+    )
+    # 모델 로드가 끝나기 전에도 클라이언트가 "로드 중"임을 알 수 있게 바로 기록
+    _write_pid(socket_path, proc.pid)
+    return proc
+
+
+# ===== 벤치마크 (cold vs warm) =====
+def make_tiny_model(out_dir: str, num_labels: int = 3) -> str:
+    """
+    실제 가중치 없이 벤치/검증용으로 쓰는 랜덤 초기화 소형 ELECTRA 모델 생성.
+    """
+    from transformers import ElectraConfig, ElectraForSequenceClassification, ElectraTokenizerFast
+
+    os.makedirs(out_dir, exist_ok=True)
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += [chr(c) for c in range(ord("가"), ord("가") + 400)]
+    vocab += list("abcdefghijklmnopqrstuvwxyz0123456789.,!?")
+    vocab_file = os.path.join(out_dir, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+
+    tokenizer = ElectraTokenizerFast(vocab_file=vocab_file, do_lower_case=False)
+    tokenizer.save_pretrained(out_dir)
+
+    config = ElectraConfig(
+        vocab_size=len(vocab), embedding_size=32, hidden_size=32,
+        num_hidden_layers=2, num_attention_heads=2, intermediate_size=64,
+        max_position_embeddings=128, num_labels=num_labels,
+    )
+    ElectraForSequenceClassification(config).save_pretrained(out_dir)
+    return out_dir
+
+def benchmark(model_path: str, text: str = "오늘 기분이 정말 좋아요", rounds: int = 5,
+              backend: str = EMOTION_BACKEND) -> dict:
+    """
+    cold: 매 요청마다 새 파이썬 프로세스가 모델 로드 + 1회 추론 (기존 subprocess 방식)
+    warm: 상주 서버에 소켓 요청만 보냄
+    """
+    cold = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--once", text,
+             "--model", model_path, "--backend", backend],
+            stdout=subprocess.DEVNULL, check=True
+        )
+        cold.append(time.perf_counter() - t0)
+
+    sock_path = f"/tmp/emotion_bench_{os.getpid()}.sock"
+    server = EmotionServer(load_classifier(model_path, backend), sock_path)
+    server.start()
+    th = threading.Thread(target=server.serve_forever, daemon=True)
+    th.start()
+    warm = []
+    try:
+        classify(text, sock_path)  # 첫 요청 워밍업
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            if classify(text, sock_path) is None:
+                raise RuntimeError("warm classify failed")
+            warm.append(time.perf_counter() - t0)
+    finally:
+        server.shutdown()
+        th.join(timeout=2.0)
+
+    result = {
+        "rounds": rounds,
+        "cold_avg_ms": sum(cold) / len(cold) * 1000.0,
+        "warm_avg_ms": sum(warm) / len(warm) * 1000.0,
+    }
+    result["speedup"] = result["cold_avg_ms"] / max(result["warm_avg_ms"], 1e-6)
+    return result
+
+
+def benchmark_batch(model_path: str, backend: str = EMOTION_BACKEND,
+                    texts: List[str] = None, repeat: int = 8, batch_size: int = 16) -> dict:
+    """
+    처리량 비교 (문장/초)
+      fixed128 : 기존 방식 — 한 문장씩, 항상 128 토큰 패딩
+      dynamic  : 한 문장씩, 문장 길이만큼만 패딩
+      batched  : predict_batch — 길이 버킷 + 배치 forward
+    """
+    texts = (texts or SAMPLE_TEXTS) * repeat
+    clf = load_classifier(model_path, backend)
+    clf.predict_batch(texts[:batch_size], batch_size)  # warmup
+
+    def run(fn):
+        t0 = time.perf_counter()
+        fn()
+        return len(texts) / (time.perf_counter() - t0)
+
+    clf.dynamic = False
+    fixed = run(lambda: [clf.predict_emotion(t) for t in texts])
+    clf.dynamic = True
+    dynamic = run(lambda: [clf.predict_emotion(t) for t in texts])
+    batched = run(lambda: clf.predict_batch(texts, batch_size))
+    return {"n": len(texts), "fixed128": fixed, "dynamic": dynamic, "batched": batched}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="KoELECTRA 감정 분류 상주 서비스")
+    ap.add_argument("--model", default=None, help="모델 경로 (기본: 백엔드별 기본 경로)")
+    ap.add_argument("--backend", default=EMOTION_BACKEND, choices=["torch", "onnx"])
+    ap.add_argument("--socket", default=SOCKET_PATH)
+    ap.add_argument("--serve", action="store_true", help="Unix 소켓 서버로 상주")
+    ap.add_argument("--once", metavar="TEXT", help="모델 로드 후 1회 분류하고 종료")
+    ap.add_argument("--bench", action="store_true", help="cold vs warm 지연 비교")
+    ap.add_argument("--bench-batch", action="store_true", help="고정 128 패딩 vs 동적/배치 처리량 비교")
+    ap.add_argument("--tiny", metavar="DIR", help="랜덤 초기화 소형 모델을 DIR에 만들고 사용")
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    model_path = make_tiny_model(args.tiny) if args.tiny else args.model
+
+    if args.serve:
+        _write_pid(args.socket, os.getpid())   # 직접 띄운 경우도 로드 중임을 표시
+        server = EmotionServer(CachedClassifier(load_classifier(model_path, args.backend)), args.socket)
+        server.start()
+        print(f"[emotion] ready on {args.socket} (load {server.classifier.load_time:.2f}s)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.once:
+        label, prob = load_classifier(model_path, args.backend).predict_emotion(args.once)
+        print(f"{emotion_labels.get(label)} {prob:.3f}")
+    elif args.bench:
+        default_path = ONNX_MODEL_PATH if args.backend == "onnx" else MODEL_PATH
+        r = benchmark(model_path or default_path, rounds=args.rounds, backend=args.backend)
+        print(f"cold {r['cold_avg_ms']:.1f} ms / warm {r['warm_avg_ms']:.1f} ms "
+              f"(x{r['speedup']:.1f}, {r['rounds']} rounds)")
+    elif args.bench_batch:
+        r = benchmark_batch(model_path, args.backend)
+        print(f"{r['n']} sentences: fixed128 {r['fixed128']:.1f}/s, dynamic {r['dynamic']:.1f}/s, "
+              f"batched {r['batched']:.1f}/s (x{r['batched'] / r['fixed128']:.1f})")
+    else:
+        ap.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,42 @@
 import time
-import board
-import neopixel
-import serial
+
+from hw_registry import get_strip, get_uart, frame
+import frame_table
+import uart_proto
+from pixel_stream import STREAM_REMOTE, get_remote_strip
 
 # === LED 설정 (라즈4 직접 제어 A/B) ===
-BRIGHTNESS = 1.0
 COLOR = (0,0,255)  # 예시 색상
 
-pixels_a = neopixel.NeoPixel(board.D12, 8, brightness=BRIGHTNESS, auto_write=False)
-pixels_b = neopixel.NeoPixel(board.D13, 12, brightness=BRIGHTNESS, auto_write=False)
+pixels_a = get_strip("A")
+pixels_b = get_strip("B")
 local_strips = [pixels_a, pixels_b]
 
 # === UART 설정 (라즈3로 데이터 전송 C/D) ===
-ser = serial.Serial('/dev/serial0', 115200, timeout=0.1)
+ser = get_uart()
+
+# PI3_STREAM=1: C/D도 여기서 그려서 픽셀 프레임으로 스트리밍
+remote_strips = [get_remote_strip("C"), get_remote_strip("D")] if STREAM_REMOTE else []
 
 # OFF 색상
 OFF = (0,0,0)
 
 # ===== 유틸 함수 =====
 def fill_strips(strips, color):
-    for strip in strips:
-        for i in range(len(strip)):
-            strip[i] = color
-        strip.show()
+    with frame(*strips):
+        for strip in strips:
+            frame_table.fill_color(strip, color)
 
 def send_uart(strip_name, color):
     """라즈3로 strip_name(C/D)과 RGB 색상 전송"""
-    r, g, b = color
-    ser.write(f"{strip_name},{r},{g},{b}\n".encode())
+    uart_proto.send(ser, uart_proto.strip(strip_name, 100, color))
+
+def send_uart_pair(color):
+    """C/D 같은 색을 프레임 하나로"""
+    if remote_strips:
+        fill_strips(remote_strips, color)
+        return
+    uart_proto.send(ser, uart_proto.strip("C", 100, color), uart_proto.strip("D", 100, color))
 
 def energy_blink_all(color, blink_times=1000, delay=0.1):  
    
@@ -35,29 +44,26 @@ def energy_blink_all(color, blink_times=1000, delay=0.1):
         # A/B 직접 ON
         fill_strips(local_strips, color)
         # C/D UART ON
-        send_uart("C", color)
-        send_uart("D", color)
+        send_uart_pair(color)
         time.sleep(delay)
 
         # A/B OFF
         fill_strips(local_strips, OFF)
         # C/D UART OFF
-        send_uart("C", OFF)
-        send_uart("D", OFF)
+        send_uart_pair(OFF)
         time.sleep(delay)
 
 # ===== 메인 실행 =====
 def energy_effect():
     try:
         # 라즈3에 에너지 모드 요청
-        ser.write(b"energy\n")
+        if not STREAM_REMOTE:
+            uart_proto.send(ser, uart_proto.mode("energy"))
         print("라즈3에 ENERGY 모드 요청 완료")
 
         energy_blink_all(COLOR)
 
     except KeyboardInterrupt:
         fill_strips(local_strips, OFF)
-        send_uart("C", OFF)
-        send_uart("D", OFF)
-        ser.close()
+        send_uart_pair(OFF)
         print("ENERGY 종료")
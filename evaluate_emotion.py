@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# 감정 분류 모델 오프라인 평가 / 처리량 측정
+#  - CSV(text,label) 또는 JSONL({"text":..., "label":...}) 말뭉치를 코어 수만큼의 프로세스로 분류
+#  - 정확도, emotion_labels 기준 혼동 행렬, 문장/초, p50/p95/p99 지연 출력
+#  - label은 0/1/2 또는 happy/sad/angry 둘 다 허용
+#  예) python evaluate_emotion.py corpus.csv --backend onnx --workers 4 --json report.json
+import os
+import csv
+import json
+import time
+import argparse
+from multiprocessing import Barrier, Pool
+from threading import BrokenBarrierError
+from typing import List, Optional, Tuple
+
+from emotion_service import EMOTION_BACKEND, SAMPLE_TEXTS, emotion_labels, load_classifier, load_profile
+
+_NAME_TO_LABEL = {name: label for label, name in emotion_labels.items()}
+
+# 워커 프로세스마다 1개씩 로드
+_clf = None
+# 워커 전원이 로드를 끝낼 때까지 기다리는 최대 시간(초)
+READY_TIMEOUT = 600
+
+
+def _parse_label(raw) -> Optional[int]:
+    if raw is None or raw == "":
+        return None
+    s = str(raw).strip().lower()
+    if s in _NAME_TO_LABEL:
+        return _NAME_TO_LABEL[s]
+    try:
+        return int(s)
+    except ValueError:
+        return None
+
+def load_corpus(path: str) -> List[Tuple[str, Optional[int]]]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    obj = json.loads(line)
+                    rows.append((obj["text"], _parse_label(obj.get("label"))))
+        else:
+            for row in csv.DictReader(f):
+                rows.append((row["text"], _parse_label(row.get("label"))))
+    return [(t.strip(), l) for t, l in rows if t and t.strip()]
+
+
+def _init_worker(model_path: Optional[str], backend: str, threads: int, ready):
+    global _clf
+    # 프로세스 여러 개가 코어를 나눠 쓰므로 워커당 스레드 수 제한 (torch/onnx 공통 profile 경로)
+    profile = dict(load_profile(backend=backend))
+    if threads:
+        profile["num_threads"] = threads
+    _clf = load_classifier(model_path, backend, profile=profile)
+    _clf.predict_emotion(SAMPLE_TEXTS[0])
+    # 모든 워커가 로드를 마쳐야 부모가 측정을 시작
+    ready.wait()
+
+def _classify_chunk(texts: List[str]) -> List[Tuple[int, float, float]]:
+    out = []
+    for text in texts:
+        t0 = time.perf_counter()
+        label, prob = _clf.predict_emotion(text)
+        out.append((label, prob, time.perf_counter() - t0))
+    return out
+
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+def evaluate(corpus, model_path: Optional[str] = None, backend: str = EMOTION_BACKEND,
+             workers: int = 0, chunk: int = 16, threads_per_worker: int = 1) -> dict:
+    workers = workers or os.cpu_count() or 1
+    texts = [t for t, _ in corpus]
+    chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+
+    ready = Barrier(workers + 1)
+    t_load = time.perf_counter()
+    with Pool(workers, initializer=_init_worker,
+              initargs=(model_path, backend, threads_per_worker, ready)) as pool:
+        # 모델 로드(워커 초기화)는 처리량 측정에서 제외: 워커 전원이 준비된 뒤에 t0
+        try:
+            ready.wait(READY_TIMEOUT)
+        except BrokenBarrierError:
+            raise RuntimeError(f"workers not ready within {READY_TIMEOUT}s (model load failed?)")
+        load_s = time.perf_counter() - t_load
+        t0 = time.perf_counter()
+        results = [r for part in pool.map(_classify_chunk, chunks) for r in part]
+        wall = time.perf_counter() - t0
+
+    n_labels = len(emotion_labels)
+    confusion = [[0] * n_labels for _ in range(n_labels)]
+    correct = labeled = 0
+    for (_, gold), (pred, _, _) in zip(corpus, results):
+        if gold is None or not (0 <= gold < n_labels):
+            continue
+        labeled += 1
+        correct += (gold == pred)
+        confusion[gold][pred] += 1
+
+    lat = sorted(r[2] * 1000.0 for r in results)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "threads_per_worker": threads_per_worker,
+        "load_s": load_s,
+        "sentences": len(results),
+        "labeled": labeled,
+        "accuracy": correct / labeled if labeled else None,
+        "confusion": confusion,
+        "sentences_per_sec": len(results) / wall if wall else 0.0,
+        "p50_ms": percentile(lat, 50),
+        "p95_ms": percentile(lat, 95),
+        "p99_ms": percentile(lat, 99),
+    }
+
+def format_report(r: dict) -> str:
+    names = [emotion_labels[i] for i in range(len(emotion_labels))]
+    lines = [f"backend={r['backend']} workers={r['workers']}x{r['threads_per_worker']}thr "
+             f"sentences={r['sentences']} load={r['load_s']:.1f}s"]
+    if r["accuracy"] is not None:
+        lines.append(f"accuracy {r['accuracy']:.2%} ({r['labeled']} labeled)")
+        lines.append("confusion (row=gold, col=pred)")
+        lines.append("        " + "".join(f"{n:>8s}" for n in names))
+        for name, row in zip(names, r["confusion"]):
+            lines.append(f"{name:>8s}" + "".join(f"{v:8d}" for v in row))
+    lines.append(f"throughput {r['sentences_per_sec']:.1f} sent/s  "
+                 f"latency p50={r['p50_ms']:.1f}ms p95={r['p95_ms']:.1f}ms p99={r['p99_ms']:.1f}ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="감정 분류 모델 말뭉치 평가")
+    ap.add_argument("corpus", help="CSV(text,label) 또는 JSONL")
+    ap.add_argument("--model", default=None)
+    ap.add_argument("--backend", default=EMOTION_BACKEND, choices=["torch", "onnx"])
+    ap.add_argument("--workers", type=int, default=0, help="프로세스 수 (기본: 코어 수)")
+    ap.add_argument("--threads", type=int, default=1, help="워커당 추론 스레드 수 (torch/onnx, 0=프로파일 값)")
+    ap.add_argument("--chunk", type=int, default=16)
+    ap.add_argument("--json", metavar="PATH", help="결과를 JSON으로 저장 (회귀 비교용)")
+    args = ap.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"빈 말뭉치: {args.corpus}")
+        return 1
+    r = evaluate(corpus, args.model, args.backend, args.workers, args.chunk, args.threads)
+    print(format_report(r))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(r, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,41 +1,39 @@
 import time
-import board
-import neopixel
-import serial
+
+from hw_registry import get_strip, get_uart, get_receiver
+import frame_table
+from color_lut import scale_pixel
+import uart_proto
 
 # === LED 설정 ===
-BRIGHTNESS = 1.0
 COLOR = (255, 255, 0)
 
-pixels_a = neopixel.NeoPixel(board.D12, 8, brightness=BRIGHTNESS, auto_write=False)
-pixels_b = neopixel.NeoPixel(board.D13, 12, brightness=BRIGHTNESS, auto_write=False)
+pixels_a = get_strip("A")
+pixels_b = get_strip("B")
 strips = {'A': pixels_a, 'B': pixels_b}
 
 # === UART 설정 ===
-ser = serial.Serial('/dev/serial0', 115200, timeout=0.1)
+ser = get_uart()
+rx = get_receiver()   # clock_sync와 공유 (포트당 Receiver 1개)
+# 라즈3 D(24픽셀) 순차 점등+소등 ≈ 9.6초 + 여유
+ACK_TIMEOUT = 15.0
 
 # ===== 유틸 함수 =====
-def scale_color(color, level):
-    r, g, b = color
-    return (int(r * level / 100), int(g * level / 100), int(b * level / 100))
-
 def fill_strip(strip, level, index=None):
     if index is None:
-        color = scale_color(COLOR, level)
-        for i in range(len(strip)):
-            strip[i] = color
-    else:
-        strip[index] = scale_color(COLOR, level)
+        frame_table.fill(strip, COLOR, level)
+        return
+    strip[index] = scale_pixel(COLOR, int(level))
     strip.show()
 
 def send_uart(strip_name):
     """라즈3로 LED 점등 명령 전송 후 완료 대기"""
-    ser.write(f"{strip_name},100\n".encode())
-    # ✅ 라즈3에서 DONE 수신 대기
-    while True:
-        line = ser.readline().decode().strip()
-        if line == "DONE":
-            break
+    # 이전 요청의 늦은 ACK(시간 초과 후 도착 / 모드 전환으로 중단된 render_focus)가 남아 있으면 버림
+    rx.discard("ack")
+    uart_proto.send(ser, uart_proto.strip(strip_name, 100))
+    # ✅ 라즈3에서 DONE(ACK) 수신 대기 (응답이 없어도 멈추지 않음)
+    if rx.wait_for("ack", ACK_TIMEOUT) is None:
+        print(f"[FOCUS] {strip_name} ACK 시간 초과")
 
 def circular_fill(strip_name, strip, duration=0.08):
     """라즈4 스트립 순차 점등 → 순차 소등 (A는 반대 방향)"""
@@ -65,7 +63,7 @@ def circular_fill(strip_name, strip, duration=0.08):
 # ===== 메인 실행 =====
 def focus_effect():
     try:
-        ser.write(b"focus\n")  # 라즈3 focus 모드 요청
+        uart_proto.send(ser, uart_proto.mode("focus"))  # 라즈3 focus 모드 요청
         print("라즈3에 FOCUS 모드 요청 완료")
 
         while True:
@@ -79,5 +77,4 @@ def focus_effect():
         # 모두 OFF
         for strip in strips.values():
             fill_strip(strip, 0)
-        ser.close()
         print("FOCUS 종료")
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# 미리 계산한 프레임 테이블
+#  - 기존: 프레임마다 scale_color(float 곱/나눗셈) → for i in range(len(strip)): strip[i] = color
+#          (NeoPixel __setitem__이 픽셀마다 튜플 파싱 + 바이트 순서 변환)
+#  - 변경: (효과, 색, 레벨, 스트립 길이, 바이트 순서)별로 스트립 1장 분량 bytes를 한 번만 만들어 캐시하고
+#          재생 시에는 픽셀 버퍼에 슬라이스 대입 한 번으로 복사(blit)
+#  - 원시 버퍼를 못 쓰는 백엔드(밝기<1, 다른 구현)는 픽셀 단위 대입으로 자동 폴백
+#  - 프레임에 들어가는 값은 color_lut으로 밝기 + 감마 보정된 값
+#
+# 벤치마크: python frame_table.py [--frames 2000]
+import time
+import argparse
+from functools import lru_cache
+from typing import Iterator, Tuple
+
+import color_lut
+
+RGB = (3, (0, 1, 2))  # (bpp, (r, g, b) 바이트 위치) — 폴백용 기본 레이아웃
+
+Layout = Tuple[int, Tuple[int, ...]]
+
+
+# ===== 레이아웃 / blit =====
+def _pixels_of(strip):
+    # hw_registry.SharedStrip이면 안쪽 NeoPixel
+    return getattr(strip, "pixels", strip)
+
+def _raw_buffer(pixels):
+    """show()가 그대로 내보내는 버퍼를 직접 쓸 수 있으면 (buf, offset), 아니면 None"""
+    buf = getattr(pixels, "_post_brightness_buffer", None)
+    if buf is None or getattr(pixels, "_pre_brightness_buffer", None) is not None:
+        return None  # 밝기 < 1 이면 원본/보정 버퍼가 따로 있으므로 직접 쓰면 안 됨
+    if getattr(pixels, "brightness", 1.0) < 0.999:
+        return None
+    return buf, getattr(pixels, "_offset", 0)
+
+def layout_of(strip) -> Layout:
+    pixels = _pixels_of(strip)
+    if _raw_buffer(pixels) is None:
+        return RGB
+    order = getattr(pixels, "_byteorder", None)
+    bpp = getattr(pixels, "_bpp", None) or getattr(pixels, "bpp", 3)
+    if not order:
+        return RGB
+    return (bpp, tuple(order[:3]))
+
+def blit(strip, frame: bytes) -> None:
+    """frame(layout_of(strip) 기준 bytes)을 픽셀 버퍼에 복사. show()는 호출하지 않음"""
+    lock = getattr(strip, "lock", None)
+    if lock is None:
+        _blit(_pixels_of(strip), frame)
+        return
+    with lock:
+        # SharedStrip: 내용이 같으면 dirty로 만들지 않음 → 다음 show()가 생략됨
+        if _blit(_pixels_of(strip), frame):
+            strip.mark_dirty()
+
+def _blit(pixels, frame: bytes) -> bool:
+    """복사 후 실제로 바뀌었으면 True"""
+    raw = _raw_buffer(pixels)
+    if raw is not None:
+        buf, off = raw
+        end = off + len(frame)
+        if buf[off:end] == frame:
+            return False
+        buf[off:end] = frame
+        return True
+    changed = False
+    for i in range(len(frame) // 3):
+        j = i * 3
+        color = (frame[j], frame[j + 1], frame[j + 2])
+        if tuple(pixels[i]) != color:
+            pixels[i] = color
+            changed = True
+    return changed
+
+
+def from_rgb(rgb: bytes, layout: Layout) -> bytes:
+    """RGB 순서 bytes → 스트립 바이트 순서 (채널별 슬라이스 대입)"""
+    bpp, order = layout
+    if layout == RGB:
+        return bytes(rgb)
+    out = bytearray(len(rgb) // 3 * bpp)
+    for ch, pos in enumerate(order):
+        out[pos::bpp] = rgb[ch::3]
+    return bytes(out)
+
+def blit_rgb(strip, rgb: bytes) -> None:
+    """이미 보정된 RGB 프레임(예: 라즈4가 보낸 픽셀)을 그대로 복사"""
+    blit(strip, from_rgb(rgb, layout_of(strip)))
+
+
+# ===== 프레임 컴파일 (캐시) =====
+def _pixel_bytes(color, layout: Layout) -> bytes:
+    bpp, order = layout
+    unit = bytearray(bpp)
+    for value, pos in zip(color, order):
+        unit[pos] = value
+    return bytes(unit)
+
+def _scaled(color, level) -> Tuple[int, int, int]:
+    # 선형(감마 전) 밝기 스케일 — 컴포지터 합성용, 출력은 pack()에서 감마 보정
+    r, g, b = color
+    return (int(r * level / 100), int(g * level / 100), int(b * level / 100))
+
+@lru_cache(maxsize=4096)
+def fill_frame(color, level: int, count: int, layout: Layout = RGB) -> bytes:
+    """("fill", color, level, count, layout) → 전체 단색 프레임 (밝기 + 감마 LUT)"""
+    return _pixel_bytes(color_lut.scale_color(color, level), layout) * count
+
+@lru_cache(maxsize=256)
+def color_frame(color, count: int, layout: Layout = RGB) -> bytes:
+    """밝기 스케일 없이 감마만 적용한 단색 프레임"""
+    return _pixel_bytes(color_lut.gamma(color), layout) * count
+
+def pack(colors, layout: Layout = RGB) -> bytes:
+    """선형 픽셀 색 리스트 → 감마 보정된 프레임 bytes (전부 같은 색이면 캐시된 단색 프레임)"""
+    first = colors[0] if colors else (0, 0, 0)
+    if all(c == first for c in colors):
+        return color_frame(tuple(first), len(colors), layout)
+    return color_lut.gamma_frame(b"".join(_pixel_bytes(c, layout) for c in colors))
+
+@lru_cache(maxsize=256)
+def fade_table(color, start: int, end: int, count: int, n: int, layout: Layout = RGB) -> Tuple[bytes, ...]:
+    """("fade", color, start→end, count, n단계) → n+1장 프레임. 마지막은 정확히 end"""
+    n = max(1, n)
+    return tuple(fill_frame(color, int(start + (end - start) * i / n), count, layout)
+                 for i in range(n + 1))
+
+
+# ===== 재생 헬퍼 =====
+def fill(strip, color, level, show: bool = True) -> None:
+    """scale_color + 픽셀 루프 대신 캐시된 프레임 blit"""
+    blit(strip, fill_frame(tuple(color), int(level), len(strip), layout_of(strip)))
+    if show:
+        strip.show()
+
+def fill_color(strip, color, show: bool = True) -> None:
+    blit(strip, color_frame(tuple(color), len(strip), layout_of(strip)))
+    if show:
+        strip.show()
+
+def fade_table_frames(strip, color, start, end, duration: float, fps: float) -> Iterator:
+    """animation.run_frames용 프레임 생성기 (animation.fade_frames와 같은 프레임 수)"""
+    n = max(1, int(round(duration * fps)))
+    table = fade_table(tuple(color), int(start), int(end), len(strip), n, layout_of(strip))
+    for frame in table:
+        yield lambda frame=frame: (blit(strip, frame), strip.show())
+
+def cache_info() -> dict:
+    return {"fill": fill_frame.cache_info()._asdict(), "fade": fade_table.cache_info()._asdict()}
+
+
+# ===== 벤치마크 =====
+class FakePixelBuf:
+    """
+    adafruit_pixelbuf와 같은 구조의 가짜 스트립 (GRB, brightness 1.0, show는 하드웨어 없이 no-op).
+    __setitem__은 라이브러리처럼 튜플 파싱 + 바이트 순서 변환을 파이썬으로 수행
+    """
+    def __init__(self, n: int):
+        self._bpp = 3
+        self._byteorder = (1, 0, 2)
+        self._offset = 0
+        self.brightness = 1.0
+        self._pre_brightness_buffer = None
+        self._post_brightness_buffer = bytearray(n * 3)
+        self._n = n
+        self.shows = 0
+
+    def __len__(self):
+        return self._n
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError
+        r, g, b = value
+        off = self._offset + index * self._bpp
+        buf = self._post_brightness_buffer
+        buf[off + self._byteorder[0]] = int(r)
+        buf[off + self._byteorder[1]] = int(g)
+        buf[off + self._byteorder[2]] = int(b)
+
+    def __getitem__(self, index):
+        off = self._offset + index * self._bpp
+        buf = self._post_brightness_buffer
+        return tuple(buf[off + p] for p in self._byteorder)
+
+    def show(self):
+        self.shows += 1
+
+
+def _legacy_fill(strip, color, level):
+    c = color_lut.scale_color(color, level)
+    for i in range(len(strip)):
+        strip[i] = c
+    strip.show()
+
+def _run(draw, strips, frames: int) -> dict:
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for f in range(frames):
+        level = f % 101
+        for strip in strips:
+            draw(strip, (255, 0, 0), level)
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    return {"fps": frames / wall, "frame_us": wall / frames * 1e6,
+            "cpu_pct": 100.0 * cpu / wall if wall else 0.0}
+
+def benchmark(frames: int = 2000) -> None:
+    # 프레임 1장 = A/B/C/D 네 링(8/12/16/24픽셀) 모두 갱신
+    sizes = (8, 12, 16, 24)
+    old_strips = [FakePixelBuf(n) for n in sizes]
+    new_strips = [FakePixelBuf(n) for n in sizes]
+    legacy = _run(_legacy_fill, old_strips, frames)
+    _run(fill, new_strips, 101)  # 테이블 예열 (레벨 0~100)
+    table = _run(fill, new_strips, frames)
+    same = all(a._post_brightness_buffer == b._post_brightness_buffer
+               for a, b in zip(old_strips, new_strips))
+    print(f"frames={frames}, strips=8/12/16/24px (fake pixelbuf, GRB)")
+    print(f"{'mode':8s} {'fps':>10s} {'us/frame':>10s} {'cpu%':>6s}")
+    for name, r in (("per-pixel", legacy), ("table", table)):
+        print(f"{name:8s} {r['fps']:10.0f} {r['frame_us']:10.1f} {r['cpu_pct']:6.1f}")
+    print(f"speedup: x{table['fps'] / legacy['fps']:.1f}, output identical: {same}")
+    print(f"cache: {cache_info()['fill']}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="프레임 테이블 벤치마크 (가짜 스트립)")
+    ap.add_argument("--frames", type=int, default=2000)
+    args = ap.parse_args()
+    benchmark(args.frames)
@@ -1,16 +1,22 @@
 import time
-import board
-import neopixel
-import serial
 import threading
 from typing import Optional
 
-BRIGHTNESS = 1.0
-pixels_a = neopixel.NeoPixel(board.D12, 8,  brightness=BRIGHTNESS, auto_write=False)
-pixels_b = neopixel.NeoPixel(board.D13, 12, brightness=BRIGHTNESS, auto_write=False)
+from hw_registry import get_strip, get_uart
+from animation import run_frames
+import frame_table
+from compositor import Compositor, pulse_layer
+import uart_proto
+from uart_proto import COLOR_NAMES
+from pixel_stream import STREAM_REMOTE, get_remote_strip
+from clock_sync import get_sync
+
+# 공용 레지스트리의 A(8)/B(12) 스트립
+pixels_a = get_strip("A")
+pixels_b = get_strip("B")
 
 # 라즈3(UART) 통신
-ser = serial.Serial('/dev/serial0', 115200, timeout=0.1)
+ser = get_uart()
 
 # 감정 → 색상
 COLOR_BY_FEELING = {
@@ -25,36 +31,47 @@ _FEELING_TO_NAME = {
 }
 DEFAULT_COLOR = (255, 255, 255)
 _DEFAULT_NAME = "white"
-def _scale_color(color, level):
-    r, g, b = color
-    return (int(r * level / 100), int(g * level / 100), int(b * level / 100))
 
+# 한 사이클 타임라인(초): A 펄스 → B 펄스 → C 트리거 → D 트리거 → 다음 사이클
+_PULSE = 0.5          # 상승/하강 각각
+_B_START = 1.0
+_C_CUE = 2.0
+_D_CUE = 4.0
+_CYCLE = 5.5
+_LEAD = 0.1           # 첫 사이클 시작 전 여유 (동기화 직후 C/D 예약 전송 시간)
 def _fill_strip(strip, level, color):
-    c = _scale_color(color, max(0, min(100, int(level))))
-    for i in range(len(strip)):
-        strip[i] = c
-    strip.show()
+    # 캐시된 프레임을 픽셀 버퍼에 한 번에 복사 (픽셀 루프 없음)
+    frame_table.fill(strip, color, level)
 
 def _fade(strip, start, end, duration=0.5, steps=50, color=(255,0,0), stop_event: Optional[threading.Event] = None) -> bool:
-    steps = max(1, int(steps))
-    delay = duration / steps
-    for i in range(steps + 1):
-        if stop_event and stop_event.is_set():
-            return False
-        level = start + (end - start) * i / steps
-        _fill_strip(strip, level, color)
-        time.sleep(delay)
-    return True
+    # steps/duration을 목표 FPS로 보고 프레임 클럭에 맞춰 재생 (show 시간만큼 늘어지지 않음)
+    fps = max(1, int(steps)) / max(duration, 1e-3)
+    frames = frame_table.fade_table_frames(strip, color, start, end, duration, fps)
+    return run_frames(frames, fps, stop_event=stop_event)
 
-def _send_to_raspi3(name: str, brightness: int, color_name: str):
+def _send_to_raspi3(name: str, brightness: int, color_name: str, *more):
+    """(name, brightness, color_name) 명령 1개 이상을 프레임 하나로 전송"""
+    args = (name, brightness, color_name) + more
     try:
-        command = f"{name},{int(brightness)},{color_name}\n".encode()
-        ser.write(command)
+        uart_proto.send(ser, *(
+            uart_proto.strip(n, b, COLOR_NAMES.get(c, COLOR_NAMES[_DEFAULT_NAME]))
+            for n, b, c in zip(args[0::3], args[1::3], args[2::3])
+        ))
         ser.flush()
     except Exception as e:
         print(f"UART write error: {e}")
         pass
 
+def _schedule_raspi3(sync, t0: float, color_name: str) -> None:
+    """사이클 시작 t0 기준 C/D 트리거를 라즈3 시각으로 예약해 프레임 하나로 미리 전송"""
+    color = COLOR_NAMES.get(color_name, COLOR_NAMES[_DEFAULT_NAME])
+    try:
+        uart_proto.send(ser,
+                        *uart_proto.timed(sync.to_remote(t0 + _C_CUE), uart_proto.strip('C', 100, color)),
+                        *uart_proto.timed(sync.to_remote(t0 + _D_CUE), uart_proto.strip('D', 100, color)))
+    except Exception as e:
+        print(f"UART write error: {e}")
+
 def _sleep_check(sec: float, stop_event: Optional[threading.Event] = None) -> None:
     end = time.time() + sec
     while time.time() < end:
@@ -69,37 +86,57 @@ def healing_effect(current_feeling: str, wanted_feeling: str = "healing", stop_e
     """
     color_rgb = COLOR_BY_FEELING.get(current_feeling, DEFAULT_COLOR)
     color_name = _FEELING_TO_NAME.get(current_feeling, _DEFAULT_NAME)
+    sync = None
 
     try:
-        ser.write(b"healing\n")
+        if not STREAM_REMOTE:
+            uart_proto.send(ser, uart_proto.mode("healing"))
         _sleep_check(0.2,stop_event)
+        # 시각 지정 명령을 쓸 수 있으면(바이너리 프로토콜 + PONG 응답) 라즈3 트리거도 같은 절대 타임라인에 예약
+        if not STREAM_REMOTE and uart_proto.PROTOCOL == "binary":
+            sync = get_sync()
+            if not sync.refresh():
+                print("[healing] clock sync 실패 → 도착 즉시 실행 방식으로")
+                sync = None
+        # A/B 레이어와 C/D 트리거를 하나의 타임라인으로 (틱마다 두 링을 같이 평가)
+        strips = {"A": pixels_a, "B": pixels_b}
+        if STREAM_REMOTE:
+            strips.update(C=get_remote_strip("C"), D=get_remote_strip("D"))
+        comp = Compositor(strips)
+        comp.add("A", pulse_layer(color_rgb, 0.0, _PULSE, _PULSE))
+        comp.add("B", pulse_layer(color_rgb, _B_START, _PULSE, _PULSE))
+        if STREAM_REMOTE:
+            # C/D도 같은 타임라인에서 직접 렌더링 → 픽셀 프레임 스트리밍
+            comp.add("C", pulse_layer(color_rgb, _C_CUE, _PULSE, _PULSE))
+            comp.add("D", pulse_layer(color_rgb, _D_CUE, _PULSE, _PULSE))
+        elif sync is None:
+            comp.cue(_C_CUE, lambda: _send_to_raspi3('C', 100, color_name, 'C', 0, color_name))
+            comp.cue(_D_CUE, lambda: _send_to_raspi3('D', 100, color_name, 'D', 0, color_name))
+        # 사이클 시작 시각을 절대값으로 이어 붙임 (t0 += _CYCLE) → 사이클이 늦어도 누적되지 않음
+        t0 = time.monotonic() + _LEAD
         while not (stop_event and stop_event.is_set()):
-            if not _fade(pixels_a, 0, 100, duration=0.5, steps=50, color=color_rgb, stop_event=stop_event): break
-            if not _fade(pixels_a, 100, 0, duration=0.5, steps=50, color=color_rgb, stop_event=stop_event): break
-            if not _fade(pixels_b, 0, 100, duration=0.5, steps=50, color=color_rgb, stop_event=stop_event): break
-            if not _fade(pixels_b, 100, 0, duration=0.5, steps=50, color=color_rgb, stop_event=stop_event): break
-
-            _send_to_raspi3('C', 100, color_name); #_sleep_check(5, stop_event)
-            _send_to_raspi3('C', 0, color_name);   _sleep_check(2, stop_event)
-
-            _send_to_raspi3('D', 100, color_name); #_sleep_check(5, stop_event)
-            _send_to_raspi3('D', 0, color_name);   _sleep_check(1.5, stop_event)
+            if sync is not None:
+                _schedule_raspi3(sync, t0, color_name)
+                # 재동기화는 백그라운드로 (t0가 정해진 뒤 블로킹하면 사이클이 늦게 시작됨)
+                sync.refresh_async()
+            if not comp.run(_CYCLE, stop_event=stop_event, start_at=t0):
+                break
+            t0 += _CYCLE
     finally:
         # 안전 종료
         _fill_strip(pixels_a, 0, color_rgb)
         _fill_strip(pixels_b, 0, color_rgb)
-        _send_to_raspi3('C', 0 , color_name)
-        _send_to_raspi3('D', 0, color_name)
+        if STREAM_REMOTE:
+            _fill_strip(get_remote_strip("C"), 0, color_rgb)
+            _fill_strip(get_remote_strip("D"), 0, color_rgb)
+        if sync is not None:
+            uart_proto.send(ser, uart_proto.cancel())   # 아직 안 온 이번 사이클 C/D 트리거 취소
+        _send_to_raspi3('C', 0, color_name, 'D', 0, color_name)
 
 def cleanup():
-    """프로그램 종료 시 호출 권장"""
-    try:
-        _send_to_raspi3('C', 0, _DEFAULT_NAME)
-        _send_to_raspi3('D', 0 , _DEFAULT_NAME)
-    except Exception:
-        pass
+    """프로그램 종료 시 호출 권장 (포트 닫기는 hw_registry.close_all())"""
     try:
-        ser.close()
+        _send_to_raspi3('C', 0, _DEFAULT_NAME, 'D', 0, _DEFAULT_NAME)
     except Exception:
         pass
 
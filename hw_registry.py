@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# LED 스트립 / UART 공용 레지스트리
+#  - 물리 스트립·포트마다 객체를 딱 1개만 만들고 모든 모션 모듈이 같은 핸들을 공유
+#    (모듈마다 NeoPixel 버퍼와 /dev/serial0 fd를 따로 만들던 것 제거)
+#  - 쓰기는 잠금으로 직렬화 → 여러 줄 명령이 다른 스레드 명령과 섞이지 않음
+#  - 종료 시 close_all() 한 번으로 전부 끄고 닫음 (atexit에도 등록)
+#  - 스트립별 dirty 추적: 실제로 바뀐 픽셀이 없으면 show()를 생략하고,
+#    with frame(...):  블록 안에서는 show()를 모았다가 블록 끝(프레임 틱)에 스트립당 1번만 전송
+import os
+import atexit
+import threading
+from contextlib import contextmanager
+
+# neopixel: 실제 장치 / sim: led_sim의 헤드리스 시뮬레이터 (라즈베리파이 밖에서 실행·측정)
+BACKEND_ENV = "LED_BACKEND"
+
+# 이름 → (board 핀 이름, 픽셀 수)
+#  A/B: 라즈4 로컬 링, C/D: 라즈3 링
+STRIP_CONFIGS = {
+    "A": ("D12", 8),
+    "B": ("D13", 12),
+    "C": ("D18", 16),
+    "D": ("D19", 24),
+}
+BRIGHTNESS = 1.0
+
+UART_PORT = "/dev/serial0"
+UART_BAUD = 115200
+UART_TIMEOUT = 0.1
+
+OFF = (0, 0, 0)
+
+_lock = threading.Lock()
+_strips = {}
+_uarts = {}
+_receivers = {}
+
+
+class SharedStrip:
+    """
+    NeoPixel 1개를 감싼 공유 핸들. 인덱싱/len/show/fill은 그대로, 잠금 + dirty 추적 추가.
+    show()는 마지막 전송 이후 바뀐 것이 있을 때만 실제로 내보낸다.
+    """
+    def __init__(self, name: str, pixels):
+        self.name = name
+        self.pixels = pixels
+        self.lock = threading.RLock()
+        self.dirty = True      # 처음 한 번은 반드시 전송
+        self.deferred = 0      # frame() 중첩 깊이. >0이면 show()는 틱까지 보류
+        self._pending = False  # 보류 중인 show()가 있음
+        self.flushes = 0       # 실제 pixels.show() 횟수
+        self.avoided = 0       # 바뀐 게 없거나 같은 틱 안에서 합쳐져 생략된 show() 횟수
+
+    def __len__(self):
+        return len(self.pixels)
+
+    def __getitem__(self, i):
+        return self.pixels[i]
+
+    def __setitem__(self, i, color):
+        with self.lock:
+            if self.dirty or tuple(self.pixels[i]) != tuple(color):
+                self.pixels[i] = color
+                self.dirty = True
+
+    def fill(self, color):
+        with self.lock:
+            self.pixels.fill(color)
+            self.dirty = True
+
+    def mark_dirty(self) -> None:
+        # 버퍼를 직접 고친 경우(frame_table.blit)
+        self.dirty = True
+
+    def show(self):
+        with self.lock:
+            if self.deferred:
+                if self.dirty and not self._pending:
+                    self._pending = True
+                else:
+                    self.avoided += 1   # 변화 없음 / 같은 틱에서 이미 예약됨
+                return
+            self.flush()
+
+    def flush(self) -> bool:
+        """바뀐 게 있으면 전송. 전송했으면 True"""
+        with self.lock:
+            self._pending = False
+            if not self.dirty:
+                self.avoided += 1
+                return False
+            self.pixels.show()
+            self.dirty = False
+            self.flushes += 1
+            return True
+
+    def stats(self) -> dict:
+        return {"flushes": self.flushes, "avoided": self.avoided}
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+class SharedSerial:
+    """
+    serial.Serial 공유 핸들. write/readline 각각 잠금.
+    여러 줄을 붙여 보내야 할 때는  with uart:  블록으로 묶는다.
+    """
+    def __init__(self, port: str, ser):
+        self.port = port
+        self.ser = ser
+        self.lock = threading.RLock()
+        self._read_lock = threading.Lock()
+
+    def write(self, data: bytes) -> int:
+        with self.lock:
+            return self.ser.write(data)
+
+    def flush(self) -> None:
+        with self.lock:
+            self.ser.flush()
+
+    def readline(self) -> bytes:
+        with self._read_lock:
+            return self.ser.readline()
+
+    def read(self, size: int = 1) -> bytes:
+        with self._read_lock:
+            return self.ser.read(size)
+
+    def __getattr__(self, name):
+        # in_waiting, reset_input_buffer 등은 원본 그대로
+        return getattr(self.ser, name)
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+    def close(self) -> None:
+        # 개별 모듈이 닫지 못하게 막음 — 종료는 close_all()에서 한 번만
+        pass
+
+
+def get_strip(name: str) -> SharedStrip:
+    with _lock:
+        strip = _strips.get(name)
+        if strip is None:
+            pin_name, count = STRIP_CONFIGS[name]
+            if os.environ.get(BACKEND_ENV) == "sim":
+                import led_sim
+                pixels = led_sim.SimPixels(name, count)
+            else:
+                import board
+                import neopixel
+                pixels = neopixel.NeoPixel(getattr(board, pin_name), count,
+                                           brightness=BRIGHTNESS, auto_write=False)
+            strip = _strips[name] = SharedStrip(name, pixels)
+        return strip
+
+def get_uart(port: str = UART_PORT, baud: int = UART_BAUD) -> SharedSerial:
+    with _lock:
+        uart = _uarts.get(port)
+        if uart is None:
+            if os.environ.get(BACKEND_ENV) == "sim":
+                import led_sim
+                ser = led_sim.SimSerial(port, baud, timeout=UART_TIMEOUT)
+            else:
+                import serial
+                ser = serial.Serial(port, baud, timeout=UART_TIMEOUT)
+            uart = _uarts[port] = SharedSerial(port, ser)
+        return uart
+
+def get_receiver(port: str = UART_PORT, baud: int = UART_BAUD):
+    """
+    포트당 uart_proto.Receiver 1개 (읽기 스레드 시작된 상태).
+    Receiver마다 디코더 버퍼가 따로라 같은 포트에 2개를 만들면 서로 바이트를 뺏어 감
+    (focus의 ACK ↔ clock_sync의 PONG) → 읽는 쪽은 전부 이걸 공유
+    """
+    uart = get_uart(port, baud)
+    with _lock:
+        rx = _receivers.get(port)
+        if rx is None:
+            import uart_proto
+            rx = _receivers[port] = uart_proto.Receiver(uart).start()
+        return rx
+
+@contextmanager
+def frame(*strips: SharedStrip):
+    """
+    프레임 틱 단위 배치. 블록 안의 show()는 보류되고, 블록이 끝날 때
+    바뀐 스트립만 한 번씩 전송한다. (인자 없으면 지금까지 열린 모든 스트립)
+    SharedStrip이 아닌 것(pixel_stream.RemoteStrip 등)은 그대로 통과
+    """
+    if strips:
+        targets = tuple(s for s in strips if isinstance(s, SharedStrip))
+    else:
+        with _lock:   # get_strip()이 다른 스레드에서 추가하는 중일 수 있음
+            targets = tuple(_strips.values())
+    for strip in targets:
+        with strip.lock:
+            strip.deferred += 1
+    try:
+        yield targets
+    finally:
+        for strip in targets:
+            with strip.lock:
+                strip.deferred -= 1
+                if strip.deferred == 0 and strip.dirty:
+                    strip.flush()
+
+def strip_stats() -> dict:
+    """스트립별 flush 실행/생략 카운터 + 합계"""
+    with _lock:
+        strips = dict(_strips)
+    out = {name: s.stats() for name, s in strips.items()}
+    out["total"] = {
+        "flushes": sum(v["flushes"] for v in out.values()),
+        "avoided": sum(v["avoided"] for v in out.values()),
+    }
+    return out
+
+def close_all() -> None:
+    """모든 스트립 소등 후 해제, 모든 포트 닫기 (여러 번 호출해도 안전)"""
+    with _lock:
+        strips = list(_strips.values())
+        uarts = list(_uarts.values())
+        receivers = list(_receivers.values())
+        _strips.clear()
+        _uarts.clear()
+        _receivers.clear()
+    for rx in receivers:
+        rx.stop()
+    for strip in strips:
+        try:
+            with strip:
+                for i in range(len(strip)):
+                    strip.pixels[i] = OFF
+                strip.pixels.show()
+            if hasattr(strip.pixels, "deinit"):
+                strip.pixels.deinit()
+        except Exception:
+            pass
+    for uart in uarts:
+        try:
+            with uart:
+                uart.ser.close()
+        except Exception:
+            pass
+
+atexit.register(close_all)
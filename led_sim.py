@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+# 헤드리스 LED 시뮬레이터 (라즈베리파이 없이 효과 실행/측정)
+#  - LED_BACKEND=sim 이면 hw_registry가 NeoPixel/serial 대신 SimPixels/SimSerial을 만든다
+#  - SimPixels: adafruit_pixelbuf와 같은 버퍼 구조(GRB), show()마다 (시각, 스트립, 프레임 bytes) 기록
+#    전송 시간(WS2812 ≈ 픽셀당 30us)도 흉내 냄
+#  - 기록은 메모리(recorder.frames) + 선택적으로 압축 바이너리 캡처 파일(LED_SIM_CAPTURE=경로)
+#  - 캡처 파일은 터미널(24bit ANSI) 또는 PNG(Pillow 있을 때)로 렌더링
+#
+#  예) python led_sim.py --seconds 3                 (REGISTRY 전체 벤치마크)
+#      python led_sim.py --capture /tmp/healing.ledc --effect healing --seconds 5
+#      python led_sim.py --render /tmp/healing.ledc [--png /tmp/healing.png]
+#      python led_sim.py --pi3 [--seconds 3] [--rate 50]   (라즈3 수신측: CPU, 명령→픽셀 지연, 모드 전환)
+import os
+import sys
+import time
+import struct
+import argparse
+import threading
+import statistics
+from multiprocessing import Pipe, Process
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from frame_table import FakePixelBuf
+import uart_proto
+
+if __name__ == "__main__":
+    # python led_sim.py 로 실행해도 hw_registry의 import led_sim이 같은 recorder를 쓰도록
+    sys.modules.setdefault("led_sim", sys.modules[__name__])
+
+CAPTURE_PATH = os.environ.get("LED_SIM_CAPTURE", "")
+WIRE_US_PER_PIXEL = float(os.environ.get("LED_SIM_WIRE_US", "30"))
+
+_MAGIC = b"LEDC1\n"
+_RECORD = struct.Struct("<dcH")   # 시각(초), 스트립 이름 1글자, 프레임 길이
+
+try:
+    from PIL import Image
+except ImportError:  # PNG 렌더링은 선택 사항
+    Image = None
+
+
+# ===== 기록 =====
+class Recorder:
+    """show()된 프레임을 (t, 스트립, bytes)로 모음. path가 있으면 캡처 파일에도 바로 기록"""
+    def __init__(self, path: str = ""):
+        self.lock = threading.Lock()
+        self.t0 = time.monotonic()
+        self.frames: List[Tuple[float, str, bytes]] = []
+        self._file = None
+        if path:
+            self.open(path)
+
+    def open(self, path: str) -> None:
+        self._file = open(path, "wb")
+        self._file.write(_MAGIC)
+
+    def add(self, name: str, frame: bytes) -> None:
+        t = time.monotonic() - self.t0
+        with self.lock:
+            self.frames.append((t, name, frame))
+            if self._file:
+                self._file.write(_RECORD.pack(t, name.encode()[:1], len(frame)))
+                self._file.write(frame)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.frames.clear()
+            self.t0 = time.monotonic()
+
+    def close(self) -> None:
+        with self.lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def by_strip(self) -> Dict[str, List[float]]:
+        out: Dict[str, List[float]] = {}
+        with self.lock:
+            for t, name, _ in self.frames:
+                out.setdefault(name, []).append(t)
+        return out
+
+recorder = Recorder(CAPTURE_PATH)
+
+
+def read_capture(path: str) -> Iterator[Tuple[float, str, bytes]]:
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"not a LED capture: {path}")
+        while True:
+            head = f.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                return
+            t, name, size = _RECORD.unpack(head)
+            yield t, name.decode(), f.read(size)
+
+
+# ===== 가짜 장치 =====
+class SimPixels(FakePixelBuf):
+    """NeoPixel 대역. 버퍼 구조가 같아서 frame_table.blit 빠른 경로도 그대로 탐"""
+    def __init__(self, name: str, n: int, wire_us: float = WIRE_US_PER_PIXEL):
+        super().__init__(n)
+        self.name = name
+        self.wire = n * wire_us / 1e6
+
+    def fill(self, color):
+        for i in range(self._n):
+            self[i] = color
+
+    def show(self):
+        super().show()
+        if self.wire > 0:
+            time.sleep(self.wire)
+        recorder.add(self.name, bytes(self._post_brightness_buffer))
+
+    def deinit(self):
+        pass
+
+
+class SimSerial:
+    """
+    serial.Serial 대역. 보낸 바이트를 세고, auto_ack면 라즈3 대신 DONE(focus 스트립 명령) / PONG(clock_sync) 응답.
+    read()는 실제 포트처럼 데이터가 올 때까지(최대 timeout) 블로킹, feed()가 깨움
+    """
+    def __init__(self, port: str = "sim", baud: int = 115200, timeout: float = 0.1, auto_ack: bool = True):
+        self.port = port
+        self.baudrate = baud
+        self.timeout = timeout
+        self.auto_ack = auto_ack
+        self.written = bytearray()
+        self.writes = 0
+        self._rx = bytearray()
+        self._cv = threading.Condition()
+        self._peer = uart_proto.Decoder()
+        self._peer_enc = uart_proto.Encoder()   # 라즈3 → 라즈4 방향 seq
+        self._peer_mode = ""
+
+    def _answer(self, data: bytes) -> None:
+        # 같은 시계(offset 0)를 쓰는 라즈3처럼 PING에 바로 응답, focus 모드 스트립 명령에는 DONE
+        for ftype, payload in self._peer.feed(data):
+            if ftype == 0:
+                cmd = uart_proto.parse_text(payload)
+                cmds = [cmd] if cmd is not None else []
+            elif ftype == uart_proto.T_CMDS:
+                try:
+                    cmds = uart_proto.decode_commands(payload)
+                except Exception:
+                    continue
+            else:
+                continue
+            for c in cmds:
+                if c.kind == "ping":
+                    now = time.monotonic()
+                    self.feed(self._peer_enc.commands([uart_proto.pong(c.stamps[0], now, now)]))
+                elif c.kind == "mode":
+                    self._peer_mode = c.mode
+                elif c.kind == "strip" and self._peer_mode == "focus" and c.level > 0:
+                    self.feed(b"DONE\n")
+
+    def _wait(self) -> None:
+        # _cv 잡은 상태에서 호출
+        if not self._rx:
+            self._cv.wait(self.timeout)
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._rx)
+
+    def feed(self, data: bytes) -> None:
+        with self._cv:
+            self._rx += data
+            self._cv.notify_all()
+
+    def write(self, data: bytes) -> int:
+        self.written += data
+        self.writes += 1
+        if self.auto_ack:
+            self._answer(data)
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        with self._cv:
+            self._wait()
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+        return data
+
+    def readline(self) -> bytes:
+        with self._cv:
+            if self._rx.find(b"\n") < 0:
+                self._cv.wait(self.timeout)
+            nl = self._rx.find(b"\n")
+            n = nl + 1 if nl >= 0 else len(self._rx)
+            data = bytes(self._rx[:n])
+            del self._rx[:n]
+        return data
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self._cv:
+            self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ===== 렌더링 =====
+def _rgb(frame: bytes, order=(1, 0, 2)) -> List[Tuple[int, int, int]]:
+    return [tuple(frame[i + p] for p in order) for i in range(0, len(frame), 3)]
+
+def render_terminal(frames, fps: float = 0.0, out=sys.stdout) -> None:
+    """스트립당 한 줄, 24bit ANSI 블록. fps>0이면 캡처 시각에 맞춰 재생"""
+    state: Dict[str, str] = {}
+    start = time.monotonic()
+    for t, name, frame in frames:
+        state[name] = "".join(f"\x1b[48;2;{r};{g};{b}m  " for r, g, b in _rgb(frame)) + "\x1b[0m"
+        if fps > 0:
+            delay = t - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        out.write("\x1b[H" if fps > 0 else "")
+        out.write(f"t={t:7.3f}s  " + "  ".join(f"{n}:{state[n]}" for n in sorted(state)) + "\n")
+    out.flush()
+
+def render_png(frames, path: str, scale: int = 4) -> None:
+    """스트립별로 세로축=프레임, 가로축=픽셀 인 이미지를 옆으로 이어 붙임"""
+    if Image is None:
+        raise RuntimeError("Pillow not installed")
+    rows: Dict[str, List[List[Tuple[int, int, int]]]] = {}
+    for _, name, frame in frames:
+        rows.setdefault(name, []).append(_rgb(frame))
+    names = sorted(rows)
+    width = sum(len(rows[n][0]) + 1 for n in names)
+    height = max(len(rows[n]) for n in names)
+    img = Image.new("RGB", (width, height))
+    x0 = 0
+    for n in names:
+        for y, px in enumerate(rows[n]):
+            for x, c in enumerate(px):
+                img.putpixel((x0 + x, y), c)
+        x0 += len(rows[n][0]) + 1
+    img.resize((width * scale, height * scale), Image.NEAREST).save(path)
+
+
+# ===== 벤치마크 =====
+def _interval_stats(times: List[float]) -> Tuple[float, float, float]:
+    """(평균 간격 ms, 간격 표준편차 ms, 최대 간격 ms)"""
+    if len(times) < 3:
+        return 0.0, 0.0, 0.0
+    gaps = [(b - a) * 1000.0 for a, b in zip(times, times[1:])]
+    return statistics.mean(gaps), statistics.pstdev(gaps), max(gaps)
+
+def _effect_child(name: str, seconds: float, feeling: str, capture: str, conn) -> None:
+    """자식 프로세스: 시뮬레이터로 효과 1개를 seconds 동안 실행하고 통계를 돌려줌"""
+    os.environ["LED_BACKEND"] = "sim"
+    if capture:
+        recorder.open(capture)
+    import hw_registry
+    from play_neopixel import REGISTRY, _run_effect
+    stop = threading.Event()
+    cpu0 = time.process_time()
+    recorder.reset()
+    th = threading.Thread(target=_run_effect, args=(REGISTRY[name], feeling, name, stop), daemon=True)
+    th.start()
+    time.sleep(seconds)
+    stop.set()
+    cpu = time.process_time() - cpu0
+    per_strip = {}
+    for strip, times in recorder.by_strip().items():
+        mean, jitter, worst = _interval_stats(times)
+        per_strip[strip] = {"frames": len(times), "fps": len(times) / seconds,
+                            "interval_ms": mean, "jitter_ms": jitter, "max_gap_ms": worst}
+    uart = sum(len(u.ser.written) for u in hw_registry._uarts.values())
+    recorder.close()
+    conn.send({"effect": name, "cpu_s": cpu, "cpu_pct": 100.0 * cpu / seconds,
+               "uart_bytes": uart, "strips": per_strip,
+               "flushes": hw_registry.strip_stats()["total"]})
+    conn.close()
+    os._exit(0)   # stop_event를 안 받는 효과(while True)도 같이 종료
+
+def run_effect(name: str, seconds: float = 3.0, feeling: str = "happy", capture: str = "") -> dict:
+    parent, child = Pipe(duplex=False)
+    proc = Process(target=_effect_child, args=(name, seconds, feeling, capture, child))
+    proc.start()
+    result = parent.recv() if parent.poll(seconds + 10) else {"effect": name, "error": "timeout"}
+    proc.join(2)
+    if proc.is_alive():
+        proc.kill()
+    return result
+
+def benchmark(names: Optional[List[str]] = None, seconds: float = 3.0, feeling: str = "happy") -> List[dict]:
+    from play_neopixel import REGISTRY
+    results = []
+    print(f"{'effect':8s} {'strip':5s} {'frames':>6s} {'fps':>7s} {'gap ms':>7s} {'jitter':>7s} {'max':>7s}  cpu%   uart B")
+    for name in names or list(REGISTRY):
+        r = run_effect(name, seconds, feeling)
+        results.append(r)
+        if "error" in r:
+            print(f"{name:8s} {r['error']}")
+            continue
+        for i, (strip, s) in enumerate(sorted(r["strips"].items())):
+            tail = f" {r['cpu_pct']:5.1f} {r['uart_bytes']:8d}" if i == 0 else ""
+            print(f"{name if i == 0 else '':8s} {strip:5s} {s['frames']:6d} {s['fps']:7.1f} "
+                  f"{s['interval_ms']:7.1f} {s['jitter_ms']:7.2f} {s['max_gap_ms']:7.1f} {tail}")
+        if not r["strips"]:
+            print(f"{name:8s} (no frames) {r['cpu_pct']:5.1f} {r['uart_bytes']:8d}")
+    return results
+
+
+# ===== 라즈3 수신측 벤치마크 =====
+def _pi3_phases(rate: float):
+    """(이름, 모드, 틱 i → 보낼 프레임 bytes 목록). rate=0이면 명령 없이 대기만 (유휴 CPU)"""
+    import pixel_stream
+    from uart_proto import strip
+
+    def love(i):
+        lv = i * 7 % 101
+        return [[strip("C", lv), strip("D", lv)]]
+
+    def burst(i):          # 한 틱에 밝기 갱신 10개 → latest 큐가 합침
+        return [[strip("C", (i + k) % 101) for k in range(10)]]
+
+    def healing(i):        # 1초짜리 펄스 트리거를 초당 10번 → drop-oldest
+        return [[strip("C", 100, (255, 255, 0))]] if i % 5 == 0 else []
+
+    def relief(i):         # 수 초짜리 패턴 트리거를 0.5초마다 → preempt
+        return [[strip("D", 100, (0, 0, 255))]] if i % 25 == 0 else []
+
+    def energy(i):
+        c = (i % 256, 0, 255 - i % 256)
+        return [[strip("C", 100, c), strip("D", 100, c)]]
+
+    prev = {}
+    def stream(i):
+        out = []
+        for name, n in pixel_stream.REMOTE_COUNTS.items():
+            rgb = bytearray(n * 3)
+            rgb[(i % n) * 3:(i % n) * 3 + 3] = b"\xff\x80\x00"
+            payload, prev[name] = pixel_stream.encode_pixels(name, prev.get(name), bytes(rgb),
+                                                            pixel_stream.DEPTH_888)
+            if payload is not None:
+                out.append(payload)
+        return out
+
+    return [("idle", "focus", None), ("love", "love", love), ("burst", "energy", None),
+            ("burst", "love", burst), ("energy", "energy", energy), ("stream", "stream", stream),
+            ("healing", "healing", healing), ("relief", "relief", relief)]
+
+def _pi3_child(seconds: float, rate: float, conn) -> None:
+    """자식 프로세스: rpi3_motion 디스패처를 시뮬레이터 위에서 돌리고 SimSerial.feed()로 명령 주입"""
+    os.environ["LED_BACKEND"] = "sim"
+    sys.stdout = open(os.devnull, "w")       # 라즈3 모드 로그 숨김
+    import rpi3_motion as pi3
+    sim = pi3.ser.ser
+    sim.auto_ack = False
+    enc = uart_proto.Encoder()
+    threading.Thread(target=pi3.serve, daemon=True).start()
+    results = []
+    for name, mode, make in _pi3_phases(rate):
+        sim.feed(enc.commands([uart_proto.mode(mode)]))
+        sent = 0
+        t0 = time.monotonic()
+        i = 0
+        while time.monotonic() - t0 < seconds:
+            if make is not None:
+                for item in make(i):
+                    if isinstance(item, bytes):
+                        sim.feed(enc.frame(uart_proto.T_PIXELS, item))
+                    else:
+                        sim.feed(enc.commands(item))
+                    sent += 1
+            i += 1
+            time.sleep(max(0.0, t0 + i / rate - time.monotonic()))
+        st = pi3.latency_stats()
+        results.append({"phase": name, "cmds": sent, **st})
+    conn.send(results)
+    conn.close()
+    os._exit(0)
+
+def pi3_benchmark(seconds: float = 3.0, rate: float = 50.0) -> List[dict]:
+    parent, child = Pipe(duplex=False)
+    proc = Process(target=_pi3_child, args=(seconds, rate, child))
+    proc.start()
+    results = parent.recv() if parent.poll(seconds * 10 + 20) else []
+    proc.join(2)
+    if proc.is_alive():
+        proc.kill()
+    print(f"Pi3 receiver (reader thread + dispatcher), {rate:.0f} ticks/s, {seconds:.1f}s per phase")
+    print(f"{'phase':8s} {'frames':>6s} {'cpu%':>6s} {'lat ms':>7s} {'p95':>7s} {'max':>7s} {'switch':>7s}"
+          f"  queue: {'depth':>5s} {'merged':>6s} {'drop':>5s} {'preempt':>7s} {'lag ms':>7s} {'max':>7s}")
+    for r in results:
+        if r["phase"] == "burst" and not r["cmds"]:
+            continue   # burst 앞에서 모드만 바꿔 두는 단계
+        lat, sw = r["latency"], r["switch"]
+        qs = r["queues"].values()
+        lag = max((q["lag"]["max_ms"] for q in qs), default=0.0)
+        lag_mean = max((q["lag"]["mean_ms"] for q in qs), default=0.0)
+        print(f"{r['phase']:8s} {r['cmds']:6d} {r['cpu_pct']:6.1f} {lat['mean_ms']:7.2f} {lat['p95_ms']:7.2f} "
+              f"{lat['max_ms']:7.2f} {sw['max_ms']:7.2f}  queue: {max((q['max_depth'] for q in qs), default=0):5d} "
+              f"{sum(q['coalesced'] for q in qs):6d} {sum(q['dropped'] for q in qs):5d} "
+              f"{sum(q['preempted'] for q in qs):7d} {lag_mean:7.2f} {lag:7.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="헤드리스 LED 시뮬레이터 / 효과 벤치마크")
+    ap.add_argument("--effect", action="append", help="측정할 효과 (여러 번 지정 가능, 기본: 전부)")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--feeling", default="happy")
+    ap.add_argument("--capture", help="--effect 1개 실행 결과를 캡처 파일로 저장")
+    ap.add_argument("--render", help="캡처 파일을 터미널에 렌더링")
+    ap.add_argument("--realtime", action="store_true", help="--render를 캡처 시각에 맞춰 재생")
+    ap.add_argument("--png", help="--render 대신 PNG로 저장")
+    ap.add_argument("--pi3", action="store_true", help="라즈3 수신측(rpi3_motion) CPU/지연 측정")
+    ap.add_argument("--rate", type=float, default=50.0, help="--pi3 초당 명령 틱 수")
+    args = ap.parse_args()
+
+    if args.render:
+        if args.png:
+            render_png(read_capture(args.render), args.png)
+            print(f"saved {args.png}")
+        else:
+            render_terminal(read_capture(args.render), fps=50.0 if args.realtime else 0.0)
+    elif args.pi3:
+        pi3_benchmark(args.seconds, args.rate)
+    elif args.capture:
+        name = (args.effect or ["healing"])[0]
+        print(run_effect(name, args.seconds, args.feeling, capture=args.capture))
+    else:
+        benchmark(args.effect, args.seconds, args.feeling)
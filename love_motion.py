@@ -1,44 +1,47 @@
 # ====== 라즈4 코드 (pi4_love.py) ======
 import time
-import board
-import neopixel
-import serial
+
+from hw_registry import get_strip, get_uart, frame
+from animation import run_frames, fade_frames
+import frame_table
+import uart_proto
+from pixel_stream import STREAM_REMOTE, get_remote_strip
 
 # === LED 설정 (라즈4 직접 제어 A, B) ===
-BRIGHTNESS = 1.0
 COLOR = (255, 0, 0)
 
-pixels_a = neopixel.NeoPixel(board.D12, 8, brightness=BRIGHTNESS, auto_write=False)
-pixels_b = neopixel.NeoPixel(board.D13, 12, brightness=BRIGHTNESS, auto_write=False)
+pixels_a = get_strip("A")
+pixels_b = get_strip("B")
 local_strips = [pixels_a, pixels_b]
 
 # === UART 설정 (라즈3로 데이터 전송) ===
-ser = serial.Serial('/dev/serial0', 115200, timeout=0.1)
+ser = get_uart()
+# PI3_STREAM=1: C/D도 여기서 그려서 픽셀 프레임으로 스트리밍
+remote_strips = [get_remote_strip("C"), get_remote_strip("D")] if STREAM_REMOTE else []
 
 # ===== 유틸 함수 =====
-def scale_color(color, level):
-    r, g, b = color
-    return (int(r * level / 100), int(g * level / 100), int(b * level / 100))
-
 def fill_strips(strips, level):
-    color = scale_color(COLOR, level)
-    for strip in strips:
-        for i in range(len(strip)):
-            strip[i] = color
-        strip.show()
+    # 한 틱으로 묶어서 바뀐 스트립만 1번씩 show
+    with frame(*strips):
+        for strip in strips:
+            frame_table.fill(strip, COLOR, level)
 
 def send_uart(level):
-    """라즈3으로 밝기 전달"""
-    ser.write(f"C,{level}\n".encode())
-    ser.write(f"D,{level}\n".encode())
+    """라즈3으로 밝기 전달 (C/D 명령을 프레임 하나로, 스트리밍 모드면 픽셀 프레임)"""
+    if remote_strips:
+        fill_strips(remote_strips, level)
+        return
+    uart_proto.send(ser, uart_proto.strip("C", level), uart_proto.strip("D", level))
+
+def _draw(level):
+    level = int(level)
+    fill_strips(local_strips, level)   # A, B 직접 제어
+    send_uart(level)                   # C, D는 UART 전송
 
 def fade(level_start, level_end, duration=0.2, steps=20):
-    delay = duration / steps
-    for i in range(steps + 1):
-        level = int(level_start + (level_end - level_start) * i / steps)
-        fill_strips(local_strips, level)   # A, B 직접 제어
-        send_uart(level)                   # C, D는 UART 전송
-        time.sleep(delay)
+    # 프레임 클럭 기준: 늦으면 중간 단계를 건너뛰어 duration을 지킴 (heartbeat 박자 유지)
+    fps = steps / max(duration, 1e-3)
+    run_frames(fade_frames(_draw, level_start, level_end, duration, fps), fps)
 
 def heartbeat():
     fade(0, 100, duration=0.01)
@@ -51,7 +54,8 @@ def heartbeat():
 def love_effect():
     try:
         # 실행 시작 시 라즈3에 모드 전송
-        ser.write(b"love\n")
+        if not STREAM_REMOTE:
+            uart_proto.send(ser, uart_proto.mode("love"))
         print("라즈3에 LOVE 모드 요청 완료")
 
         while True:
@@ -60,5 +64,4 @@ def love_effect():
     except KeyboardInterrupt:
         fill_strips(local_strips, 0)
         send_uart(0)
-        ser.close()
         print("LOVE 종료")
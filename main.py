@@ -1,10 +1,21 @@
+import sys
+import time
+
+# --profile-startup: import/장치 열기 시간을 측정해서 출력하고 종료
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+if PROFILE_STARTUP:
+    import startup_profile
+    startup_profile.install()
+_startup_t0 = time.perf_counter()
+
 import RPi.GPIO as GPIO
 from music_select import select_random_music_path
-from play_neopixel import play_neopixel_effect
+from play_neopixel import play_neopixel_effect, cleanup_neopixel
+from emotion_service import spawn_daemon as spawn_emotion_service
+from voice_pipeline import listen, classify_and_store
+from result_channel import FeelingSelection, emotions, feelings
 from pathlib import Path
 import signal
-import board
-import neopixel
 import math
 
 import subprocess
@@ -33,6 +44,8 @@ feeling_buttons = {
 stop_neopixel = threading.Event()
 neo_thread = None
 
+_imports_done = time.perf_counter()
+
 # GPIO setup
 GPIO.setwarnings(False)
 GPIO.setmode(GPIO.BCM)
@@ -53,6 +66,7 @@ GPIO.setup(START_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
 GPIO.setup(STOP_PIN, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
 for pin in feeling_buttons:
     GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
+_gpio_done = time.perf_counter()
 
 # Globals
 music_process = None
@@ -234,31 +248,12 @@ def wait_for_feeling():
         for pin, feeling in feeling_buttons.items():
             if GPIO.input(pin) == GPIO.HIGH:
                 selected_feeling = feeling
-                with open("/home/capstone/project/want_feeling.txt", "w") as f:
-                    f.write(f"{feeling}\n")
+                feelings.publish(FeelingSelection(feeling))
                 print(f"Feeling selected: {feeling}")
                 feeling_selected.set()
                 return
         time.sleep(0.1)
 
-def read_label_from_file():
-    try:
-        with open("/home/capstone/project/emotion_label.txt" , "r") as f:
-            label = int(f.read().strip())
-        return label
-    except FileNotFoundError:
-        print("Emotion label file not found!")
-        return None
-
-# ---------------- 감정 읽기 ----------------
-def read_emotion(file_path):
-    try:
-        with open(file_path, "r") as f:
-            lines = f.readlines()
-            return lines[-1].strip() if lines else None
-    except FileNotFoundError:
-        return None
-
 # Main emotion/music sequence
 def run_emotion_music_sequence():
     global music_process, current_music_path, paused, music_start_time, paused_position
@@ -269,22 +264,23 @@ def run_emotion_music_sequence():
         print("START button pressed. Running STT sequence...")
         GPIO.output(LED_GREEN_PIN, GPIO.HIGH)
 
-        result1 = subprocess.run(["python", "/home/capstone/project/record.py"])
-        if result1.returncode != 0:
-            print("record.py failed. Aborting.")
-            return
-        GPIO.output(LED_GREEN_PIN, GPIO.LOW)
-
-       
-
-        GPIO.output(LED_RED_PIN, GPIO.HIGH)
+        # 녹음 → STT를 메모리 안에서 바로 처리 (recorded.wav 왕복 없음)
+        def on_capture_end():
+            GPIO.output(LED_GREEN_PIN, GPIO.LOW)
+            GPIO.output(LED_RED_PIN, GPIO.HIGH)
 
-        result2 = subprocess.run(["python", "/home/capstone/project/stt&koelectra_small.py"])
-        if result2.returncode != 0:
-            print("stt&koelectra_small.py failed. Aborting.")
+        try:
+            transcript = listen(on_capture_end)
+            if not transcript:
+                print("STT result is empty. Aborting.")
+                return
+            print(transcript)
+            result = classify_and_store(transcript)
+        except Exception as e:
+            print(f"STT/emotion failed: {e}. Aborting.")
             return
         GPIO.output(LED_RED_PIN, GPIO.LOW)
-        label = read_label_from_file()
+        label = result.label
         if label == 0:
             GPIO.output(LED_emotion_happy , GPIO.HIGH)
             time.sleep(2)
@@ -309,11 +305,9 @@ def run_emotion_music_sequence():
             print("Starting music for selected feeling!")
             music_path = select_random_music_path()
             if music_path:
-                # # 감정 파일 경로
-                want_file = "/home/capstone/project/want_feeling.txt"
-                current_file = "/home/capstone/project/current_feeling.txt"
-                current_feeling = read_emotion(current_file)
-                want_feeling = read_emotion(want_file)
+                # 인식기/버튼 결과는 파일 대신 채널에서 바로 받음
+                current_feeling = emotions.latest().name
+                want_feeling = feelings.latest().wanted
                 print(current_feeling)
                 current_music_path = music_path
                 print(get_audio_device())
@@ -333,6 +327,28 @@ except RuntimeError:
 music_ctrl = MusicController(prefer_keyword= "USB")
 music_ctrl.start()
 
+# 감정 분류 모델 상주 서비스 (START마다 torch/모델을 다시 로드하지 않도록)
+emotion_proc = spawn_emotion_service()
+
+if PROFILE_STARTUP:
+    startup_profile.mark("GPIO setup", _gpio_done - _imports_done)
+    startup_profile.mark("startup total (until ready)", time.perf_counter() - _startup_t0)
+    # 지연 로드되는 모션 모듈은 버튼을 누른 뒤에야 import/장치 열기가 일어남 → 따로 측정
+    from play_neopixel import REGISTRY, preload
+    for name in REGISTRY:
+        t0 = time.perf_counter()
+        try:
+            preload([name])
+        except Exception as e:
+            print(f"[profile] {name} load failed: {e}")
+        startup_profile.mark(f"deferred: {name} effect load", time.perf_counter() - t0)
+    print(startup_profile.report())
+    music_ctrl.shutdown()
+    if emotion_proc and emotion_proc.poll() is None:
+        emotion_proc.terminate()
+    GPIO.cleanup()
+    sys.exit(0)
+
 # Register GPIO events
 GPIO.add_event_detect(START_PIN, GPIO.RISING, callback=lambda ch: threading.Thread(target=run_emotion_music_sequence).start(), bouncetime=500)
 GPIO.add_event_detect(STOP_PIN, GPIO.RISING, callback=handle_stop_button, bouncetime=300)
@@ -347,5 +363,9 @@ finally:
     if music_process and music_process.poll() is None:
         music_process.terminate()
         music_process.wait()
+    if emotion_proc and emotion_proc.poll() is None:
+        emotion_proc.terminate()
+        emotion_proc.wait()
+    cleanup_neopixel()
 
     GPIO.cleanup()
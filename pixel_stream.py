@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+# 라즈3를 "얇은 렌더러"로: 라즈4가 C(16)/D(24) 링까지 직접 그리고 픽셀 프레임을 UART로 스트리밍
+#  - 기존: 라즈4는 "C,50" 같은 명령만 보내고, 라즈3가 relief_pattern/fade_healing 등을 따로 구현
+#          → 양쪽 효과 코드와 타이밍을 계속 맞춰야 함
+#  - 변경: RemoteStrip(C/D)은 로컬 스트립처럼 그리면 되고, show()하면 직전에 보낸 상태와의
+#          차이(delta)만 uart_proto PIXELS 프레임으로 전송. 라즈3(run_stream)는 받아서 blit만 함
+#  - 115200 baud ≈ 11.5 KB/s 예산(토큰 버킷) 안에서 보냄. 모자라면
+#        1) 색 깊이 낮춤 RGB888 → RGB565 → RGB332
+#        2) 그래도 안 되면 프레임 생략 (다음 show()에서 마지막 전송 상태 기준 delta로 따라잡음)
+#  - 일정 간격마다 키프레임(전체)을 보내 라즈3가 프레임을 놓쳐도 복구
+#  - 다른 모드 명령이 나가면(라즈3가 스트림 상태를 지움) 다음 show()에서 stream 모드 재요청 + 키프레임부터.
+#    라즈3도 키프레임을 받기 전의 delta는 버림 (0 위에 덧그리지 않음)
+#
+# PIXELS payload: [스트립 id | 깊이<<4] [flags(bit0=키프레임)] { [시작 idx] [개수] [픽셀 데이터] }*
+#
+# 벤치마크: python pixel_stream.py [--seconds 4] [--fps 50]
+import os
+import time
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import uart_proto
+from uart_proto import STRIP_IDS, T_PIXELS
+
+STREAM_REMOTE = os.environ.get("PI3_STREAM", "0") == "1"   # 1이면 C/D를 라즈4가 렌더링
+REMOTE_COUNTS = {"C": 16, "D": 24}
+
+LINK_BYTES_PER_S = uart_proto.BAUD / 10       # 8N1 → 1바이트 = 10비트
+BURST_S = 0.05                                 # 토큰 버킷 크기 (초 단위 분량)
+KEYFRAME_INTERVAL = 2.0
+
+DEPTH_888, DEPTH_565, DEPTH_332 = 0, 1, 2
+DEPTH_BYTES = {DEPTH_888: 3, DEPTH_565: 2, DEPTH_332: 1}
+DEPTH_NAMES = {DEPTH_888: "rgb888", DEPTH_565: "rgb565", DEPTH_332: "rgb332"}
+
+_ID_TO_STRIP = {v: k for k, v in STRIP_IDS.items()}
+
+
+# ===== 색 깊이 =====
+def _q565(r, g, b) -> Tuple[bytes, Tuple[int, int, int]]:
+    v = (r >> 3) << 11 | (g >> 2) << 5 | (b >> 3)
+    return bytes((v & 0xFF, v >> 8)), _d565(v)
+
+def _d565(v: int) -> Tuple[int, int, int]:
+    r, g, b = v >> 11, (v >> 5) & 0x3F, v & 0x1F
+    return (r << 3 | r >> 2, g << 2 | g >> 4, b << 3 | b >> 2)
+
+def _q332(r, g, b) -> Tuple[bytes, Tuple[int, int, int]]:
+    v = (r >> 5) << 5 | (g >> 5) << 2 | (b >> 6)
+    return bytes((v,)), _d332(v)
+
+def _d332(v: int) -> Tuple[int, int, int]:
+    r, g, b = v >> 5, (v >> 2) & 0x7, v & 0x3
+    return (r << 5 | r << 2 | r >> 1, g << 5 | g << 2 | g >> 1, b * 0x55)
+
+def quantize(rgb: bytes, depth: int) -> Tuple[bytes, bytes]:
+    """RGB888 프레임 → (전송 데이터, 수신측에서 복원될 RGB888)"""
+    if depth == DEPTH_888:
+        return bytes(rgb), bytes(rgb)
+    q = _q565 if depth == DEPTH_565 else _q332
+    wire, shown = bytearray(), bytearray()
+    for i in range(0, len(rgb), 3):
+        w, s = q(rgb[i], rgb[i + 1], rgb[i + 2])
+        wire += w
+        shown += bytes(s)
+    return bytes(wire), bytes(shown)
+
+def dequantize(data: bytes, depth: int) -> bytes:
+    if depth == DEPTH_888:
+        return bytes(data)
+    out = bytearray()
+    if depth == DEPTH_565:
+        for i in range(0, len(data), 2):
+            out += bytes(_d565(data[i] | data[i + 1] << 8))
+    else:
+        for v in data:
+            out += bytes(_d332(v))
+    return bytes(out)
+
+
+# ===== delta 인코딩 =====
+def _runs(prev: bytes, new: bytes, bpp: int) -> List[Tuple[int, int]]:
+    """바뀐 픽셀 구간 [(시작, 개수)]. 사이 간격이 헤더(2B)보다 싸면 이어 붙임"""
+    n = len(new) // 3
+    changed = [i for i in range(n) if prev[i * 3:i * 3 + 3] != new[i * 3:i * 3 + 3]]
+    runs: List[List[int]] = []
+    for i in changed:
+        if runs and (i - (runs[-1][0] + runs[-1][1])) * bpp <= 2:
+            runs[-1][1] = i - runs[-1][0] + 1
+        else:
+            runs.append([i, 1])
+    return [(s, c) for s, c in runs]
+
+def encode_pixels(name: str, prev: Optional[bytes], rgb: bytes, depth: int,
+                  keyframe: bool = False) -> Tuple[Optional[bytes], bytes]:
+    """
+    (payload, 전송 후 수신측 상태). 바뀐 게 없으면 payload=None
+    prev=None 이거나 keyframe이면 전체 프레임
+    """
+    wire, shown = quantize(rgb, depth)
+    bpp = DEPTH_BYTES[depth]
+    n = len(rgb) // 3
+    if prev is None or keyframe:
+        runs = [(0, n)]
+    else:
+        runs = _runs(prev, shown, bpp)
+        if not runs:
+            return None, prev
+    out = bytearray((STRIP_IDS[name] | depth << 4, 1 if (prev is None or keyframe) else 0))
+    for start, count in runs:
+        out += bytes((start, count)) + wire[start * bpp:(start + count) * bpp]
+    if prev is not None and not keyframe:
+        state = bytearray(prev)
+        for start, count in runs:
+            state[start * 3:(start + count) * 3] = shown[start * 3:(start + count) * 3]
+        shown = bytes(state)
+    return bytes(out), shown
+
+def apply_pixels(payload: bytes, states: Dict[str, bytearray],
+                 counts: Dict[str, int]) -> Tuple[str, Optional[bytes]]:
+    """
+    라즈3: PIXELS payload를 스트립 상태(RGB888)에 반영 → (스트립 이름, 새 상태)
+    그 스트립의 키프레임을 아직 못 받았으면 delta는 버리고 (이름, None)
+    """
+    name = _ID_TO_STRIP[payload[0] & 0x0F]
+    depth = payload[0] >> 4
+    bpp = DEPTH_BYTES[depth]
+    if name not in states and not payload[1] & 1:
+        return name, None
+    state = states.setdefault(name, bytearray(counts.get(name, 0) * 3))
+    i = 2
+    while i < len(payload):
+        start, count = payload[i], payload[i + 1]
+        data = payload[i + 2:i + 2 + count * bpp]
+        state[start * 3:(start + count) * 3] = dequantize(data, depth)
+        i += 2 + count * bpp
+    return name, bytes(state)
+
+
+# ===== 송신측 =====
+class PixelStreamer:
+    """RemoteStrip.show()마다 호출. 링크 예산 안에서 delta 프레임 전송"""
+    def __init__(self, uart, rate: float = LINK_BYTES_PER_S, adaptive: bool = True,
+                 clock: Callable[[], float] = time.monotonic, encoder: Optional[uart_proto.Encoder] = None):
+        self.uart = uart
+        self.rate = rate
+        self.burst = max(rate * BURST_S, 200.0)
+        self.adaptive = adaptive
+        self.clock = clock
+        self.encoder = encoder or uart_proto.Encoder()
+        self.lock = threading.Lock()
+        self.tokens = self.burst
+        self.last = clock()
+        self.sent: Dict[str, bytes] = {}         # 라즈3가 보고 있을 상태
+        self.keyframe_at: Dict[str, float] = {}
+        self.started = False
+        self._epoch = None                       # start() 시점의 encoder.mode_epoch
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.unchanged = 0
+        self.keyframes = 0
+        self.depths = {d: 0 for d in DEPTH_BYTES}
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def start(self) -> None:
+        """라즈3를 stream 모드로 전환 (라즈3 상태가 비므로 스트립마다 키프레임부터 다시)"""
+        self.uart.write(self.encoder.commands([uart_proto.mode("stream")]))
+        self._epoch = self.encoder.mode_epoch
+        self.started = True
+        self.sent.clear()
+        self.keyframe_at.clear()
+
+    def push(self, name: str, rgb: bytes) -> bool:
+        """전송했으면 True (변화 없음/예산 부족으로 생략하면 False)"""
+        with self.lock:
+            # 그 사이 다른 모드 명령이 나갔으면 라즈3는 stream 상태를 잃었음 → 다시 시작
+            if not self.started or self.encoder.mode_epoch != self._epoch:
+                self.start()
+            self._refill()
+            now = self.clock()
+            prev = self.sent.get(name)
+            keyframe = prev is None or now - self.keyframe_at.get(name, 0.0) >= KEYFRAME_INTERVAL
+            depths = (DEPTH_888, DEPTH_565, DEPTH_332) if self.adaptive else (DEPTH_888,)
+            for depth in depths:
+                payload, state = encode_pixels(name, prev, rgb, depth, keyframe)
+                if payload is None:
+                    self.unchanged += 1
+                    return False
+                size = len(payload) + uart_proto.FRAME_OVERHEAD
+                if size <= self.tokens:
+                    # 보낼 때만 인코딩 (seq 번호를 건너뛰지 않게)
+                    frame = self.encoder.frame(T_PIXELS, payload)
+                    self.uart.write(frame)
+                    self.tokens -= len(frame)
+                    self.sent[name] = state
+                    self.frames += 1
+                    self.bytes += len(frame)
+                    self.depths[depth] += 1
+                    if keyframe:
+                        self.keyframes += 1
+                        self.keyframe_at[name] = now
+                    return True
+            self.dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, "bytes": self.bytes, "dropped": self.dropped,
+                "unchanged": self.unchanged, "keyframes": self.keyframes,
+                "depths": {DEPTH_NAMES[d]: n for d, n in self.depths.items()}}
+
+
+class RemoteStrip:
+    """
+    라즈3 링의 대역 스트립. 픽셀 버퍼 구조가 frame_table 빠른 경로와 같아서(RGB, 밝기 1.0)
+    fill/fade/컴포지터 코드를 로컬 스트립과 똑같이 쓸 수 있음. show()가 스트리밍.
+    """
+    def __init__(self, name: str, count: int, streamer: PixelStreamer):
+        self.name = name
+        self._n = count
+        self._bpp = 3
+        self._byteorder = (0, 1, 2)
+        self._offset = 0
+        self.brightness = 1.0
+        self._pre_brightness_buffer = None
+        self._post_brightness_buffer = bytearray(count * 3)
+        self.streamer = streamer
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        return tuple(self._post_brightness_buffer[i * 3:i * 3 + 3])
+
+    def __setitem__(self, i, color):
+        self._post_brightness_buffer[i * 3:i * 3 + 3] = bytes(int(c) for c in color)
+
+    def fill(self, color):
+        self._post_brightness_buffer[:] = bytes(int(c) for c in color) * self._n
+
+    def show(self):
+        self.streamer.push(self.name, bytes(self._post_brightness_buffer))
+
+
+_streamer: Optional[PixelStreamer] = None
+_remote: Dict[str, RemoteStrip] = {}
+_lock = threading.Lock()
+
+def get_remote_strip(name: str) -> RemoteStrip:
+    """C/D 원격 스트립 (공용 UART 위 스트리머 1개 공유)"""
+    global _streamer
+    with _lock:
+        if _streamer is None:
+            from hw_registry import get_uart
+            _streamer = PixelStreamer(get_uart(), encoder=uart_proto.encoder)
+        strip = _remote.get(name)
+        if strip is None:
+            strip = _remote[name] = RemoteStrip(name, REMOTE_COUNTS[name], _streamer)
+        return strip
+
+def streamer_stats() -> Optional[dict]:
+    return _streamer.stats() if _streamer else None
+
+
+# ===== 벤치마크 =====
+class _SinkUart:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, b: bytes) -> int:
+        self.data += b
+        return len(b)
+
+def _scenes() -> Dict[str, Callable[[int, int], bytes]]:
+    import colorsys
+    import color_lut
+
+    def fade(f, n):        # healing: 전체 단색 밝기 변화
+        level = abs(50 - f % 100) * 2
+        return bytes(color_lut.scale_color((255, 255, 0), level)) * n
+
+    def chase(f, n):       # focus/relief: 픽셀 1~2개만 변화
+        out = bytearray(n * 3)
+        out[(f % n) * 3] = 255
+        return bytes(out)
+
+    def rainbow(f, n):     # 최악: 매 프레임 전 픽셀 변화
+        out = bytearray()
+        for i in range(n):
+            r, g, b = colorsys.hsv_to_rgb(((i / n) + f / 100) % 1.0, 1, 1)
+            out += bytes((int(r * 255), int(g * 255), int(b * 255)))
+        return bytes(out)
+
+    return {"fade": fade, "chase": chase, "rainbow": rainbow}
+
+def benchmark(seconds: float = 4.0, fps: float = 50.0) -> None:
+    scenes = _scenes()
+    ticks = int(seconds * fps)
+    print(f"link {LINK_BYTES_PER_S:.0f} B/s (115200 8N1), C={REMOTE_COUNTS['C']}px D={REMOTE_COUNTS['D']}px")
+    print("max FPS by fixed depth (bytes per C+D tick, no budget):")
+    print(f"  {'scene':8s} " + " ".join(f"{DEPTH_NAMES[d]:>16s}" for d in DEPTH_BYTES))
+    for scene, gen in scenes.items():
+        cols = []
+        for depth in DEPTH_BYTES:
+            enc = uart_proto.Encoder()
+            sent: Dict[str, Optional[bytes]] = {"C": None, "D": None}
+            total = 0
+            for f in range(ticks):
+                for name, n in REMOTE_COUNTS.items():
+                    payload, sent[name] = encode_pixels(name, sent[name], gen(f, n), depth)
+                    if payload is not None:
+                        total += len(enc.frame(T_PIXELS, payload))
+            per_tick = total / ticks
+            cols.append(f"{per_tick:6.1f}B {LINK_BYTES_PER_S / per_tick if per_tick else float('inf'):6.0f}fps")
+        print(f"  {scene:8s} " + " ".join(f"{c:>16s}" for c in cols))
+
+    print(f"adaptive streamer at {fps:.0f} fps target (simulated clock):")
+    print(f"  {'scene':8s} {'sent fps':>9s} {'dropped':>8s} {'B/s':>7s}  depths            exact")
+    for scene, gen in scenes.items():
+        now = [0.0]
+        sink = _SinkUart()
+        st = PixelStreamer(sink, clock=lambda: now[0])
+        strips = {name: RemoteStrip(name, n, st) for name, n in REMOTE_COUNTS.items()}
+        for f in range(ticks):
+            now[0] = f / fps
+            for name, strip in strips.items():
+                strip._post_brightness_buffer[:] = gen(f, len(strip))
+                strip.show()
+        # 수신측 복원 결과가 송신측이 추적한 상태와 같은지
+        rx = uart_proto.Receiver(None)
+        rx._ingest(bytes(sink.data))
+        states: Dict[str, bytearray] = {}
+        for cmd in rx.pending:
+            if cmd.kind == "pixels":
+                apply_pixels(cmd.data, states, REMOTE_COUNTS)
+        exact = all(bytes(states.get(n, b"")) == st.sent.get(n) for n in REMOTE_COUNTS)
+        s = st.stats()
+        per_strip_fps = s["frames"] / len(REMOTE_COUNTS) / seconds
+        depths = ",".join(f"{k[3:]}:{v}" for k, v in s["depths"].items() if v)
+        print(f"  {scene:8s} {per_strip_fps:9.1f} {s['dropped']:8d} {s['bytes'] / seconds:7.0f}  {depths:16s}  {exact}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="C/D 픽셀 스트리밍 대역폭 벤치마크")
+    ap.add_argument("--seconds", type=float, default=4.0)
+    ap.add_argument("--fps", type=float, default=50.0)
+    args = ap.parse_args()
+    benchmark(args.seconds, args.fps)
@@ -1,21 +1,36 @@
+import sys
 import threading
 
-# --- 모션 함수 임포트 ---
-from healing_motion import healing_effect
-from relief_motion import relief_effect
-from energy_motion import energy_effect
-from focus_motion  import focus_effect
-from love_motion   import love_effect
+# --- 모션 함수 지연 임포트 ---
+# 각 모션 모듈은 import 시점에 /dev/serial0와 NeoPixel을 열기 때문에
+# 실제로 그 모션을 처음 실행할 때 import 한다 (main 시작 시 장치 열기 없음)
+def _import(module_name: str):
+    # importlib.import_module은 builtins.__import__를 거치지 않아
+    # startup_profile이 모션 모듈 import 비용을 항목별로 잡지 못함 → __import__로
+    __import__(module_name)
+    return sys.modules[module_name]
+
+def _lazy(module_name: str, func_name: str):
+    def effect(*args, **kwargs):
+        return getattr(_import(module_name), func_name)(*args, **kwargs)
+    effect.__name__ = func_name
+    effect.module_name = module_name
+    return effect
 
 # wanted_feeling -> 실행 함수 매핑
 REGISTRY = {
-    "healing": healing_effect,
-     "relief": relief_effect,
-     "energy": energy_effect,
-     "focus":  focus_effect,
-     "love":   love_effect,
+    "healing": _lazy("healing_motion", "healing_effect"),
+     "relief": _lazy("relief_motion",  "relief_effect"),
+     "energy": _lazy("energy_motion",  "energy_effect"),
+     "focus":  _lazy("focus_motion",   "focus_effect"),
+     "love":   _lazy("love_motion",    "love_effect"),
 }
 
+def preload(names=None) -> None:
+    """지정한 모션 모듈을 미리 import (기본: 전부)"""
+    for name in (names or REGISTRY):
+        _import(REGISTRY[name].module_name)
+
 # 내부 상태(딱 1개 스레드만 돌게 관리)
 _motion_thread = None
 _stop_evt = threading.Event()
@@ -86,5 +101,8 @@ def stop_neopixel_effect():
 def cleanup_neopixel():
     """
     프로그램 종료 시 호출 권장.
+    모션 정지 후 공용 레지스트리의 스트립/UART를 한 번에 끄고 닫는다.
     """
     stop_neopixel_effect()
+    from hw_registry import close_all
+    close_all()
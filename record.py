@@ -20,18 +20,40 @@ def get_mic_device():
             return f"plughw:{card_number},0"
 
     return None
-# 2. 녹음 (arecord 사용: 16bit, 16kHz, Mono, 8초)
+# 2. 녹음 (arecord 사용: 16bit, 16kHz, Mono)
+#  - 기본: 스트리밍 + 끝점 검출 (말이 끝나면 hangover 후 바로 종료, 최대 8초)
+#  - --fixed: 기존처럼 8초 고정 녹음
+#  - --wav <파일>: 마이크 대신 WAV 파일로 끝점 검출 동작 확인
 # print(get_mic_device())
+import argparse
+from audio_capture import EndpointConfig, record_with_endpoint, capture_until_endpoint, wav_frames, write_wav, format_metrics
 
-print("8초간 녹음 시작...")
-subprocess.run([
-    "arecord",
-    "-D", get_mic_device(),      # USB 마이크에 맞게 수정
-    "-f", "S16_LE",          # 16-bit
-    "-r", "16000",           # 샘플레이트
-    "-c", "1",               # 모노
-    "-d", "8",               # 8초간 녹음
-    wav_path
-])
+parser = argparse.ArgumentParser()
+parser.add_argument("--fixed", action="store_true", help="8초 고정 녹음")
+parser.add_argument("--hangover", type=int, default=700, help="발화 종료 판정 무음 길이(ms)")
+parser.add_argument("--max", type=float, default=8.0, help="최대 녹음 길이(초)")
+parser.add_argument("--wav", help="마이크 대신 사용할 WAV 파일")
+args = parser.parse_args()
+
+if args.fixed:
+    print("8초간 녹음 시작...")
+    subprocess.run([
+        "arecord",
+        "-D", get_mic_device(),      # USB 마이크에 맞게 수정
+        "-f", "S16_LE",          # 16-bit
+        "-r", "16000",           # 샘플레이트
+        "-c", "1",               # 모노
+        "-d", "8",               # 8초간 녹음
+        wav_path
+    ])
+else:
+    cfg = EndpointConfig(hangover_ms=args.hangover, max_duration=args.max)
+    print(f"녹음 시작... (최대 {cfg.max_duration:g}초, 말이 끝나면 자동 종료)")
+    if args.wav:
+        pcm, metrics = capture_until_endpoint(wav_frames(args.wav, cfg.frame_ms, realtime=True), cfg)
+    else:
+        pcm, metrics = record_with_endpoint(get_mic_device(), cfg)
+    write_wav(wav_path, pcm)
+    print(f"[record] {format_metrics(metrics)}")
 
 print("녹음 완료, STT 요청 중...")
@@ -2,18 +2,21 @@ import time
 import threading
 from typing import Optional
 
-import board
-import neopixel
-import serial
+from hw_registry import get_strip, get_uart
+import frame_table
+from color_lut import fade_steps, dim
+import uart_proto
+from uart_proto import COLOR_NAMES
+from clock_sync import get_sync
 
 # ================================
 # 라즈4 로컬 스트립 (8픽셀, 12픽셀)
-#  - 8  → board.D12
-#  - 12 → board.D13
+#  - 8  → A (board.D12)
+#  - 12 → B (board.D13)
 # ================================
 LED_CONFIGS = {
-    "8":  {"pin": board.D12, "count": 8},   # 변경됨
-    "12": {"pin": board.D13, "count": 12},  # 변경됨
+    "8":  {"strip": "A", "count": 8},   # 변경됨
+    "12": {"strip": "B", "count": 12},  # 변경됨
 }
 
 # 로컬(8/12) → 원격(C/D) 매핑
@@ -36,17 +39,18 @@ _DEFAULT_COLOR = (255, 255, 255)
 _DEFAULT_NAME  = "white"
 _OFF = (0, 0, 0)
 
-# === 송신 포맷 옵션 ===
-# - False: rpi3의 현재 파서와 100% 호환 (권장: "relief\n" → "C,red\n")
-# - True : "mode|payload" 한 줄도 허용(= "relief|C,red\n")
-INLINE_MODE_PREFIX = False  # 필요 시 True
+# 로컬 패턴이 끝난 뒤 라즈3 타임라인(초): C 시작 → D 시작 → 다음 사이클
+#  (C 16px relief 1사이클 ≈ 12초, D 24px ≈ 18초 + 여유)
+_C_START = 0.5
+_C_SLOT = 13.0
+_D_SLOT = 21.0
 
-# UART (라즈3와 동일 속도 사용)
-_uart = serial.Serial("/dev/serial0", 115200, timeout=1)
+# UART (라즈3와 동일 속도 사용, 다른 모션과 같은 포트 핸들 공유)
+_uart = get_uart()
 
-# 네오픽셀 인스턴스 (모듈 로드시 1회 생성)
+# 네오픽셀 인스턴스 (공용 레지스트리 핸들)
 _pixels_dict = {
-    name: neopixel.NeoPixel(cfg["pin"], cfg["count"], brightness=1.0, auto_write=False)
+    name: get_strip(cfg["strip"])
     for name, cfg in LED_CONFIGS.items()
 }
 
@@ -58,14 +62,15 @@ def _safe_sleep(sec: float, stop_event: Optional[threading.Event]) -> None:
             break
         time.sleep(0.01)
 
+def _sleep_until(t: float, stop_event: Optional[threading.Event]) -> None:
+    """time.monotonic() 기준 절대 시각까지 대기"""
+    _safe_sleep(t - time.monotonic(), stop_event)
+
 def _fade_in_pair(pixels, p1: int, p2: int, color, max_brightness=1.0,
                   steps=10, delay=0.05, stop_event: Optional[threading.Event] = None) -> bool:
-    r, g, b = color
-    for step in range(steps):
+    for fade_color in fade_steps(tuple(color), max_brightness, steps):
         if stop_event and stop_event.is_set():
             return False
-        level = max_brightness * (step + 1) / steps
-        fade_color = (int(r * level), int(g * level), int(b * level))
         pixels[p1] = fade_color
         pixels[p2] = fade_color
         pixels.show()
@@ -74,12 +79,12 @@ def _fade_in_pair(pixels, p1: int, p2: int, color, max_brightness=1.0,
 
 def _turn_off_pair(pixels, p1: int, p2: int, steps=5, delay=0.05,
                    stop_event: Optional[threading.Event] = None) -> None:
-    r, g, b = pixels[p1]
+    lit = pixels[p1]
     for step in range(steps):
         if stop_event and stop_event.is_set():
             break
         level = 1 - (step + 1) / steps
-        faded_color = (int(r * level), int(g * level), int(b * level))
+        faded_color = dim(lit, level)
         pixels[p1] = faded_color
         pixels[p2] = faded_color
         pixels.show()
@@ -116,21 +121,21 @@ def _relief_pattern(pixels, led_count: int, color, stop_event: Optional[threadin
     return True
 
 # ---------------- 송신 헬퍼 ----------------
-def _send_relief_to_rpi3(local_seg: str, color_name: str) -> None:
+def _send_relief_to_rpi3(local_seg: str, color_name: str, at: Optional[float] = None) -> None:
     """
     로컬 세그먼트(8/12)가 끝난 뒤 → RPi3의 대응 링(C/D)을 켜도록 트리거 전송.
-    - 권장: 2줄 ("relief" → "C,red")
-    - INLINE_MODE_PREFIX=True면 1줄 ("relief|C,red")
+    모드 + 스트립 명령을 프레임 하나로 ("relief" → "C,red")
+    at: 라즈3 시계 기준 실행 시각 (clock_sync). None이면 도착 즉시
     """
     strip = _LOCAL_TO_REMOTE.get(local_seg)  # '8'→'C', '12'→'D'
     if not strip:
         return
+    cmds = [uart_proto.mode("relief"),
+            uart_proto.strip(strip, 100, COLOR_NAMES.get(color_name, _DEFAULT_COLOR))]
+    if at is not None:
+        cmds = uart_proto.timed(at, *cmds)
     try:
-        if INLINE_MODE_PREFIX:
-            _uart.write(f"{strip},{color_name}\n".encode())
-        else:
-            _uart.write(b"relief\n")
-            _uart.write(f"{strip},{color_name}\n".encode())
+        uart_proto.send(_uart, *cmds)
     except Exception as e:
         print(f"[relief] UART write error: {e}")
 
@@ -140,11 +145,8 @@ def _send_focus_to_rpi3(local_seg: str, color_name: str, brightness: int = 1) ->
     if not strip:
         return
     try:
-        if INLINE_MODE_PREFIX:
-            _uart.write(f"focus|{strip},{int(brightness)},{color_name}\n".encode())
-        else:
-            _uart.write(b"focus\n")
-            _uart.write(f"{strip},{int(brightness)},{color_name}\n".encode())
+        uart_proto.send(_uart, uart_proto.mode("focus"),
+                        uart_proto.strip(strip, brightness, COLOR_NAMES.get(color_name, _DEFAULT_COLOR)))
     except Exception as e:
         print(f"[focus] UART write error: {e}")
 
@@ -165,7 +167,7 @@ def relief_effect(
         while not (stop_event and stop_event.is_set()):
             # 순서를 보장하기 위해 명시적으로 8 → 12 순회
 
-            _uart.write(b"relief\n")
+            uart_proto.send(_uart, uart_proto.mode("relief"))
             _safe_sleep(0.02, stop_event)
 
             pixels8 = _pixels_dict["8"]
@@ -177,30 +179,32 @@ def relief_effect(
             ok = _relief_pattern(pixels12, LED_CONFIGS["12"]["count"], color, stop_event)
             if not ok or (stop_event and stop_event.is_set()):
                 break
-            _safe_sleep(0.5, stop_event)
-            _send_relief_to_rpi3("8", color_name)
-            _safe_sleep(13, stop_event)
-            _send_relief_to_rpi3("12", color_name)
-            _safe_sleep(21, stop_event)
+            sync = get_sync() if uart_proto.PROTOCOL == "binary" else None
+            if sync is not None and sync.refresh():
+                # C/D 시작 시각을 라즈3 시계로 예약해 한꺼번에 전송 → 라즈3가 도착 순서/지연과 상관없이 제시각에 시작
+                t_c = time.monotonic() + _C_START
+                _send_relief_to_rpi3("8", color_name, at=sync.to_remote(t_c))
+                _send_relief_to_rpi3("12", color_name, at=sync.to_remote(t_c + _C_SLOT))
+                _sleep_until(t_c + _C_SLOT + _D_SLOT, stop_event)
+            else:
+                _safe_sleep(_C_START, stop_event)
+                _send_relief_to_rpi3("8", color_name)
+                _safe_sleep(_C_SLOT, stop_event)
+                _send_relief_to_rpi3("12", color_name)
+                _safe_sleep(_D_SLOT, stop_event)
 
     finally:
+        if uart_proto.PROTOCOL == "binary":
+            uart_proto.send(_uart, uart_proto.cancel())   # 라즈3에 예약해 둔 C/D 시작 취소
         # 안전 종료: 모든 로컬 픽셀 Off
         for pixels in _pixels_dict.values():
-            for i in range(len(pixels)):
-                pixels[i] = _OFF
-            pixels.show()
+            frame_table.fill_color(pixels, _OFF)
 
 def cleanup() -> None:
-    """프로그램 종료 시 호출 권장 (UART 닫기 등)"""
+    """프로그램 종료 시 호출 권장 (UART 닫기는 hw_registry.close_all())"""
     try:
         for pixels in _pixels_dict.values():
-            for i in range(len(pixels)):
-                pixels[i] = _OFF
-            pixels.show()
-    except Exception:
-        pass
-    try:
-        _uart.close()
+            frame_table.fill_color(pixels, _OFF)
     except Exception:
         pass
 
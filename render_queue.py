@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# 라즈3 스트립별 렌더 워커 + 정책 있는 bounded 명령 큐
+#  - 기존: run_relief/run_healing이 명령 루프 안에서 relief_pattern(수 초)/페이드를 바로 실행
+#          → 그동안 온 명령은 쌓였다가 끝난 뒤 늦게 재생되고, C가 도는 동안 D도 시작 못 함
+#  - 변경: 스트립마다 워커 스레드 1개 + 크기 제한 큐. 디스패처는 넣기만 하고 바로 다음 명령으로
+#    정책 (put 할 때 지정):
+#      latest  : 같은 key의 대기 명령을 새 것으로 교체 (밝기/색 갱신은 마지막 값만 의미 있음)
+#      queue   : 뒤에 추가, 꽉 차면 가장 오래된 것을 버림 (drop-oldest)
+#      preempt : 대기 명령을 전부 버리고 지금 돌고 있는 애니메이션도 끊은 뒤 바로 실행
+#  - 카운터: 큐 깊이(현재/최대), 합침(coalesced), 버림(dropped), 중단(preempted),
+#            도착(예약 명령은 예정 시각) → 렌더 시작 지연(lag)
+import math
+import time
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+POLICIES = ("latest", "queue", "preempt")
+DEFAULT_DEPTH = 8
+
+
+def summarize(values) -> dict:
+    """지연(초) 목록 → {n, mean_ms, p95_ms, max_ms}"""
+    v = sorted(values)
+    if not v:
+        return {"n": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    return {"n": len(v), "mean_ms": 1000.0 * sum(v) / len(v),
+            "p95_ms": 1000.0 * v[math.ceil(0.95 * len(v)) - 1], "max_ms": 1000.0 * v[-1]}
+
+
+class RenderQueue:
+    """크기 제한 명령 큐. put()의 정책에 따라 합치기/버리기/선점"""
+    def __init__(self, maxlen: int = DEFAULT_DEPTH):
+        self.maxlen = maxlen
+        self.items: Deque[Tuple[object, object]] = deque()   # (key, 명령)
+        self.cv = threading.Condition()
+        self.preempt = threading.Event()   # 지금 렌더 중인 명령을 끊으라는 신호
+        self.active = False                # 워커가 명령 1개를 렌더 중
+        self.pushed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.preempted = 0
+        self.max_depth = 0
+
+    def put(self, cmd, policy: str = "queue", key=None) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy: {policy}")
+        with self.cv:
+            self.pushed += 1
+            if policy == "latest":
+                for i, (k, _) in enumerate(self.items):
+                    if k == key:
+                        self.items[i] = (key, cmd)
+                        self.coalesced += 1
+                        return
+            elif policy == "preempt":
+                self.dropped += len(self.items)
+                self.items.clear()
+                if self.active:
+                    self.preempt.set()
+                    self.preempted += 1
+            if len(self.items) >= self.maxlen:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append((key, cmd))
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.cv.notify_all()
+
+    def get(self, timeout: Optional[float] = None):
+        """명령 1개 (없으면 None). 꺼내는 순간 active, 이전 선점 신호는 해제"""
+        with self.cv:
+            if not self.items:
+                self.cv.wait(timeout)
+            if not self.items:
+                return None
+            self.active = True
+            self.preempt.clear()
+            return self.items.popleft()[1]
+
+    def done(self) -> None:
+        with self.cv:
+            self.active = False
+
+    def clear(self) -> None:
+        with self.cv:
+            self.items.clear()
+            self.cv.notify_all()
+
+    @property
+    def depth(self) -> int:
+        return len(self.items)
+
+
+class RenderWorker:
+    """
+    스트립 1개 전담 스레드. handler(name, cmd, should_stop)로 그림.
+    애니메이션 handler는 should_stop()이 True면 바로 돌아와야 함 (모드 종료 / preempt)
+    """
+    def __init__(self, name: str, handler: Callable[[str, object, Callable[[], bool]], None],
+                 maxlen: int = DEFAULT_DEPTH):
+        self.name = name
+        self.handler = handler
+        self.queue = RenderQueue(maxlen)
+        self.stop_event = threading.Event()
+        self.lags: Deque[float] = deque(maxlen=1000)
+        self.rendered = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name=f"render-{name}", daemon=True)
+
+    def start(self) -> "RenderWorker":
+        self.thread.start()
+        return self
+
+    def put(self, cmd, policy: str = "queue", key=None) -> None:
+        self.queue.put(cmd, policy, key)
+
+    def should_stop(self) -> bool:
+        return self.stop_event.is_set() or self.queue.preempt.is_set()
+
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            cmd = self.queue.get(timeout=0.5)
+            if cmd is None:
+                continue
+            at = getattr(cmd, "at", None)
+            ref = at if at is not None else getattr(cmd, "received", 0.0)
+            if ref:
+                self.lags.append(time.monotonic() - ref)
+            try:
+                self.handler(self.name, cmd, self.should_stop)
+                self.rendered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"[render-{self.name}] error: {e}", flush=True)
+            finally:
+                self.queue.done()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """대기 명령 버리고, 렌더 중인 애니메이션을 끊고, 스레드 종료 대기"""
+        self.stop_event.set()
+        self.queue.clear()
+        self.thread.join(timeout)
+
+    def stats(self) -> dict:
+        q = self.queue
+        return {"depth": q.depth, "max_depth": q.max_depth, "pushed": q.pushed,
+                "coalesced": q.coalesced, "dropped": q.dropped, "preempted": q.preempted,
+                "rendered": self.rendered, "errors": self.errors, "lag": summarize(self.lags)}
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# 단계 간 결과 전달 채널 (인식기 → main 오케스트레이터 → play_neopixel_effect)
+#  - 예전 emotion_label.txt / current_feeling.txt / want_feeling.txt 파일 IPC를 대체
+#  - 같은 프로세스 안에서 최신 값을 잠금으로 보호해 주고받음 (SD카드 I/O, 읽기/쓰기 경합 없음)
+#  - RESULT_MIRROR=1이면 기존 파일에도 그대로 기록 (외부 스크립트/디버깅용 미러)
+import os
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+LABEL_PATH = "/home/capstone/project/emotion_label.txt"
+CURRENT_FEELING_PATH = "/home/capstone/project/current_feeling.txt"
+WANT_FEELING_PATH = "/home/capstone/project/want_feeling.txt"
+
+MIRROR_FILES = os.environ.get("RESULT_MIRROR", "0") == "1"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class EmotionResult:
+    label: int                 # 0 happy / 1 sad / 2 angry
+    name: str                  # emotion_labels[label]
+    prob: float
+    transcript: str
+    captured_at: float = 0.0   # 녹음 종료 (time.time)
+    recognized_at: float = 0.0 # STT 완료
+    classified_at: float = field(default_factory=time.time)
+
+
+@dataclass(frozen=True)
+class FeelingSelection:
+    wanted: str                # 버튼으로 고른 원하는 감정 (healing/relief/...)
+    selected_at: float = field(default_factory=time.time)
+
+
+class Channel(Generic[T]):
+    """
+    최신 값 1개를 보관하는 스레드 안전 채널.
+    publish()할 때마다 seq가 1씩 증가하고, wait_next(seq)로 그 이후 값을 기다릴 수 있음.
+    """
+    def __init__(self, mirror: Optional[Callable[[T], None]] = None):
+        self._cond = threading.Condition()
+        self._value: Optional[T] = None
+        self._seq = 0
+        self._mirror = mirror
+
+    def publish(self, value: T) -> int:
+        with self._cond:
+            self._value = value
+            self._seq += 1
+            seq = self._seq
+            self._cond.notify_all()
+        if self._mirror and MIRROR_FILES:
+            try:
+                self._mirror(value)
+            except OSError as e:
+                print(f"[channel] mirror write error: {e}")
+        return seq
+
+    def latest(self) -> Optional[T]:
+        with self._cond:
+            return self._value
+
+    @property
+    def seq(self) -> int:
+        with self._cond:
+            return self._seq
+
+    def wait_next(self, after_seq: int, timeout: Optional[float] = None) -> Tuple[int, Optional[T]]:
+        """after_seq 이후 새 값이 올 때까지 대기. 타임아웃이면 (현재 seq, None)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq, timeout)
+            if self._seq > after_seq:
+                return self._seq, self._value
+            return self._seq, None
+
+
+# ===== 기존 파일 미러 =====
+def _mirror_emotion(r: EmotionResult) -> None:
+    with open(LABEL_PATH, "w") as log_file:
+        log_file.write(f"{r.label}")
+    with open(CURRENT_FEELING_PATH, "w") as log_file:
+        log_file.write(f"{r.name}")
+
+def _mirror_feeling(s: FeelingSelection) -> None:
+    with open(WANT_FEELING_PATH, "w") as f:
+        f.write(f"{s.wanted}\n")
+
+
+emotions: Channel[EmotionResult] = Channel(_mirror_emotion)
+feelings: Channel[FeelingSelection] = Channel(_mirror_feeling)
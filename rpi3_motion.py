@@ -1,18 +1,29 @@
 # 수신측 코드
+#  - 읽기 스레드 1개(rx.start)가 포트에서 블로킹으로 읽어 디코드 → 디스패처(serve)가
+#    모드 전환은 언제든 바로 처리하고, 스트립 명령은 C/D 렌더 워커(render_queue)의 큐로 넘김
+#  - 워커가 스트립마다 따로 그림 → relief 패턴(수 초)이 도는 동안에도 다른 링/새 명령을 바로 받음
+#    모드별 큐 정책: 밝기·색·프레임 갱신은 latest(합치기), 트리거는 queue(오래된 것부터 버림),
+#    relief는 preempt(새 트리거가 지금 패턴을 끊음)
+#  - 모드 종료 때 CPU 사용률, 명령 도착 → 픽셀 show 지연, 모드 전환 지연, 큐 카운터를 출력
 import threading
 import time
-import board
-import neopixel
-import serial
-from typing import Optional, Tuple
+from collections import deque
+
+from hw_registry import get_strip, get_uart, close_all, frame, strip_stats
+from animation import run_frames
+import frame_table
+from color_lut import scale_pixel, fade_steps, dim
+from compositor import Compositor, pulse_layer
+import uart_proto
+import pixel_stream
+from render_queue import RenderWorker, summarize
 
 # === 공통 설정 ===
-BRIGHTNESS = 1.0
 COLOR = (255, 0, 0)  # love/focus/healing 기본 컬러(밝기 제어용)
 
 # 16픽셀 → D18, 24픽셀 → D19
-pixels_c = neopixel.NeoPixel(board.D18, 16, brightness=BRIGHTNESS, auto_write=False)
-pixels_d = neopixel.NeoPixel(board.D19, 24, brightness=BRIGHTNESS, auto_write=False)
+pixels_c = get_strip("C")
+pixels_d = get_strip("D")
 strips = {'C': pixels_c, 'D': pixels_d}
 remote_strips = [pixels_c, pixels_d]
 
@@ -25,244 +36,138 @@ COLOR_MAP = {
 }
 OFF = (0, 0, 0)
 
-ser = serial.Serial('/dev/serial0', 115200, timeout=0.1)
+ser = get_uart()
+# 바이너리 프레임 / 예전 텍스트 줄 모두 Command로 (uart_proto)
+#  - 시각 지정 명령은 그 시각에 get()으로 나오고, 라즈4의 PING(clock_sync)에는 바로 응답
+rx = uart_proto.Receiver(ser)
 
 # === 글로벌 상태 ===
 current_mode = None
-mode_thread = None
-stop_flag = False
+workers = {}          # 스트립 이름 → RenderWorker (모드마다 새로)
+_stream_states = {}   # STREAM: 스트립별 현재 RGB (delta는 디스패처에서 바로 적용)
+_stream_lock = threading.Lock()
+
+# ===== 측정 =====
+_latencies = deque(maxlen=2000)   # 명령 도착(예약 명령은 예정 시각) → show (초). 애니메이션은 시작 시점까지
+_switches = deque(maxlen=100)     # 모드 명령 도착 → 새 모드 워커 시작 (초)
+_mode_t0 = (0.0, 0.0)             # 모드 시작 시 (monotonic, process_time)
+
+def _shown(cmd):
+    """cmd가 픽셀로 나간 직후 호출"""
+    if cmd.received:
+        _latencies.append(time.monotonic() - (cmd.at if cmd.at is not None else cmd.received))
+
+def latency_stats(reset: bool = False) -> dict:
+    """지금 모드 시작 이후 CPU 사용률(%)과 지연 통계, 스트립별 큐 카운터"""
+    global _mode_t0
+    wall = time.monotonic() - _mode_t0[0]
+    cpu = time.process_time() - _mode_t0[1]
+    out = {"cpu_pct": 100.0 * cpu / wall if wall > 0 else 0.0,
+           "latency": summarize(_latencies), "switch": summarize(_switches),
+           "queues": {name: w.stats() for name, w in workers.items()}}
+    if reset:
+        _latencies.clear()
+        _switches.clear()
+        _mode_t0 = (time.monotonic(), time.process_time())
+    return out
 
 # ===== 공용 유틸 =====
-def scale_color(color, level):
-    r, g, b = color
-    return (int(r * level / 100), int(g * level / 100), int(b * level / 100))
-
 def fill_strips(local_strips, level):
-    color = scale_color(COLOR, level)
-    for strip in local_strips:  
-        for i in range(len(strip)):
-            strip[i] = color
-        strip.show()
+    for strip in local_strips:
+        frame_table.fill(strip, COLOR, level)
 
 def fill_strip(strip, level, index=None, color=None):
     if color is None:
         color = COLOR
     if index is None:
-        _color = scale_color(color, level)
-        for i in range(len(strip)):
-            strip[i] = _color
-    else:
-        strip[index] = scale_color(color, level)
+        frame_table.fill(strip, color, level)
+        return
+    strip[index] = scale_pixel(tuple(color), int(level))
     strip.show()
 
 def fill_strip_healing(strip, level, color):
-    c=scale_color(color, level)
-    for i in range(len(strip)):
-        strip[i]=c
-    strip.show()
+    frame_table.fill(strip, color, level)
 
 
 def fill_strip_color(strip, color):
     """RGB 색상 전체 채우기"""
-    for i in range(len(strip)):
-        strip[i] = color
-    strip.show()
+    frame_table.fill_color(strip, color)
 
-def fade_healing(strip,start,end,duration=0.5,steps=50,color=(255,0,0)):
-    delay=duration/max(1,steps)
-    for i in range(steps+1):
-        if stop_flag: return
-        level=start+(end-start)*i/steps
-        fill_strip_healing(strip, level, color)
-        time.sleep(delay)
+def _never():
+    return False
+
+def fade_healing(strip,start,end,duration=0.5,steps=50,color=(255,0,0),should_stop=_never):
+    fps=max(1,steps)/max(duration,1e-3)
+    frames=frame_table.fade_table_frames(strip, color, start, end, duration, fps)
+    run_frames(frames, fps, should_stop=should_stop)
 
 def clear_all():
-    fill_strip(pixels_c, 0)
-    fill_strip(pixels_d, 0)
+    with frame(pixels_c, pixels_d):
+        fill_strip(pixels_c, 0)
+        fill_strip(pixels_d, 0)
 
 # ===== LOVE 모드 =====
-
-def run_love():
-    global stop_flag
-    print("LOVE 모드 시작")
-
-    while not stop_flag:
-        if ser.in_waiting > 0:
-            line = ser.readline().decode().strip()
-            if "," in line:
-                try:
-                    strip_name, brightness_str = line.split(",")
-                    brightness = int(brightness_str)
-                    if strip_name in strips:  # 'C' or 'D'
-                        fill_strip(strips[strip_name], brightness)
-                except Exception as e:
-                    print(f"[LOVE] 데이터 오류: {e}, 값: {line}")
-    print("LOVE 모드 종료")
+def render_love(name, cmd, should_stop):
+    fill_strip(strips[name], cmd.level)
+    _shown(cmd)
 
 
 # ===== FOCUS 모드 =====
-def circular_fill(strip, duration=0.2, color=None):
+def circular_fill(strip, duration=0.2, color=None, should_stop=_never):
     if color is None: color = COLOR
     """순차 점등 → 순차 소등"""
     num_pixels = len(strip)
     for i in range(num_pixels):
+        if should_stop(): return
         fill_strip(strip, 100, i, color)
         time.sleep(duration)
     for i in range(num_pixels):
+        if should_stop(): return
         fill_strip(strip, 0, i, color)
         time.sleep(duration)
 
-def run_focus():
-    global stop_flag
-    print("FOCUS 모드 시작")
-
-    while not stop_flag:
-        if ser.in_waiting > 0:
-            line = ser.readline().decode().strip()
-            if "," in line:
-                try:
-                    strip_name, brightness_str = line.split(',')
-                    brightness = int(brightness_str)
-
-                    if strip_name in strips and brightness > 0:
-                        print(f"[FOCUS] {strip_name} 실행 요청 수신")
-                        circular_fill(strips[strip_name])
-                        # ✅ 실행 완료 후 라즈4에 완료 신호 보내기
-                        ser.write(b"DONE\n")
-
-                except Exception as e:
-                    print(f"[FOCUS] 데이터 오류: {e}, 값: {line}")
-        time.sleep(0.01)
-    print("FOCUS 모드 종료")
+def render_focus(name, cmd, should_stop):
+    if cmd.level <= 0:
+        return
+    print(f"[FOCUS] {name} 실행 요청 수신")
+    _shown(cmd)
+    circular_fill(strips[name], should_stop=should_stop)
+    # ✅ 실행 완료 후 라즈4에 완료 신호 보내기
+    uart_proto.send(ser, uart_proto.ack())
 
 # ===== HEALING 모드 (수정됨) =====
-def _parse_healing_cmd(line: str) -> Optional[Tuple[str, int, str]]:
-    """
-    Healing 명령 파서
-      입력 예:
-        'C,100,yellow'
-        'D|75|blue'
-        'ALL,80,red'
-        '*, 60 , white'
-      반환:
-        (target: 'C'|'D'|'ALL', max_level:int(0~100), color_name:str)
-      파싱 실패 시:
-        None
+def render_healing(name, cmd, should_stop):
     """
-    if not line:
-        return None
-
-    # 구분자 통일 및 토큰화
-    s = line.strip().replace('|', ',')
-    parts = [p.strip() for p in s.split(',') if p.strip()]
-    if len(parts) < 3:
-        return None
-
-    # 대상 스트립
-    raw_target = parts[0].upper()
-    if raw_target in ('ALL', '*'):
-        target = 'ALL'
-    else:
-        target = raw_target[:1]  # 'C' 또는 'D'
-        if target not in ('C', 'D'):
-            return None
-
-    # 밝기 (0~100, %, 소수 허용)
-    raw_level = parts[1]
-    if raw_level.endswith('%'):
-        raw_level = raw_level[:-1].strip()
-    try:
-        level = int(float(raw_level))
-    except ValueError:
-        return None
-    level = max(0, min(100, level))  # 클램프
-
-    # 색상 이름 (소문자 정규화)
-    color_name = parts[2].lower()
-
-    return (target, level, color_name)
-
-
-def run_healing():
-    """
-    UART 라인 수신 시에만 1사이클(상승→하강) 실행:
+    스트립 명령 수신 시에만 1사이클(상승→하강) 실행:
       - 'C,100,yellow' → C 링만 0→100→0
       - 'D|75|blue'    → D 링만 0→75→0
-      - 'ALL,80,red'   → C/D 모두 0→80→0
+      - 'ALL,80,red'   → C/D 모두 0→80→0 (D는 1초 뒤에 시작, C 다음 D로 이어짐)
     """
-    global stop_flag
-    print("HEALING 모드 대기중 (UART 트리거 기반)", flush=True)
-
-    while not stop_flag:
-        if ser.in_waiting == 0:
-            time.sleep(0.01)
-            continue
-
-        line = ser.readline().decode(errors='ignore').strip()
-        if not line:
-            continue
-
-        parsed = _parse_healing_cmd(line)
-        if not parsed:
-            print(f"[HEALING] 잘못된 명령: {line}", flush=True)
-            continue
-
-        target, max_level, color_name = parsed
-
-        # 색상 확인 (없으면 흰색으로 동작하되 경고 출력)
-        if color_name not in COLOR_MAP:
-            print(f"[HEALING] 미지원 색상: {color_name} → white로 대체", flush=True)
-        color = COLOR_MAP.get(color_name, (255, 255, 255))
-
-        # 대상 스트립 선택
-        if target in ('C', 'D'):
-            if target not in strips:
-                print(f"[HEALING] 미지의 스트립: {target}", flush=True)
-                continue
-            targets = [strips[target]]
-        else:  # 'ALL'
-            targets = list(strips.values())
-
-        print(f"[HEALING] target={target}, level={max_level}, color={color_name}", flush=True)
-
-        # 1사이클 실행 (상승 → 하강)
-        for strip in targets:
-            if stop_flag:
-                break
-            fade_healing(strip, 0,         max_level, 0.5, 50, color)
-            if stop_flag:
-                break
-            fade_healing(strip, max_level, 0,         0.5, 50, color)
-
-        # (선택) ACK 전송
-        # try:
-        #     ser.write(b"DONE\n")
-        #     ser.flush()
-        # except Exception:
-        #     pass
-
-    print("HEALING 모드 종료", flush=True)
+    color = cmd.color or COLOR_MAP["white"]
+    start = list(strips).index(name) * 1.0 if cmd.strip == "*" else 0.0
+    print(f"[HEALING] target={name}, level={cmd.level}, color={color}", flush=True)
+    comp = Compositor({name: strips[name]})
+    comp.add(name, pulse_layer(color, start, 0.5, 0.5, peak=cmd.level))
+    _shown(cmd)
+    comp.run(should_stop=should_stop)
 
 
 # ===== RELIEF 유틸 =====
-def _fade_in_pair_relief(pixels, p1, p2, color, max_brightness=1.0, steps=10, delay=0.05):
-    r, g, b = color
-    for step in range(steps):
-        if stop_flag: return False
-        level = max_brightness * (step + 1) / steps  # 0~1
-        fade_color = (int(r * level), int(g * level), int(b * level))
+def _fade_in_pair_relief(pixels, p1, p2, color, max_brightness=1.0, steps=10, delay=0.05, should_stop=_never):
+    for fade_color in fade_steps(tuple(color), max_brightness, steps):
+        if should_stop(): return False
         pixels[p1] = fade_color
         pixels[p2] = fade_color
         pixels.show()
         time.sleep(delay)
     return True
 
-def _turn_off_pair_relief(pixels, p1, p2, steps=5, delay=0.05):
-    r, g, b = pixels[p1]
+def _turn_off_pair_relief(pixels, p1, p2, steps=5, delay=0.05, should_stop=_never):
+    lit = pixels[p1]
     for step in range(steps):
-        if stop_flag: return
+        if should_stop(): return
         level = 1 - (step + 1) / steps
-        faded_color = (int(r * level), int(g * level), int(b * level))
+        faded_color = dim(lit, level)
         pixels[p1] = faded_color
         pixels[p2] = faded_color
         pixels.show()
@@ -271,155 +176,176 @@ def _turn_off_pair_relief(pixels, p1, p2, steps=5, delay=0.05):
     pixels[p2] = OFF
     pixels.show()
 
-def relief_pattern(strip, led_count, color):
+def relief_pattern(strip, led_count, color, should_stop=_never):
     """양끝-대칭 페어 순차 페이드 인/아웃 → 역방향 반복(1사이클)"""
     num_pairs = led_count // 2
     pairs = [(i, led_count - 1 - i) for i in range(num_pairs)]
     # 정방향
     for idx, (p1, p2) in enumerate(pairs):
-        if not _fade_in_pair_relief(strip, p1, p2, color, max_brightness=(idx + 1) / len(pairs)):
+        if not _fade_in_pair_relief(strip, p1, p2, color, max_brightness=(idx + 1) / len(pairs),
+                                    should_stop=should_stop):
             return False
     for p1, p2 in pairs:
-        if stop_flag: return False
-        _turn_off_pair_relief(strip, p1, p2)
+        if should_stop(): return False
+        _turn_off_pair_relief(strip, p1, p2, should_stop=should_stop)
     # 역방향
     pairs_rev = [(led_count - 1 - i, i) for i in range(num_pairs)]
     for idx, (p1, p2) in enumerate(pairs_rev):
-        if not _fade_in_pair_relief(strip, p1, p2, color, max_brightness=(idx + 1) / len(pairs_rev)):
+        if not _fade_in_pair_relief(strip, p1, p2, color, max_brightness=(idx + 1) / len(pairs_rev),
+                                    should_stop=should_stop):
             return False
     for p1, p2 in pairs_rev:
-        if stop_flag: return False
-        _turn_off_pair_relief(strip, p1, p2)
+        if should_stop(): return False
+        _turn_off_pair_relief(strip, p1, p2, should_stop=should_stop)
     return True
 
-def _parse_relief_cmd(line: str):
-    """
-    'C,red'  → ('C','red')
-    'D|blue' → ('D','blue')
-    대소문자/공백 무시, 색상 이름은 COLOR_MAP 키여야 함.
-    """
-    s = line.strip()
-    if not s:
-        return None
-    if '|' in s:
-        left, _, color = s.partition('|')
-        return (left.strip().upper()[:1], color.strip().lower())
-    if ',' in s:
-        left, _, color = s.partition(',')
-        return (left.strip().upper()[:1], color.strip().lower())
-    return None
-
-
 # ===== RELIEF 모드 =====
-def run_relief():
-    """모드 전환 후: 'C,red' / 'D|blue' 수신 시 해당 링에서 relief 1사이클 실행"""
-    global stop_flag
-    print("RELIEF 모드 시작")
-    while not stop_flag:
-        if ser.in_waiting > 0:
-            line = ser.readline().decode(errors='ignore').strip()
-            parsed = _parse_relief_cmd(line)
-            if not parsed:
-                continue
-            strip_name, color_name = parsed
-            if strip_name not in strips:
-                continue
-            color = COLOR_MAP.get(color_name)
-            if not color:
-                print(f"[RELIEF] 지원하지 않는 색상: {color_name}")
-                continue
-            print(f"[RELIEF] strip={strip_name}, color={color_name}")
-            ok = relief_pattern(strips[strip_name], len(strips[strip_name]), color)
-            if not ok:
-                break
-        time.sleep(0.005)
-    print("RELIEF 모드 종료")
+def render_relief(name, cmd, should_stop):
+    """'C,red' / 'D|blue' 수신 시 해당 링에서 relief 1사이클 실행 (새 트리거가 오면 끊고 새로)"""
+    if not cmd.color:
+        print(f"[RELIEF] 색상 없는 명령: {cmd}")
+        return
+    print(f"[RELIEF] strip={name}, color={cmd.color}")
+    _shown(cmd)
+    if not relief_pattern(strips[name], len(strips[name]), cmd.color, should_stop):
+        fill_strip(strips[name], 0)   # 중간에 끊겼으면 남은 픽셀 소등
 
 # ===== 에너지 함수 =====
-def run_energy():
-    """UART로 받은 C/D LED 제어"""
-    print("ENERGY 모드 시작")
-    while not stop_flag:
-        if ser.in_waiting > 0:
-            line = ser.readline().decode(errors="ignore").strip()
-            if "," in line:
-                try:
-                    parts = line.split(",")
-                    if len(parts) == 4:
-                        strip_name, r, g, b = parts
-                        if strip_name in strips:
-                            color = (int(r), int(g), int(b))
-                            fill_strip_color(strips[strip_name], color)  # ✅ 수정됨
-                except Exception as e:
-                    print(f"[UART ERROR] {e}, line={line}")
-        time.sleep(0.01)
-    clear_all()
-    print("ENERGY 모드 종료")
-
-
+def render_energy(name, cmd, should_stop):
+    """UART로 받은 C/D LED 색 채우기"""
+    if cmd.color is not None:
+        fill_strip_color(strips[name], cmd.color)  # ✅ 수정됨
+        _shown(cmd)
+
+
+# ===== STREAM 모드 (얇은 렌더러) =====
+def render_stream(name, cmd, should_stop):
+    """라즈4가 렌더링해서 보낸 C/D 픽셀 프레임을 그대로 표시. 효과 계산 없음"""
+    with _stream_lock:
+        rgb = bytes(_stream_states[name])   # 밀린 delta까지 적용된 최신 상태
+    frame_table.blit_rgb(strips[name], rgb)
+    strips[name].show()
+    _shown(cmd)
+
+def _apply_stream(cmd):
+    """
+    delta는 순서대로 전부 적용해야 하므로 디스패처에서 바로 → 그린 스트립 이름
+    (오류거나, stream 모드 진입 후 키프레임 전의 delta라 버렸으면 None)
+    """
+    counts = {name: len(s) for name, s in strips.items()}
+    try:
+        with _stream_lock:
+            name, state = pixel_stream.apply_pixels(cmd.data, _stream_states, counts)
+    except (KeyError, IndexError, ValueError) as e:
+        print(f"[STREAM] 프레임 오류: {e}", flush=True)
+        return None
+    if state is None:
+        return None
+    return name if name in strips else None
+
+
+# 모드 → (렌더 핸들러, 큐 정책)
+#  latest : love 밝기 / energy 색 / stream 프레임 — 밀리면 마지막 값만 그림
+#  queue  : focus/healing 트리거 — 하나씩 재생 (Pi4 focus는 ACK를 기다림), 넘치면 오래된 것 버림
+#  preempt: relief 트리거 — 지난 패턴을 늦게 다시 돌리지 않고 새 트리거로 바로 교체
+MODES = {
+    "love":    (render_love, "latest"),
+    "focus":   (render_focus, "queue"),
+    "healing": (render_healing, "queue"),
+    "relief":  (render_relief, "preempt"),
+    "energy":  (render_energy, "latest"),
+    "stream":  (render_stream, "latest"),
+}
 
 
 # ===== 모드 관리 (수정됨) =====
 def start_mode(mode):
-    global current_mode, mode_thread, stop_flag
+    global current_mode, workers
     stop_mode()
-    stop_flag = False
-    try:
-        ser.reset_input_buffer()
-        ser.reset_output_buffer()
-
-    except Exception:
-        pass
-    
-    if mode == "love":
-        mode_thread = threading.Thread(target=run_love, daemon=True)
-    elif mode == "focus":
-        mode_thread = threading.Thread(target=run_focus, daemon=True)
-    elif mode == "healing":
-        mode_thread = threading.Thread(target=run_healing, daemon=True)
-    elif mode == "relief":
-        mode_thread = threading.Thread(target=run_relief, daemon=True)
-    elif mode == "energy":
-        mode_thread = threading.Thread(target=run_energy, daemon=True)
-    else:
+    if mode not in MODES:
         print(f"알 수 없는 모드: {mode}")
         return
-       
+    # 포트 버퍼는 비우지 않음 (읽기 스레드가 모드 명령 뒤에 같이 받은 명령을 잃지 않게)
+    handler, _ = MODES[mode]
+    print(f"{mode.upper()} 모드 시작", flush=True)
+    if mode == "stream":
+        with _stream_lock:
+            _stream_states.clear()
+    workers = {name: RenderWorker(name, handler).start() for name in strips}
     current_mode = mode
-    mode_thread.start()
+    latency_stats(reset=True)
 
 def stop_mode():
-    global stop_flag, mode_thread, current_mode
-    if mode_thread and mode_thread.is_alive():
-        stop_flag = True
-        mode_thread.join()
+    global current_mode, workers
+    for w in workers.values():
+        w.stop()
     clear_all()
+    if current_mode:
+        print(f"{current_mode.upper()} 모드 종료", flush=True)
+        total = strip_stats()["total"]
+        print(f"[LED] show 전송 {total['flushes']}회 / 생략 {total['avoided']}회", flush=True)
+        st = latency_stats()
+        lat, sw = st["latency"], st["switch"]
+        print(f"[RX] CPU {st['cpu_pct']:.1f}% / 명령→픽셀 평균 {lat['mean_ms']:.1f}ms p95 {lat['p95_ms']:.1f}ms"
+              f" 최대 {lat['max_ms']:.1f}ms ({lat['n']}개) / 모드 전환 최대 {sw['max_ms']:.1f}ms", flush=True)
+        for name, q in st["queues"].items():
+            print(f"[Q:{name}] 최대 깊이 {q['max_depth']} / 합침 {q['coalesced']} / 버림 {q['dropped']}"
+                  f" / 중단 {q['preempted']} / 렌더 {q['rendered']} / lag 평균 {q['lag']['mean_ms']:.1f}ms"
+                  f" 최대 {q['lag']['max_ms']:.1f}ms", flush=True)
+        timing = rx.timing_stats()
+        if timing["fired"]:
+            # 라즈4가 시각을 지정한 명령(clock_sync)이 예정 시각보다 얼마나 늦게 실행됐는지
+            print(f"[UART] 예약 명령 {timing['fired']}개 실행, 지연 평균 {timing['late_mean_ms']:.1f}ms"
+                  f" / 최대 {timing['late_max_ms']:.1f}ms", flush=True)
     current_mode = None
-    mode_thread = None
+    workers = {}
+
+# ===== 디스패처 =====
+def dispatch(cmd):
+    """읽기 스레드가 디코드한 명령 1개 처리. 모드 전환은 워커가 그리는 중이어도 바로"""
+    if cmd.kind == "mode":
+        if cmd.mode != current_mode:   # 같은 모드 재전송(relief 사이클마다)은 무시
+            print(f"모드 전환 요청: {cmd.mode}", flush=True)
+            start_mode(cmd.mode)
+            if current_mode == cmd.mode and cmd.received:
+                _switches.append(time.monotonic() - (cmd.at if cmd.at is not None else cmd.received))
+        return
+    if cmd.kind == "pixels":
+        if current_mode != "stream":
+            # 라즈3만 재시작된 경우: 다음 키프레임부터 다시 표시
+            start_mode("stream")
+        name = _apply_stream(cmd)
+        if name:
+            workers[name].put(cmd, "latest", key="pixels")
+        return
+    if current_mode is None:
+        print(f"[MAIN] 모드 없이 받은 명령: {cmd}", flush=True)
+        return
+    if cmd.kind != "strip":
+        return
+    if cmd.strip == "*":
+        targets = list(strips)
+    elif cmd.strip in strips:
+        targets = [cmd.strip]
+    else:
+        print(f"[{current_mode.upper()}] 미지의 스트립: {cmd.strip}", flush=True)
+        return
+    _, policy = MODES[current_mode]
+    for name in targets:
+        workers[name].put(cmd, policy, key="strip")
+
+def serve():
+    """읽기 스레드 시작 후 명령이 올 때마다 dispatch (폴링 없음)"""
+    rx.start()
+    while True:
+        dispatch(rx.get(timeout=None))
 
 if __name__ == "__main__":
     try:
-        print("UART 명령 대기중... (love/focus/healing/relief)", flush=True)
-        while True:
-            # ★ 모드가 없을 때만 모드 전환 라인을 읽는다 (경쟁 방지)
-            if current_mode is None and ser.in_waiting > 0:
-                line = ser.readline().decode(errors='ignore').strip().lower()
-
-                # 'mode:healing' 같은 형태도 허용하려면:
-                prefix, sep, rest = line.partition(':')
-                if sep == ':':
-                    cmd = rest.strip()
-                else:
-                    cmd = line
-
-                if cmd in ["love", "focus", "healing", "relief", "energy"]:
-                    print(f"모드 전환 요청: {cmd}", flush=True)
-                    start_mode(cmd)
-                else:
-                    print(f"[MAIN] 알 수 없는 명령: {line}", flush=True)
-
-            time.sleep(0.1)
+        print("UART 명령 대기중... (love/focus/healing/relief/energy/stream)", flush=True)
+        serve()
     except KeyboardInterrupt:
         stop_mode()
-        ser.close()
+        rx.stop()
+        close_all()
         print("LED OFF, UART 종료", flush=True)
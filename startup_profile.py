@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# main.py --profile-startup 용 시작 시간 프로파일러
+#  - import마다 걸린 시간(처음 로드되는 모듈만, 하위 import 포함 누적)을 트리로 기록
+#  - neopixel.NeoPixel / serial.Serial 생성(장치 열기)마다 걸린 시간 기록
+#  - 실제 board/neopixel/serial 대신 스텁 모듈이 sys.modules에 있어도 그대로 동작
+import sys
+import time
+import builtins
+
+_DEVICE_CLASSES = {"neopixel": "NeoPixel", "serial": "Serial"}
+
+records = []      # (kind, name, seconds, depth)
+_depth = 0
+_installed = False
+_orig_import = builtins.__import__
+
+
+def _wrap_device(module) -> None:
+    attr = _DEVICE_CLASSES.get(module.__name__)
+    if not attr or getattr(module, "_startup_profiled", False):
+        return
+    orig = getattr(module, attr, None)
+    if orig is None:
+        return
+
+    if isinstance(orig, type):
+        class Timed(orig):
+            def __init__(self, *args, **kwargs):
+                t0 = time.perf_counter()
+                super().__init__(*args, **kwargs)
+                records.append(("device", f"{attr}({_describe(args)})", time.perf_counter() - t0, _depth))
+        Timed.__name__ = orig.__name__
+        setattr(module, attr, Timed)
+    else:
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            obj = orig(*args, **kwargs)
+            records.append(("device", f"{attr}({_describe(args)})", time.perf_counter() - t0, _depth))
+            return obj
+        setattr(module, attr, timed)
+    module._startup_profiled = True
+
+def _describe(args) -> str:
+    return ", ".join(str(a) for a in args[:2])
+
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    key = name if level == 0 else f"{'.' * level}{name}"
+    if level == 0 and name in sys.modules:
+        return _orig_import(name, globals, locals, fromlist, level)
+    idx = len(records)
+    records.append(("import", key, 0.0, _depth))
+    _depth += 1
+    t0 = time.perf_counter()
+    try:
+        module = _orig_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth -= 1
+    records[idx] = ("import", key, time.perf_counter() - t0, _depth)
+    for mod_name in _DEVICE_CLASSES:
+        if mod_name in sys.modules:
+            _wrap_device(sys.modules[mod_name])
+    return module
+
+def install() -> None:
+    """가능한 한 일찍(main.py 맨 위) 호출"""
+    global _installed
+    if _installed:
+        return
+    for mod_name in _DEVICE_CLASSES:
+        if mod_name in sys.modules:
+            _wrap_device(sys.modules[mod_name])
+    builtins.__import__ = _profiled_import
+    _installed = True
+
+def uninstall() -> None:
+    global _installed
+    builtins.__import__ = _orig_import
+    _installed = False
+
+def mark(name: str, seconds: float) -> None:
+    """import/장치 외의 구간(예: GPIO 설정) 기록"""
+    records.append(("step", name, seconds, 0))
+
+def report(min_ms: float = 1.0) -> str:
+    lines = ["kind    ms      name"]
+    total_import = sum(r[2] for r in records if r[0] == "import" and r[3] == 0)
+    total_device = sum(r[2] for r in records if r[0] == "device")
+    for kind, name, sec, depth in records:
+        ms = sec * 1000.0
+        if kind == "import" and ms < min_ms:
+            continue
+        lines.append(f"{kind:7s} {ms:7.1f} {'  ' * depth}{name}")
+    lines.append(f"total: imports {total_import * 1000:.1f}ms, device opens {total_device * 1000:.1f}ms")
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# STT 백엔드 공통 벤치마크
+#  - 고정된 한국어 WAV 클립 묶음으로 백엔드별 지연/실시간 계수(RTF)/문자 오류율(CER) 비교
+#  - 클립 옆에 같은 이름의 .txt(정답 문장)가 있으면 CER 계산
+#  예) python stt_bench.py --clips /home/capstone/clips --backends google,vosk
+import os
+import glob
+import time
+import wave
+import argparse
+import statistics
+
+from stt_engine import BACKENDS, create_backend
+
+
+def load_clip(path: str):
+    with wave.open(path, "rb") as w:
+        pcm = w.readframes(w.getnframes())
+        rate = w.getframerate()
+    ref = None
+    txt = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(txt):
+        with open(txt, encoding="utf-8") as f:
+            ref = f.read().strip()
+    return pcm, rate, ref
+
+def cer(ref: str, hyp: str) -> float:
+    """공백 제외 문자 단위 편집 거리 / 정답 길이"""
+    r = ref.replace(" ", "")
+    h = hyp.replace(" ", "")
+    if not r:
+        return 0.0 if not h else 1.0
+    prev = list(range(len(h) + 1))
+    for i, rc in enumerate(r, 1):
+        cur = [i] + [0] * len(h)
+        for j, hc in enumerate(h, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (rc != hc))
+        prev = cur
+    return prev[-1] / len(r)
+
+def run(backend, clips, warmup: bool = True):
+    rows = []
+    if warmup and clips:
+        pcm, rate, _ = load_clip(clips[0])
+        backend.recognize(pcm, rate)
+    for path in clips:
+        pcm, rate, ref = load_clip(path)
+        duration = len(pcm) / (rate * 2)
+        t0 = time.perf_counter()
+        transcripts = backend.recognize(pcm, rate)
+        latency = time.perf_counter() - t0
+        hyp = " ".join(transcripts)
+        rows.append({
+            "clip": os.path.basename(path),
+            "duration": duration,
+            "latency": latency,
+            "rtf": latency / duration if duration else 0.0,
+            "cer": cer(ref, hyp) if ref is not None else None,
+            "text": hyp,
+        })
+    return rows
+
+def summarize(name: str, rows) -> str:
+    lat = [r["latency"] * 1000 for r in rows]
+    rtf = [r["rtf"] for r in rows]
+    cers = [r["cer"] for r in rows if r["cer"] is not None]
+    line = (f"{name:14s} clips={len(rows)} latency mean={statistics.mean(lat):.0f}ms "
+            f"p50={statistics.median(lat):.0f}ms max={max(lat):.0f}ms "
+            f"RTF mean={statistics.mean(rtf):.2f} max={max(rtf):.2f}")
+    if cers:
+        line += f" CER={statistics.mean(cers):.1%}"
+    return line
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="STT 백엔드 지연/RTF 비교")
+    ap.add_argument("--clips", required=True, help="WAV 클립 폴더 (16kHz mono S16_LE)")
+    ap.add_argument("--backends", default="google,vosk", help=f"쉼표 구분 ({', '.join(BACKENDS)})")
+    ap.add_argument("--verbose", action="store_true", help="클립별 결과 출력")
+    args = ap.parse_args(argv)
+
+    clips = sorted(glob.glob(os.path.join(args.clips, "*.wav")))
+    if not clips:
+        print(f"WAV 클립 없음: {args.clips}")
+        return 1
+
+    for name in args.backends.split(","):
+        name = name.strip()
+        try:
+            t0 = time.perf_counter()
+            backend = create_backend(name, fallback="")
+            init_ms = (time.perf_counter() - t0) * 1000
+            rows = run(backend, clips)
+        except Exception as e:
+            print(f"{name:14s} 사용 불가: {e}")
+            continue
+        print(summarize(name, rows) + f" init={init_ms:.0f}ms")
+        if args.verbose:
+            for r in rows:
+                c = f"{r['cer']:.1%}" if r["cer"] is not None else "-"
+                print(f"   {r['clip']:24s} {r['duration']:.2f}s {r['latency'] * 1000:6.0f}ms "
+                      f"RTF={r['rtf']:.2f} CER={c} {r['text']}")
+        backend.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
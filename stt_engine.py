@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+# 음성 인식(STT) 공용 모듈
+#  - 메모리의 PCM(bytes/bytearray/memoryview)을 바로 인식 요청으로 넘김
+#  - SpeechClient는 프로세스당 1회만 생성
+#  - 업로드 전 무음 제거 + FLAC/OGG_OPUS 압축, 전송 바이트/시간 기록
+#  - 스트리밍 백엔드: 녹음 중인 프레임을 바로 인식기로 흘려서 녹음/인식을 겹침
+#  - 백엔드 선택: STT_BACKEND=google|vosk|local-stream, STT_FALLBACK=<백엔드> (실패 시 대체)
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import threading
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Iterable, Iterator, List, Optional
+
+from audio_preprocess import trim_silence, encode
+
+CREDENTIALS_PATH = "/home/capstone/project/capstone-458405-139f3ac27ecd.json"
+LANGUAGE_CODE = "ko-KR"
+SAMPLE_RATE = 16000
+UPLOAD_ENCODING = os.environ.get("STT_ENCODING", "FLAC")
+STT_BACKEND = os.environ.get("STT_BACKEND", "google")
+STT_FALLBACK = os.environ.get("STT_FALLBACK", "")
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", "/home/capstone/models/vosk-model-small-ko-0.22")
+
+_client = None
+
+
+@dataclass
+class UploadStats:
+    raw_bytes: int = 0        # 녹음 원본
+    trimmed_bytes: int = 0    # 무음 제거 후
+    sent_bytes: int = 0       # 실제 전송 페이로드
+    encoding: str = "LINEAR16"
+    encode_ms: float = 0.0
+    upload_ms: float = 0.0    # recognize 호출 왕복 시간
+
+    def __str__(self):
+        ratio = self.sent_bytes / self.raw_bytes if self.raw_bytes else 0.0
+        return (f"raw={self.raw_bytes}B trimmed={self.trimmed_bytes}B sent={self.sent_bytes}B "
+                f"({ratio:.0%}, {self.encoding}) encode={self.encode_ms:.0f}ms upload={self.upload_ms:.0f}ms")
+
+last_stats = UploadStats()
+
+
+class FakeSpeechClient:
+    """
+    네트워크 없이 recognize 호출을 받아 페이로드 크기만 기록하는 가짜 클라이언트.
+    transcripts로 돌려줄 문장을 지정할 수 있음.
+    google-cloud-speech 없이도 동작 (응답은 recognize_pcm이 읽는 속성만 가진 SimpleNamespace)
+    """
+    def __init__(self, transcripts=("테스트 문장",), latency: float = 0.0):
+        self.transcripts = list(transcripts)
+        self.latency = latency
+        self.payload_sizes = []
+        self.encodings = []
+
+    def recognize(self, config, audio):
+        self.payload_sizes.append(len(audio.content))
+        self.encodings.append(config.encoding)
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(results=[
+            SimpleNamespace(alternatives=[SimpleNamespace(transcript=t)]) for t in self.transcripts
+        ])
+
+def get_client():
+    """Google SpeechClient (지연 생성 + 재사용)"""
+    global _client
+    if _client is None:
+        os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", CREDENTIALS_PATH)
+        from google.cloud import speech
+        _client = speech.SpeechClient()
+    return _client
+
+def recognize_pcm(pcm, sample_rate: int = SAMPLE_RATE, client=None,
+                  encoding: str = UPLOAD_ENCODING, trim: bool = True) -> List[str]:
+    """
+    S16_LE PCM을 인식해 결과 문장 리스트를 반환.
+    pcm은 파일을 거치지 않은 버퍼(memoryview 등)를 그대로 받는다.
+    trim=True면 앞뒤 무음을 잘라내고, encoding(FLAC/OGG_OPUS)으로 압축해 전송.
+    """
+    global last_stats
+    try:
+        from google.cloud import speech
+    except ImportError:
+        if client is None:
+            raise
+        speech = None   # 가짜 클라이언트: 요청도 같은 속성의 SimpleNamespace로
+    client = client or get_client()
+    stats = UploadStats(raw_bytes=len(pcm))
+
+    t0 = time.perf_counter()
+    body = trim_silence(pcm, sample_rate) if trim else pcm
+    stats.trimmed_bytes = len(body)
+    # protobuf bytes 필드는 bytes만 받으므로 인코딩 단계에서 한 번만 변환
+    content, used = encode(body, encoding, sample_rate)
+    stats.encode_ms = (time.perf_counter() - t0) * 1000.0
+    stats.sent_bytes = len(content)
+    stats.encoding = used
+
+    if speech is None:
+        audio = SimpleNamespace(content=content)
+        config = SimpleNamespace(encoding=used, sample_rate_hertz=sample_rate, language_code=LANGUAGE_CODE)
+    else:
+        audio = speech.RecognitionAudio(content=content)
+        config = speech.RecognitionConfig(
+            encoding=getattr(speech.RecognitionConfig.AudioEncoding, used),
+            sample_rate_hertz=sample_rate,
+            language_code=LANGUAGE_CODE
+        )
+    t0 = time.perf_counter()
+    response = client.recognize(config=config, audio=audio)
+    stats.upload_ms = (time.perf_counter() - t0) * 1000.0
+    last_stats = stats
+    print(f"[stt] {stats}")
+    return [result.alternatives[0].transcript for result in response.results]
+
+def recognize_file(wav_path: str, client=None, **kwargs) -> List[str]:
+    """녹음 파일(WAV)을 읽어서 인식 (헤더는 건너뛰고 PCM만 전달)"""
+    import wave
+    with wave.open(wav_path, "rb") as w:
+        content = w.readframes(w.getnframes())
+        rate = w.getframerate()
+    return recognize_pcm(content, rate, client=client, **kwargs)
+
+def last_transcript(transcripts: List[str]) -> Optional[str]:
+    for t in reversed(transcripts):
+        if t and t.strip():
+            return t.strip()
+    return None
+
+
+# ===== 스트리밍 백엔드 =====
+class SttBackend:
+    """
+    STT 백엔드 공통 인터페이스.
+    - recognize(pcm): 녹음이 끝난 PCM 전체를 한 번에 인식
+    - streaming_recognize(chunks): 녹음 중 들어오는 청크를 받아 인식, 최종 문장 반환
+    """
+    name = "base"
+
+    def recognize(self, pcm, sample_rate: int = SAMPLE_RATE) -> List[str]:
+        raise NotImplementedError
+
+    def streaming_recognize(self, chunks: Iterable[bytes], sample_rate: int = SAMPLE_RATE) -> List[str]:
+        # 스트리밍을 지원하지 않으면 모아서 한 번에 인식
+        buf = bytearray()
+        for chunk in chunks:
+            buf += chunk
+        return self.recognize(buf, sample_rate)
+
+    def close(self) -> None:
+        pass
+
+
+class GoogleBackend(SttBackend):
+    name = "google"
+
+    def __init__(self, client=None, encoding: str = UPLOAD_ENCODING):
+        self.client = client
+        self.encoding = encoding
+
+    def recognize(self, pcm, sample_rate: int = SAMPLE_RATE) -> List[str]:
+        return recognize_pcm(pcm, sample_rate, client=self.client, encoding=self.encoding)
+
+    def streaming_recognize(self, chunks: Iterable[bytes], sample_rate: int = SAMPLE_RATE) -> List[str]:
+        from google.cloud import speech
+        client = self.client or get_client()
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=sample_rate,
+                language_code=LANGUAGE_CODE
+            ),
+            single_utterance=True
+        )
+        requests = (speech.StreamingRecognizeRequest(audio_content=bytes(c)) for c in chunks)
+        transcripts = []
+        for response in client.streaming_recognize(config=streaming_config, requests=requests):
+            for result in response.results:
+                if result.is_final:
+                    transcripts.append(result.alternatives[0].transcript)
+        return transcripts
+
+
+class LocalStreamServer:
+    """
+    streaming_recognize를 흉내내는 로컬 대역 서버 (테스트/지연 벤치용).
+    - 청크마다 오디오 길이 × rtf 만큼 처리 시간을 소모 (도착하는 대로 처리)
+    - 스트림 종료 후 finalize_ms 뒤에 고정 문장을 돌려줌
+    프로토콜: [4바이트 길이][PCM] 반복, 길이 0 = 종료 → JSON 한 줄 응답
+    """
+    def __init__(self, socket_path: str = "/tmp/stt_stream.sock", transcript: str = "테스트 문장",
+                 rtf: float = 0.3, finalize_ms: float = 50.0, sample_rate: int = SAMPLE_RATE):
+        self.socket_path = socket_path
+        self.transcript = transcript
+        self.rtf = rtf
+        self.finalize_ms = finalize_ms
+        self.sample_rate = sample_rate
+        self.stop_evt = threading.Event()
+        self.sock = None
+        self.thread = None
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(4)
+        self.sock.settimeout(0.5)
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_evt.set()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+        try:
+            self.sock.close()
+            os.unlink(self.socket_path)
+        except Exception:
+            pass
+
+    def _serve(self):
+        while not self.stop_evt.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            f = conn.makefile("rwb")
+            total = 0
+            while True:
+                head = f.read(4)
+                if len(head) < 4:
+                    return
+                (n,) = struct.unpack(">I", head)
+                if n == 0:
+                    break
+                chunk = f.read(n)
+                total += len(chunk)
+                time.sleep(len(chunk) / (self.sample_rate * 2) * self.rtf)
+            time.sleep(self.finalize_ms / 1000.0)
+            reply = {"transcripts": [self.transcript] if total else []}
+            f.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+
+
+class LocalStreamBackend(SttBackend):
+    """LocalStreamServer에 붙는 백엔드"""
+    name = "local-stream"
+
+    def __init__(self, socket_path: str = "/tmp/stt_stream.sock"):
+        self.socket_path = socket_path
+
+    def recognize(self, pcm, sample_rate: int = SAMPLE_RATE) -> List[str]:
+        return self.streaming_recognize([pcm], sample_rate)
+
+    def streaming_recognize(self, chunks: Iterable[bytes], sample_rate: int = SAMPLE_RATE) -> List[str]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(self.socket_path)
+            f = s.makefile("rwb")
+            for chunk in chunks:
+                f.write(struct.pack(">I", len(chunk)))
+                f.write(chunk)
+                f.flush()
+            f.write(struct.pack(">I", 0))
+            f.flush()
+            line = f.readline()
+        return json.loads(line.decode("utf-8")).get("transcripts", [])
+
+
+class VoskBackend(SttBackend):
+    """
+    온디바이스(오프라인) 인식: Vosk + 한국어 소형 모델.
+    네트워크 없이 동작하고, AcceptWaveform으로 청크가 들어오는 대로 디코딩.
+    """
+    name = "vosk"
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def _recognizer(self, sample_rate: int):
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self.model, sample_rate)
+
+    def recognize(self, pcm, sample_rate: int = SAMPLE_RATE) -> List[str]:
+        return self.streaming_recognize([bytes(pcm)], sample_rate)
+
+    def streaming_recognize(self, chunks: Iterable[bytes], sample_rate: int = SAMPLE_RATE) -> List[str]:
+        rec = self._recognizer(sample_rate)
+        transcripts = []
+        for chunk in chunks:
+            if rec.AcceptWaveform(bytes(chunk)):
+                text = json.loads(rec.Result()).get("text", "")
+                if text:
+                    transcripts.append(text)
+        text = json.loads(rec.FinalResult()).get("text", "")
+        if text:
+            transcripts.append(text)
+        # Google과 같은 형태로: 한 발화 = 한 문장
+        return [" ".join(transcripts)] if transcripts else []
+
+
+class FallbackBackend(SttBackend):
+    """주 백엔드(예: google)가 예외를 내면 대체 백엔드(예: vosk)로 다시 인식"""
+    def __init__(self, primary: SttBackend, secondary: SttBackend):
+        self.primary = primary
+        self.secondary = secondary
+        self.name = f"{primary.name}+{secondary.name}"
+
+    def recognize(self, pcm, sample_rate: int = SAMPLE_RATE) -> List[str]:
+        try:
+            return self.primary.recognize(pcm, sample_rate)
+        except Exception as e:
+            print(f"[stt] {self.primary.name} failed ({e}) → {self.secondary.name}")
+            return self.secondary.recognize(pcm, sample_rate)
+
+    def streaming_recognize(self, chunks: Iterable[bytes], sample_rate: int = SAMPLE_RATE) -> List[str]:
+        # 실패 시 다시 보낼 수 있도록 받은 청크를 보관
+        seen = []
+        def tee():
+            for chunk in chunks:
+                seen.append(chunk)
+                yield chunk
+        try:
+            return self.primary.streaming_recognize(tee(), sample_rate)
+        except Exception as e:
+            print(f"[stt] {self.primary.name} failed ({e}) → {self.secondary.name}")
+            rest = list(chunks)
+            return self.secondary.recognize(b"".join(seen + rest), sample_rate)
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "vosk": VoskBackend,
+    "local-stream": LocalStreamBackend,
+}
+
+def create_backend(name: str = STT_BACKEND, fallback: str = STT_FALLBACK) -> SttBackend:
+    """설정 이름으로 백엔드 생성 (fallback 지정 시 FallbackBackend로 감쌈)"""
+    if name not in BACKENDS:
+        raise ValueError(f"unknown STT backend: {name} (choices: {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]()
+    if fallback and fallback != name:
+        backend = FallbackBackend(backend, BACKENDS[fallback]())
+    return backend
+
+
+# ===== 녹음과 인식 겹치기 =====
+_END = object()
+
+def _drain(q: "queue.Queue", chunk_bytes: int) -> Iterator[bytes]:
+    """큐의 프레임을 chunk_bytes 단위로 묶어서 내보냄 (너무 잘게 보내지 않도록)"""
+    buf = bytearray()
+    while True:
+        frame = q.get()
+        if frame is _END:
+            break
+        buf += frame
+        if len(buf) >= chunk_bytes:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+class StreamingSession:
+    """
+    녹음 프레임을 받는 즉시 백엔드 스트리밍 인식으로 넘기는 세션.
+      session = StreamingSession(backend).start()
+      capture_until_endpoint(frames, on_frame=session.feed)
+      transcripts = session.finish()
+    """
+    def __init__(self, backend: SttBackend, sample_rate: int = SAMPLE_RATE, chunk_ms: int = 100):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.chunk_bytes = sample_rate * 2 * chunk_ms // 1000
+        self.q = queue.Queue()
+        self.result = []
+        self.error = None
+        self.finished_at = 0.0
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def feed(self, frame) -> None:
+        self.q.put(bytes(frame))
+
+    def finish(self, timeout: Optional[float] = None) -> List[str]:
+        self.q.put(_END)
+        self.thread.join(timeout)
+        if self.error:
+            raise self.error
+        return self.result
+
+    def _run(self):
+        try:
+            self.result = self.backend.streaming_recognize(_drain(self.q, self.chunk_bytes), self.sample_rate)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.monotonic()
+
+
+def benchmark_streaming(wav_path: str, backend: Optional[SttBackend] = None, rounds: int = 3) -> dict:
+    """
+    같은 WAV(실시간 속도 재생)로 직렬(녹음 후 인식) vs 스트리밍(녹음 중 인식) 비교.
+    지표: 녹음 종료(끝점) → 최종 문장 준비까지 걸린 시간
+    backend를 안 주면 LocalStreamServer 대역을 띄워서 사용.
+    """
+    from audio_capture import EndpointConfig, capture_until_endpoint, wav_frames
+
+    server = None
+    if backend is None:
+        server = LocalStreamServer(f"/tmp/stt_bench_{os.getpid()}.sock").start()
+        backend = LocalStreamBackend(server.socket_path)
+    cfg = EndpointConfig()
+    serial, streaming = [], []
+    try:
+        for _ in range(rounds):
+            pcm, m = capture_until_endpoint(wav_frames(wav_path, cfg.frame_ms, realtime=True), cfg)
+            backend.recognize(pcm)
+            serial.append(time.monotonic() - m.ended_at)
+
+            session = StreamingSession(backend).start()
+            _, m = capture_until_endpoint(wav_frames(wav_path, cfg.frame_ms, realtime=True), cfg,
+                                          on_frame=session.feed)
+            session.finish()
+            streaming.append(session.finished_at - m.ended_at)
+    finally:
+        if server:
+            server.stop()
+    return {
+        "backend": backend.name,
+        "rounds": rounds,
+        "serial_ms": sum(serial) / len(serial) * 1000.0,
+        "streaming_ms": sum(streaming) / len(streaming) * 1000.0,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("usage: python stt_engine.py <wav> (로컬 대역 서버로 직렬 vs 스트리밍 지연 비교)")
+        sys.exit(1)
+    r = benchmark_streaming(sys.argv[1])
+    print(f"[{r['backend']}] endpoint→transcript serial {r['serial_ms']:.0f}ms / "
+          f"streaming {r['streaming_ms']:.0f}ms ({r['rounds']} rounds)")
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# audio_capture 끝점 검출 테스트 (합성 PCM, 마이크 불필요)
+import math
+import array
+
+from audio_capture import (SAMPLE_RATE, EndpointConfig, EnergyEndpointer, PcmRingBuffer,
+                           capture_until_endpoint, frame_bytes)
+
+FRAME_SAMPLES = frame_bytes() // 2
+
+
+def tone(seconds: float, amplitude: float, freq: float = 440.0):
+    """amplitude 사인파(0이면 무음)를 30ms 프레임 목록으로"""
+    frames = []
+    n = 0
+    for _ in range(int(seconds * SAMPLE_RATE) // FRAME_SAMPLES):
+        samples = array.array("h", (int(amplitude * math.sin(2 * math.pi * freq * (n + i) / SAMPLE_RATE))
+                                    for i in range(FRAME_SAMPLES)))
+        n += FRAME_SAMPLES
+        frames.append(samples.tobytes())
+    return frames
+
+
+def test_speech_after_silence_hits_endpoint():
+    frames = tone(0.5, 50) + tone(1.0, 5000) + tone(1.5, 50)
+    _, m = capture_until_endpoint(frames)
+    assert m.reason == "endpoint"
+    assert abs(m.speech_start - 0.5) < 0.1
+    assert abs(m.speech_end - 1.5) < 0.1
+
+
+def test_speech_from_first_frame_is_detected():
+    # 시작하자마자 말해도 음성이 잡음 바닥으로 잡히면 안 됨
+    frames = tone(1.0, 5000) + tone(1.5, 50)
+    _, m = capture_until_endpoint(frames)
+    assert m.reason == "endpoint"
+    assert m.speech_start == 0.0
+    assert m.threshold < 1000
+
+
+def test_noise_floor_raises_threshold():
+    ep = EnergyEndpointer(EndpointConfig())
+    for frame in tone(0.3, 400):
+        ep.update(frame)
+    assert ep.start_frame is None
+    assert ep.threshold > EndpointConfig().min_rms
+
+
+def test_no_speech_timeout():
+    cfg = EndpointConfig(no_speech_timeout=1.0)
+    _, m = capture_until_endpoint(tone(2.0, 50), cfg)
+    assert m.reason == "no_speech"
+    assert m.speech_start is None
+
+
+def test_ring_buffer_keeps_latest_bytes():
+    buf = PcmRingBuffer(seconds=0.001)   # 16샘플 = 32바이트
+    for i in range(5):
+        buf.write(bytes([i]) * 10)
+    assert len(buf) == buf.capacity
+    assert bytes(buf.view()) == bytes([1]) * 2 + bytes([2]) * 10 + bytes([3]) * 10 + bytes([4]) * 10
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# clock_sync offset/drift 추정 테스트
+#  - 시뮬레이션 링크(가짜 시계, 결정적): offset/drift/비대칭/유실
+#  - pty 두 프로세스 harness: 실제 Receiver 스레드 + 지연 링크에서 시각 지정 명령 오차
+import argparse
+import time
+
+import pytest
+
+import uart_proto
+from clock_sync import MIN_DRIFT_SPAN, ClockSync, harness
+
+
+class SimLink:
+    """
+    라즈3 역할을 하는 가짜 UART. PING을 받으면 지연 up/down 뒤의 PONG을 rx 버퍼에 넣고 로컬 시계를 그만큼 진행.
+    라즈3 시계 = local × (1 + drift) + offset
+    """
+    def __init__(self, offset=1234.5, drift_ppm=0.0, up=0.004, down=0.004, answer=True):
+        self.now = 100.0
+        self.offset = offset
+        self.drift = drift_ppm * 1e-6
+        self.up = up
+        self.down = down
+        self.answer = answer
+        self.buf = bytearray()
+        self.dec = uart_proto.Decoder()
+        self.enc = uart_proto.Encoder()
+
+    def clock(self) -> float:
+        return self.now
+
+    def remote(self, t: float) -> float:
+        return t * (1 + self.drift) + self.offset
+
+    def write(self, data: bytes) -> int:
+        for ftype, payload in self.dec.feed(data):
+            for c in uart_proto.decode_commands(payload):
+                if c.kind == "ping" and self.answer:
+                    t2 = self.remote(self.now + self.up)
+                    self.now += self.up + self.down
+                    self.buf += self.enc.commands([uart_proto.pong(c.stamps[0], t2, t2)])
+        return len(data)
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.buf)
+
+    def read(self, n: int = 1) -> bytes:
+        data = bytes(self.buf[:n])
+        del self.buf[:n]
+        return data
+
+
+def make_sync(link: SimLink, **kwargs) -> ClockSync:
+    rx = uart_proto.Receiver(link, clock=link.clock)
+    return ClockSync(link, rx=rx, clock=link.clock, wire_s_per_byte=0.0, **kwargs)
+
+
+def test_offset_symmetric_delay():
+    link = SimLink(offset=1234.5)
+    sync = make_sync(link)
+    assert sync.sync()
+    assert sync.offset_at(link.now) == pytest.approx(1234.5, abs=1e-6)
+    assert sync.to_local(sync.to_remote(link.now)) == pytest.approx(link.now, abs=1e-6)
+    assert sync.stats()["rtt_ms"] == pytest.approx(8.0, abs=1e-6)
+
+
+def test_asymmetric_delay_biases_half_the_difference():
+    link = SimLink(offset=10.0, up=0.010, down=0.002)
+    sync = make_sync(link)
+    assert sync.sync()
+    # NTP 방식은 비대칭을 구분 못함 → (up - down)/2 만큼 치우침
+    assert sync.offset_at(link.now) - 10.0 == pytest.approx(0.004, abs=1e-6)
+
+
+def test_drift_estimated_after_min_span():
+    link = SimLink(offset=-50.0, drift_ppm=80.0)
+    sync = make_sync(link)
+    t_first = link.now
+    while link.now - t_first < MIN_DRIFT_SPAN + 4:
+        assert sync.sync()
+        link.now += 2.0
+    assert sync.stats()["drift_ppm"] == pytest.approx(80.0, abs=0.5)
+    true = link.now * 80e-6 - 50.0
+    assert sync.offset_at(link.now) == pytest.approx(true, abs=1e-5)
+
+
+def test_drift_not_applied_over_short_span():
+    link = SimLink(drift_ppm=80.0)
+    sync = make_sync(link)
+    for _ in range(3):
+        sync.sync()
+        link.now += 1.0
+    assert sync.drift == 0.0
+
+
+def test_lost_pongs():
+    link = SimLink(answer=False)
+    sync = make_sync(link, timeout=0.01)
+    assert not sync.sync(count=3)
+    assert sync.lost == 3
+    assert not sync.synced
+    assert not sync.refresh()
+
+
+def test_refresh_async_does_not_block():
+    link = SimLink(answer=False)
+    sync = make_sync(link, timeout=0.1)
+    t0 = time.monotonic()
+    sync.refresh_async()
+    sync.refresh_async()   # 이미 도는 중 → 무시
+    assert time.monotonic() - t0 < 0.05
+    sync._bg.join(5.0)
+    assert sync.lost == 6   # 버스트 1번만
+
+
+def test_pty_two_process_harness():
+    pytest.importorskip("pty")
+    args = argparse.Namespace(delay_ms=5.0, jitter_ms=2.0, asym_ms=0.0, offset=1234.5,
+                              drift_ppm=80.0, seconds=2.0, interval=1.0)
+    r = harness(args)
+    assert r["sync"]["lost"] == 0
+    assert abs(r["offset_error_ms"]) < 3.0
+    timed = r["errors"]["C"]
+    assert timed and max(abs(e) for e in timed) < 5.0
+    # 시각 지정 명령이 즉시 명령(한 방향 지연만큼 늦음)보다 정확해야 함
+    untimed = r["errors"]["D"]
+    assert sum(map(abs, timed)) / len(timed) < sum(untimed) / len(untimed)
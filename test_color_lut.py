@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# color_lut 감마/밝기 테이블 — 낮은 단계 구분, 픽셀 경로와 프레임(translate) 경로 일치
+import pytest
+
+from color_lut import (DIM_LUT, GAMMA_LUT, LEVEL_LUT, dim, fade_steps, gamma, scale_color, scale_fraction,
+                       scale_frame, scale_pixel)
+
+WHITE = (255, 255, 255)
+COLORS = [WHITE, (255, 180, 40), (255, 0, 0), (3, 70, 129)]
+
+
+def test_low_levels_on_white_are_distinct():
+    low = [scale_color(WHITE, lv)[0] for lv in range(0, 11)]
+    assert low[0] == 0
+    assert all(a < b for a, b in zip(low, low[1:]))
+
+
+def test_level_table_monotonic():
+    for v in range(256):
+        column = [LEVEL_LUT[lv][v] for lv in range(101)]
+        assert column == sorted(column)
+    assert all(LEVEL_LUT[lv][0] == 0 for lv in range(101))
+    assert LEVEL_LUT[100][255] == 255
+
+
+def test_full_level_is_plain_gamma():
+    assert LEVEL_LUT[100] == GAMMA_LUT
+    assert scale_color((255, 180, 40), 100) == gamma((255, 180, 40))
+    assert DIM_LUT[100] == bytes(range(256))
+
+
+@pytest.mark.parametrize("color", COLORS)
+def test_pixel_paths_match_translate(color):
+    for lv in (0, 1, 5, 37, 100):
+        assert scale_pixel(color, lv) == scale_color(color, lv)
+        assert scale_frame(bytes(color) * 4, lv) == bytes(scale_color(color, lv)) * 4
+
+
+@pytest.mark.parametrize("color", COLORS)
+def test_fade_steps_matches_scale_fraction(color):
+    for top, steps in ((1.0, 10), (0.5, 10), (3 / 7, 4)):
+        expected = tuple(scale_fraction(color, top * (i + 1) / steps) for i in range(steps))
+        assert fade_steps(color, top, steps) == expected
+
+
+def test_level_clamped():
+    assert scale_color(WHITE, 150) == scale_color(WHITE, 100)
+    assert scale_pixel(WHITE, -3) == (0, 0, 0)
+    assert dim(WHITE, 2.0) == WHITE
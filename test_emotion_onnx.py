@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# torch ↔ ONNX(fp32/int8) 분류기 일치 검사 — 랜덤 초기화 소형 ELECTRA로 (실제 가중치 불필요)
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from emotion_onnx import OnnxEmotionClassifier, export_onnx, parity_check   # noqa: E402
+from emotion_service import SAMPLE_TEXTS, EmotionClassifier, make_tiny_model   # noqa: E402
+
+TEXTS = SAMPLE_TEXTS + ["짧다", "조금 더 긴 문장으로 패딩 길이가 달라지게 해 봅니다"]
+
+
+def probs(clf, texts):
+    batch = clf.tokenizer(list(texts), padding=True, truncation=True, max_length=128,
+                          return_tensors=clf._tensor_type)
+    return clf._probs(batch)
+
+
+def max_diff(a, b):
+    return max(abs(x - y) for ra, rb in zip(a, b) for x, y in zip(ra, rb))
+
+
+@pytest.fixture(scope="module")
+def tiny(tmp_path_factory):
+    model = make_tiny_model(str(tmp_path_factory.mktemp("tiny")))
+    fp32_dir = str(tmp_path_factory.mktemp("fp32"))
+    int8_dir = str(tmp_path_factory.mktemp("int8"))
+    export_onnx(model, fp32_dir, quantize=False)
+    export_onnx(model, int8_dir, quantize=True)
+    return EmotionClassifier(model), OnnxEmotionClassifier(fp32_dir), OnnxEmotionClassifier(int8_dir)
+
+
+def test_fp32_matches_torch(tiny):
+    torch_clf, fp32, _ = tiny
+    assert max_diff(probs(torch_clf, TEXTS), probs(fp32, TEXTS)) < 1e-4
+    assert parity_check(torch_clf, fp32, TEXTS)["agreement"] == 1.0
+
+
+def test_int8_within_tolerance(tiny):
+    torch_clf, _, int8 = tiny
+    # 랜덤 모델은 확률이 서로 비슷해 라벨이 뒤집힐 수 있으므로 확률 벡터로 비교
+    assert max_diff(probs(torch_clf, TEXTS), probs(int8, TEXTS)) < 0.05
+
+
+@pytest.mark.parametrize("which", [0, 1])
+def test_batch_matches_single(tiny, which):
+    # 길이 버킷 + 동적 패딩이 문장별 결과를 바꾸면 안 됨
+    clf = tiny[which]
+    batch = clf.predict_batch(TEXTS, batch_size=3)
+    for text, (label, prob) in zip(TEXTS, batch):
+        l1, p1 = clf.predict_emotion(text)
+        assert label == l1
+        assert prob == pytest.approx(p1, abs=1e-4)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# 상주 감정 서비스 클라이언트 테스트 — 가짜 분류기 서버 프로세스로 (torch 불필요)
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import emotion_service
+from emotion_service import CachedClassifier, classify_or_wait, daemon_alive, normalize_text
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 모델 로드에 delay초 걸리는 상주 서비스 흉내
+_FAKE_DAEMON = """
+import sys, time
+import emotion_service
+class Fake:
+    load_time = 0.0
+    def predict_emotion(self, text):
+        return 2, 0.75
+    def predict_batch(self, texts):
+        return [self.predict_emotion(t) for t in texts]
+emotion_service._write_pid(sys.argv[1], __import__("os").getpid())
+time.sleep(float(sys.argv[2]))
+if float(sys.argv[3]):
+    raise SystemExit(1)
+emotion_service.EmotionServer(Fake(), sys.argv[1]).serve_forever()
+"""
+
+
+def spawn(sock, delay, fail=False):
+    return subprocess.Popen([sys.executable, "-c", _FAKE_DAEMON, sock, str(delay), "1" if fail else "0"],
+                            cwd=HERE, env=dict(os.environ, PYTHONPATH=HERE))
+
+
+@pytest.fixture
+def sock(tmp_path):
+    return str(tmp_path / "emotion.sock")
+
+
+def test_no_daemon_returns_none_immediately(sock):
+    t0 = time.monotonic()
+    assert classify_or_wait("안녕", sock) is None
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_waits_for_warming_daemon(sock):
+    proc = spawn(sock, delay=1.0)
+    try:
+        time.sleep(0.3)
+        assert daemon_alive(sock)
+        t0 = time.monotonic()
+        assert classify_or_wait("안녕", sock, ready_timeout=10.0) == (2, 0.75)
+        assert time.monotonic() - t0 > 0.3
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_gives_up_when_daemon_dies_while_loading(sock):
+    proc = spawn(sock, delay=0.5, fail=True)
+    try:
+        time.sleep(0.2)
+        t0 = time.monotonic()
+        assert classify_or_wait("안녕", sock, ready_timeout=10.0) is None
+        assert time.monotonic() - t0 < 5.0
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_stale_pid_file_is_not_alive(sock):
+    # pid 파일의 번호를 상주 서비스가 아닌 다른 프로세스가 쓰고 있는 경우
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    try:
+        emotion_service._write_pid(sock, other.pid)
+        assert not daemon_alive(sock)
+    finally:
+        other.kill()
+        other.wait()
+    # 죽었지만 아직 거두지 않은 상주 서비스(좀비)
+    proc = spawn(sock, delay=0.0, fail=True)
+    deadline = time.monotonic() + 5.0
+    while daemon_alive(sock) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not daemon_alive(sock)
+    proc.wait()
+    assert not daemon_alive(sock)
+
+
+def test_cached_classifier_normalizes_text():
+    class Counting:
+        load_time = 0.0
+        calls = 0
+
+        def predict_emotion(self, text):
+            self.calls += 1
+            return 0, 0.9
+
+    inner = Counting()
+    clf = CachedClassifier(inner)
+    assert normalize_text("  오늘   기분이\t좋아 ") == "오늘 기분이 좋아"
+    clf.predict_emotion("오늘 기분이 좋아")
+    clf.predict_emotion(" 오늘  기분이 좋아 ")
+    assert inner.calls == 1
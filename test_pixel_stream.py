@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# pixel_stream delta 인코딩 / 라즈3 복원 / 모드 재진입 테스트
+import pytest
+
+import uart_proto
+from pixel_stream import (DEPTH_332, DEPTH_565, DEPTH_888, REMOTE_COUNTS, PixelStreamer, apply_pixels,
+                          dequantize, encode_pixels, quantize)
+
+
+class Sink:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, b: bytes) -> int:
+        self.data += b
+        return len(b)
+
+
+class Pi3:
+    """rpi3_motion 스트림 경로 흉내: mode stream이면 상태를 지우고, PIXELS는 apply_pixels로"""
+    def __init__(self):
+        self.rx = uart_proto.Receiver(None)
+        self.states = {}
+        self.skipped = 0
+
+    def feed(self, data: bytes) -> None:
+        self.rx._ingest(bytes(data))
+        while self.rx.pending:
+            cmd = self.rx.pending.popleft()
+            if cmd.kind == "mode" and cmd.mode == "stream":
+                self.states.clear()
+            elif cmd.kind == "pixels":
+                _, state = apply_pixels(cmd.data, self.states, REMOTE_COUNTS)
+                self.skipped += state is None
+
+
+def frame(n: int, f: int) -> bytes:
+    out = bytearray(n * 3)
+    out[(f % n) * 3:(f % n) * 3 + 3] = bytes((255, f % 256, 7))
+    return bytes(out)
+
+
+@pytest.mark.parametrize("depth", [DEPTH_888, DEPTH_565, DEPTH_332])
+def test_delta_roundtrip_matches_sender_state(depth):
+    states, prev = {}, None
+    for f in range(20):
+        rgb = frame(16, f)
+        payload, prev = encode_pixels("C", prev, rgb, depth)
+        if payload is not None:
+            apply_pixels(payload, states, REMOTE_COUNTS)
+        assert bytes(states["C"]) == prev
+    assert prev == quantize(frame(16, 19), depth)[1]
+
+
+def test_quantize_dequantize_consistent():
+    rgb = bytes(range(0, 240, 5))
+    for depth in (DEPTH_565, DEPTH_332):
+        wire, shown = quantize(rgb, depth)
+        assert dequantize(wire, depth) == shown
+
+
+def test_unchanged_frame_sends_nothing():
+    payload, state = encode_pixels("D", None, frame(24, 0), DEPTH_888)
+    assert payload is not None
+    assert encode_pixels("D", state, frame(24, 0), DEPTH_888) == (None, state)
+
+
+def test_delta_before_keyframe_is_ignored():
+    _, first = encode_pixels("C", None, frame(16, 0), DEPTH_888)
+    delta, _ = encode_pixels("C", first, frame(16, 1), DEPTH_888)
+    states = {}
+    assert apply_pixels(delta, states, REMOTE_COUNTS) == ("C", None)
+    assert "C" not in states
+
+
+def test_mode_change_restarts_stream_with_keyframe():
+    now = [0.0]
+    sink, pi3 = Sink(), Pi3()
+    enc = uart_proto.Encoder()
+    st = PixelStreamer(sink, rate=1e6, clock=lambda: now[0], encoder=enc)
+    for f in range(5):
+        now[0] = f * 0.02
+        st.push("C", frame(16, f))
+    pi3.feed(sink.data)
+    sink.data.clear()
+    assert bytes(pi3.states["C"]) == frame(16, 4)
+
+    # 다른 효과가 모드를 바꿨다가 스트리밍으로 돌아옴 (키프레임 주기 2초 안)
+    sink.write(enc.commands([uart_proto.mode("focus")]))
+    now[0] = 0.2
+    st.push("C", frame(16, 5))
+    pi3.feed(sink.data)
+    assert st.keyframes == 2
+    assert pi3.skipped == 0
+    assert bytes(pi3.states["C"]) == frame(16, 5)
+
+
+def test_streamer_tracks_pi3_state_under_budget():
+    now = [0.0]
+    sink, pi3 = Sink(), Pi3()
+    st = PixelStreamer(sink, clock=lambda: now[0])
+    for f in range(200):
+        now[0] = f / 100.0
+        for name, n in REMOTE_COUNTS.items():
+            st.push(name, bytes((f * 7 + i) % 256 for i in range(n * 3)))
+    pi3.feed(sink.data)
+    assert all(bytes(pi3.states[n]) == st.sent[n] for n in REMOTE_COUNTS)
+    assert st.stats()["bytes"] <= st.burst + st.rate * 2.0
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# 스텁 board/neopixel/serial로 지연 로드 + startup_profile 항목별 기록 검사 (라즈베리파이 불필요)
+import sys
+import time
+import types
+
+import pytest
+
+import startup_profile
+
+EFFECT_MODULES = ("healing_motion", "relief_motion", "energy_motion", "focus_motion", "love_motion")
+
+
+class StubPixels(list):
+    def __init__(self, pin, count, brightness=1.0, auto_write=False):
+        super().__init__([(0, 0, 0)] * count)
+        self.pin = pin
+        self.shows = 0
+
+    def fill(self, color):
+        self[:] = [color] * len(self)
+
+    def show(self):
+        self.shows += 1
+
+
+class StubSerial:
+    def __init__(self, port, baud, timeout=0.1):
+        self.port = port
+        self.timeout = timeout
+        self.written = bytearray()
+
+    in_waiting = 0
+
+    def read(self, n=1):
+        time.sleep(self.timeout)
+        return b""
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stub_hardware(monkeypatch):
+    board = types.ModuleType("board")
+    for pin in ("D12", "D13", "D18", "D19"):
+        setattr(board, pin, pin)
+    neopixel = types.ModuleType("neopixel")
+    neopixel.NeoPixel = StubPixels
+    serial = types.ModuleType("serial")
+    serial.Serial = StubSerial
+    for mod in (board, neopixel, serial):
+        monkeypatch.setitem(sys.modules, mod.__name__, mod)
+    monkeypatch.delenv("LED_BACKEND", raising=False)
+    for name in EFFECT_MODULES:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    import hw_registry
+    hw_registry.close_all()
+    monkeypatch.setattr(startup_profile, "records", [])
+    yield
+    startup_profile.uninstall()
+    hw_registry.close_all()
+    for name in EFFECT_MODULES:
+        sys.modules.pop(name, None)
+
+
+def test_registry_import_opens_no_devices(stub_hardware):
+    startup_profile.install()
+    import play_neopixel
+    assert not [r for r in startup_profile.records if r[0] == "device"]
+    assert not any(name in sys.modules for name in EFFECT_MODULES)
+    assert set(play_neopixel.REGISTRY) == {"healing", "relief", "energy", "focus", "love"}
+
+
+def test_preload_itemizes_effect_imports_and_devices(stub_hardware):
+    startup_profile.install()
+    from play_neopixel import preload
+    preload()
+    records = startup_profile.records
+    imports = {name for kind, name, _, _ in records if kind == "import"}
+    assert set(EFFECT_MODULES) <= imports
+    devices = [name for kind, name, _, _ in records if kind == "device"]
+    assert sum(d.startswith("NeoPixel(") for d in devices) == 2   # 라즈4 A/B 한 번씩 (공용 레지스트리)
+    assert sum(d.startswith("Serial(") for d in devices) == 1
+    assert "love_motion" in startup_profile.report(min_ms=0.0)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# stt_engine 테스트 — 네트워크/Google SDK 없이 FakeSpeechClient, LocalStreamServer로
+import array
+import math
+import os
+import tempfile
+
+import pytest
+
+import stt_engine
+from stt_engine import (FakeSpeechClient, FallbackBackend, GoogleBackend, LocalStreamBackend,
+                        LocalStreamServer, SttBackend, StreamingSession, last_transcript, recognize_pcm)
+
+RATE = stt_engine.SAMPLE_RATE
+
+
+def pcm(silence_s: float, speech_s: float, amplitude: int = 5000) -> bytes:
+    """무음 - 사인파 - 무음 (S16_LE)"""
+    n_sil, n_sp = int(silence_s * RATE), int(speech_s * RATE)
+    tone = (int(amplitude * math.sin(2 * math.pi * 440 * i / RATE)) for i in range(n_sp))
+    return (array.array("h", [0] * n_sil).tobytes() + array.array("h", tone).tobytes()
+            + array.array("h", [0] * n_sil).tobytes())
+
+
+class Broken(SttBackend):
+    name = "broken"
+
+    def recognize(self, pcm, sample_rate=RATE):
+        raise RuntimeError("offline")
+
+    def streaming_recognize(self, chunks, sample_rate=RATE):
+        next(iter(chunks))
+        raise RuntimeError("offline")
+
+
+class Echo(SttBackend):
+    name = "echo"
+
+    def __init__(self):
+        self.received = 0
+
+    def recognize(self, pcm, sample_rate=RATE):
+        self.received = len(pcm)
+        return [f"{len(pcm)} bytes"]
+
+
+def test_fake_client_needs_no_sdk_and_trims_silence():
+    client = FakeSpeechClient(["안녕하세요", "반가워요"])
+    audio = pcm(1.0, 0.5)
+    got = recognize_pcm(audio, client=client, encoding="LINEAR16")
+    assert got == ["안녕하세요", "반가워요"]
+    assert client.encodings == ["LINEAR16"]
+    # 앞뒤 1초 무음이 잘려서 원본보다 작게 전송
+    assert 0 < client.payload_sizes[0] < len(audio)
+    assert stt_engine.last_stats.sent_bytes == client.payload_sizes[0]
+
+
+def test_google_backend_with_fake_client():
+    backend = GoogleBackend(client=FakeSpeechClient(["하나"]), encoding="LINEAR16")
+    assert backend.recognize(pcm(0.1, 0.3)) == ["하나"]
+
+
+def test_last_transcript():
+    assert last_transcript(["앞", " 뒤 ", ""]) == "뒤"
+    assert last_transcript(["", "  "]) is None
+
+
+def test_fallback_backend_replays_all_chunks():
+    echo = Echo()
+    backend = FallbackBackend(Broken(), echo)
+    chunks = [b"\x00" * 100, b"\x00" * 200, b"\x00" * 300]
+    assert backend.streaming_recognize(iter(chunks)) == ["600 bytes"]
+    assert echo.received == 600
+
+
+def test_local_stream_session():
+    path = os.path.join(tempfile.mkdtemp(), "stt.sock")
+    server = LocalStreamServer(path, transcript="테스트", rtf=0.0, finalize_ms=0.0).start()
+    try:
+        session = StreamingSession(LocalStreamBackend(path), chunk_ms=50).start()
+        for i in range(10):
+            session.feed(b"\x01\x00" * 480)
+        assert session.finish(timeout=5.0) == ["테스트"]
+        assert LocalStreamBackend(path).recognize(b"") == []
+    finally:
+        server.stop()
+
+
+def test_streaming_session_surfaces_backend_error():
+    session = StreamingSession(Broken()).start()
+    session.feed(b"\x00" * 3200)
+    with pytest.raises(RuntimeError):
+        session.finish(timeout=5.0)
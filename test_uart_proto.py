@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# uart_proto 프레이밍 / CRC / 재동기화 / 텍스트 호환 / Receiver 테스트
+from dataclasses import replace
+
+import pytest
+
+import uart_proto
+from uart_proto import (COLOR_NAMES, Decoder, Encoder, Receiver, T_CMDS, ack, cancel,
+                        decode_commands, encode_commands, encode_text, mode, parse_text,
+                        ping, pong, strip, timed)
+
+
+class FakeSerial:
+    """Receiver 폴링 경로용 메모리 포트 (write는 sent에 쌓임)"""
+    def __init__(self, data: bytes = b""):
+        self.buf = bytearray(data)
+        self.sent = bytearray()
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.buf)
+
+    def read(self, n: int = 1) -> bytes:
+        data = bytes(self.buf[:n])
+        del self.buf[:n]
+        return data
+
+    def write(self, data: bytes) -> int:
+        self.sent += data
+        return len(data)
+
+
+def decode_all(data: bytes, dec: Decoder = None):
+    dec = dec or Decoder()
+    cmds = []
+    for ftype, payload in dec.feed(data):
+        if ftype == T_CMDS:
+            cmds.extend(decode_commands(payload))
+        elif ftype == 0:
+            cmds.append(parse_text(payload))
+    return cmds, dec
+
+
+@pytest.mark.parametrize("cmds", [
+    [strip("C", 50), strip("D", 50)],
+    [strip("C", 100, (1, 2, 3)), strip("*", 80, COLOR_NAMES["red"])],
+    [mode("relief"), strip("D", 100, COLOR_NAMES["red"]), ack()],
+    timed(12.5, strip("C", 60), mode("relief")) + [strip("D", 1), ping(1.25), pong(1.0, 2.0, 3.0), cancel()],
+])
+def test_command_roundtrip(cmds):
+    assert decode_commands(encode_commands(cmds)) == cmds
+    got, dec = decode_all(Encoder().commands(cmds))
+    assert got == cmds
+    assert dec.stats()["frames"] == 1
+
+
+def test_frame_split_across_reads():
+    data = Encoder().commands([strip("C", 10), strip("D", 20)])
+    dec = Decoder()
+    out = []
+    for i in range(len(data)):
+        out += dec.feed(data[i:i + 1])
+    assert len(out) == 1
+    assert decode_commands(out[0][1]) == [strip("C", 10), strip("D", 20)]
+
+
+def test_crc_error_drops_frame_and_resyncs():
+    enc = Encoder()
+    bad = bytearray(enc.commands([strip("C", 10)]))
+    bad[-3] ^= 0xFF
+    good = enc.commands([strip("D", 30)])
+    got, dec = decode_all(bytes(bad) + good)
+    assert got == [strip("D", 30)]
+    assert dec.crc_errors == 1
+    assert dec.seq_gaps == 0
+
+
+def test_noise_before_frame_and_seq_gap():
+    enc = Encoder()
+    first = enc.commands([strip("C", 1)])
+    enc.commands([strip("C", 2)])            # 보내지 않음 → seq 1개 누락
+    third = enc.commands([strip("C", 3)])
+    got, dec = decode_all(b"\x00\x13garbage" + first + third)
+    assert got == [strip("C", 1), strip("C", 3)]
+    assert dec.noise > 0
+    assert dec.seq_gaps == 1
+
+
+def test_sof_byte_inside_payload():
+    # 페이로드 안의 0xA5는 SOF로 오인되면 안 됨
+    cmds = [strip("C", 100, (uart_proto.SOF, uart_proto.SOF, 0))]
+    got, dec = decode_all(Encoder().commands(cmds))
+    assert got == cmds
+    assert dec.crc_errors == 0
+
+
+@pytest.mark.parametrize("line, want", [
+    ("love", mode("love")),
+    ("mode:healing", mode("healing")),
+    ("DONE", ack()),
+    ("C,50", strip("C", 50)),
+    ("D|75%", strip("D", 75)),
+    ("C|red", strip("C", 100, COLOR_NAMES["red"])),
+    ("C,100,yellow", strip("C", 100, COLOR_NAMES["yellow"])),
+    ("ALL,80,red", strip("*", 80, COLOR_NAMES["red"])),
+    ("C,255,0,0", strip("C", 100, (255, 0, 0))),
+    ("X,50", None),
+    ("garbage", None),
+])
+def test_parse_text(line, want):
+    assert parse_text(line) == want
+
+
+def test_text_and_binary_interleaved():
+    enc = Encoder()
+    data = enc.commands([strip("C", 10)]) + b"D,20\nlove\n" + enc.commands([ack()])
+    got, dec = decode_all(data)
+    assert got == [strip("C", 10), strip("D", 20), mode("love"), ack()]
+    assert dec.text_lines == 2
+
+
+def test_encode_text_roundtrip_skips_sync_ops():
+    cmds = [mode("love"), strip("C", 50), strip("D", 100, COLOR_NAMES["blue"]), ping(1.0), cancel(), ack()]
+    lines = encode_text(cmds).decode().splitlines()
+    assert [parse_text(l) for l in lines] == [mode("love"), strip("C", 50),
+                                              strip("D", 100, COLOR_NAMES["blue"]), ack()]
+
+
+def test_receiver_answers_ping_and_holds_timed_commands():
+    now = [100.0]
+    enc = Encoder()
+    ser = FakeSerial(enc.commands([ping(5.0)] + timed(101.0, strip("C", 10)) + [strip("D", 20)]))
+    rx = Receiver(ser, clock=lambda: now[0])
+    assert rx.get() == strip("D", 20)           # 즉시 명령 먼저, 예약 명령은 보류
+    assert rx.get() is None
+    replies, _ = decode_all(bytes(ser.sent))
+    assert replies == [pong(5.0, 100.0, 100.0)]
+    now[0] = 101.5
+    assert rx.get() == replace(strip("C", 10), at=101.0)
+    assert rx.timing_stats()["fired"] == 1
+
+
+def test_receiver_cancel_drops_scheduled():
+    enc = Encoder()
+    ser = FakeSerial(enc.commands(timed(50.0, strip("C", 10), strip("D", 10)) + [cancel()]))
+    rx = Receiver(ser, clock=lambda: 0.0)
+    assert rx.get() is None
+    assert rx.timing_stats()["cancelled"] == 2
+
+
+def test_wait_for_keeps_other_kinds():
+    enc = Encoder()
+    ser = FakeSerial(enc.commands([strip("C", 10), ack(), pong(1.0, 2.0, 3.0)]))
+    rx = Receiver(ser, clock=lambda: 4.0)
+    assert rx.wait_for("pong", 0.1).stamps == (1.0, 2.0, 3.0, 4.0)
+    assert rx.wait_for("ack", 0.1) == ack()
+    assert rx.get() == strip("C", 10)
+    assert rx.wait_for("ack", 0.02) is None
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_pty_loopback(threaded):
+    pytest.importorskip("pty")
+    assert uart_proto.loopback(verbose=False, threaded=threaded)
+
+
+def test_discard_drops_stale_acks_only():
+    enc = Encoder()
+    ser = FakeSerial(enc.commands([ack(), strip("C", 10), ack()]))
+    rx = Receiver(ser)
+    assert rx.discard("ack") == 2
+    assert rx.wait_for("ack", 0.02) is None
+    assert rx.get() == strip("C", 10)
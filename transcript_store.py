@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# 인식 결과(결과.txt) 저장소
+#  - append만 하던 파일이 끝없이 커지지 않도록 max_bytes를 넘으면 최근 keep_bytes만 남김
+#  - 마지막 줄은 파일 끝에서 거꾸로 블록 단위로 읽어서 찾음 (파일 크기와 무관하게 O(1))
+import os
+import threading
+from typing import List, Optional
+
+RESULT_PATH = "/home/capstone/결과.txt"
+
+_BLOCK = 1024
+
+
+class TranscriptStore:
+    def __init__(self, path: str = RESULT_PATH, max_bytes: int = 256 * 1024, keep_bytes: int = 64 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep_bytes = min(keep_bytes, max_bytes)
+        self.lock = threading.Lock()
+
+    def append(self, lines: List[str]) -> None:
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for line in lines:
+                    f.write(line.replace("\n", " ") + "\n")
+                size = f.tell()
+            if size > self.max_bytes:
+                self._truncate_head()
+
+    def _truncate_head(self) -> None:
+        """최근 keep_bytes만 남기고 앞부분 삭제 (줄 경계에 맞춤)"""
+        with open(self.path, "rb") as f:
+            f.seek(-self.keep_bytes, os.SEEK_END)
+            tail = f.read()
+        cut = tail.find(b"\n")
+        tail = tail[cut + 1:] if cut >= 0 else tail
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(tail)
+        os.replace(tmp, self.path)
+
+    def last_line(self) -> Optional[str]:
+        """비어 있지 않은 마지막 줄. 파일이 없거나 비면 None"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            buf = b""
+            while pos > 0:
+                step = min(_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                lines = buf.split(b"\n")
+                # 맨 앞 조각은 앞 블록과 이어질 수 있으므로 파일 처음이 아니면 보류
+                complete = lines if pos == 0 else lines[1:]
+                for raw in reversed(complete):
+                    text = raw.decode("utf-8", errors="ignore").strip()
+                    if text:
+                        return text
+                buf = lines[0]
+        return None
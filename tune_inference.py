@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# 온디바이스 추론 스레드 수 / 워밍업 횟수 자동 튜닝
+#  - (intra 스레드, interop 스레드, warmup 횟수) 조합마다 새 프로세스에서 분류기를 로드해 측정
+#    (torch interop 스레드는 프로세스당 한 번만 설정 가능하므로 조합별로 분리)
+#  - 추론 중 LED 애니메이션 프레임 루프(별도 프로세스, sleep 기반)를 돌려 프레임 간격 지터 측정
+#  - 점수 = 정상상태 p50 + 0.1×첫 추론 + jitter_weight×프레임 지터 p95 → 최소 조합을 프로파일에 저장
+#  - emotion_service.load_classifier()가 시작 시 프로파일을 읽어 적용
+#  예) python tune_inference.py --backend torch --warmups 0,1,3
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import multiprocessing as mp
+
+from emotion_service import EMOTION_BACKEND, PROFILE_PATH, SAMPLE_TEXTS, load_classifier
+
+FRAME_PERIOD = 0.02   # LED 프레임 주기 (50fps 기준)
+
+
+def _frame_ticker(period: float, stop_evt, out_q) -> None:
+    """LED 모션과 같은 방식(sleep 루프)으로 프레임을 돌리며 실제 간격을 기록"""
+    intervals = []
+    last = time.perf_counter()
+    while not stop_evt.is_set():
+        time.sleep(period)
+        now = time.perf_counter()
+        intervals.append(now - last)
+        last = now
+    out_q.put(intervals)
+
+def _jitter_stats(intervals, period: float) -> dict:
+    if not intervals:
+        return {"jitter_p95_ms": 0.0, "jitter_max_ms": 0.0, "late_ratio": 0.0}
+    dev = sorted(abs(x - period) * 1000.0 for x in intervals)
+    late = sum(1 for x in intervals if x > period * 1.5)
+    return {
+        "jitter_p95_ms": dev[int(len(dev) * 0.95) - 1 if len(dev) > 1 else 0],
+        "jitter_max_ms": dev[-1],
+        "late_ratio": late / len(intervals),
+    }
+
+def measure_jitter(duration: float, period: float = FRAME_PERIOD) -> dict:
+    """추론 없이 프레임 루프만 돌렸을 때의 기준 지터"""
+    stop_evt, q = mp.Event(), mp.Queue()
+    p = mp.Process(target=_frame_ticker, args=(period, stop_evt, q), daemon=True)
+    p.start()
+    time.sleep(duration)
+    stop_evt.set()
+    intervals = q.get()
+    p.join()
+    return _jitter_stats(intervals, period)
+
+
+def run_trial(model_path, backend: str, threads: int, interop: int, warmup: int, rounds: int) -> dict:
+    """현재 프로세스에서 조합 1개 측정 (--trial로 자식 프로세스에서 호출됨)"""
+    profile = {"num_threads": threads, "interop_threads": interop, "warmup": warmup}
+    t0 = time.perf_counter()
+    clf = load_classifier(model_path, backend, profile)
+    load_s = time.perf_counter() - t0
+
+    texts = SAMPLE_TEXTS
+    t0 = time.perf_counter()
+    clf.predict_emotion(texts[0])
+    first_ms = (time.perf_counter() - t0) * 1000.0
+
+    stop_evt, q = mp.Event(), mp.Queue()
+    ticker = mp.Process(target=_frame_ticker, args=(FRAME_PERIOD, stop_evt, q), daemon=True)
+    ticker.start()
+    lat = []
+    for _ in range(rounds):
+        for text in texts:
+            t0 = time.perf_counter()
+            clf.predict_emotion(text)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+    stop_evt.set()
+    intervals = q.get()
+    ticker.join()
+
+    result = dict(profile)
+    result.update({
+        "load_s": load_s,
+        "first_ms": first_ms,
+        "p50_ms": statistics.median(lat),
+        "mean_ms": statistics.mean(lat),
+    })
+    result.update(_jitter_stats(intervals, FRAME_PERIOD))
+    return result
+
+def score(r: dict, jitter_weight: float) -> float:
+    return r["p50_ms"] + 0.1 * r["first_ms"] + jitter_weight * r["jitter_p95_ms"]
+
+
+def sweep(model_path, backend: str, threads_list, interop_list, warmup_list,
+          rounds: int, jitter_weight: float):
+    results = []
+    for threads in threads_list:
+        for interop in (interop_list if backend == "torch" else [0]):
+            for warmup in warmup_list:
+                cmd = [sys.executable, os.path.abspath(__file__), "--trial",
+                       "--backend", backend, "--threads", str(threads), "--interop", str(interop),
+                       "--warmups", str(warmup), "--rounds", str(rounds)]
+                if model_path:
+                    cmd += ["--model", model_path]
+                out = subprocess.run(cmd, capture_output=True, text=True)
+                if out.returncode != 0:
+                    print(f"  threads={threads} interop={interop} warmup={warmup} 실패: "
+                          f"{out.stderr.strip().splitlines()[-1:]}")
+                    continue
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                r["score"] = score(r, jitter_weight)
+                results.append(r)
+                print(f"  threads={threads} interop={interop} warmup={warmup}: "
+                      f"first={r['first_ms']:.1f}ms p50={r['p50_ms']:.1f}ms "
+                      f"jitter p95={r['jitter_p95_ms']:.1f}ms late={r['late_ratio']:.1%} "
+                      f"score={r['score']:.1f}")
+    # 점수가 같으면 워밍업이 적은(시작이 빠른) 쪽
+    results.sort(key=lambda r: (round(r["score"], 1), r["warmup"]))
+    return results
+
+def save_profile(best: dict, backend: str, path: str = PROFILE_PATH) -> None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        profile = {}
+    profile[backend] = {k: best[k] for k in ("num_threads", "interop_threads", "warmup")}
+    profile[backend]["measured"] = {k: round(best[k], 3) for k in
+                                    ("first_ms", "p50_ms", "jitter_p95_ms", "late_ratio")}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+
+
+def _int_list(s: str):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+def main(argv=None):
+    cores = os.cpu_count() or 4
+    ap = argparse.ArgumentParser(description="추론 스레드/워밍업 자동 튜닝")
+    ap.add_argument("--model", default=None)
+    ap.add_argument("--backend", default=EMOTION_BACKEND, choices=["torch", "onnx"])
+    ap.add_argument("--threads", default=",".join(str(i) for i in range(1, cores + 1)))
+    ap.add_argument("--interop", default="1,2")
+    ap.add_argument("--warmups", default="0,1,3")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--jitter-weight", type=float, default=2.0, help="LED 지터 1ms를 추론 몇 ms로 볼지")
+    ap.add_argument("--profile", default=PROFILE_PATH)
+    ap.add_argument("--dry-run", action="store_true", help="프로파일을 저장하지 않음")
+    ap.add_argument("--trial", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.trial:
+        r = run_trial(args.model, args.backend, _int_list(args.threads)[0],
+                      _int_list(args.interop)[0], _int_list(args.warmups)[0], args.rounds)
+        print(json.dumps(r))
+        return 0
+
+    base = measure_jitter(2.0)
+    print(f"기준 LED 지터(추론 없음): p95={base['jitter_p95_ms']:.1f}ms late={base['late_ratio']:.1%}")
+    results = sweep(args.model, args.backend, _int_list(args.threads), _int_list(args.interop),
+                    _int_list(args.warmups), args.rounds, args.jitter_weight)
+    if not results:
+        print("측정 결과 없음")
+        return 1
+    best = results[0]
+    print(f"best: threads={best['num_threads']} interop={best['interop_threads']} warmup={best['warmup']} "
+          f"(p50={best['p50_ms']:.1f}ms, jitter p95={best['jitter_p95_ms']:.1f}ms)")
+    if not args.dry_run:
+        save_profile(best, args.backend, args.profile)
+        print(f"saved: {args.profile}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
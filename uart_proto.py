@@ -0,0 +1,719 @@
+# -*- coding: utf-8 -*-
+# 라즈4 ↔ 라즈3 UART 프로토콜 (양쪽 공용)
+#  - 기존: 모드마다 다른 ASCII 한 줄 ("C,100,yellow", "C,255,0,0", "D,50", "C|red") + 모드별 split 파서
+#  - 변경: 버전 있는 바이너리 프레임 하나로 통일, 프레임 하나에 명령 여러 개(배치)
+#
+#  프레임: SOF(0xA5) | ver<<4 | type | seq | len | payload[len] | CRC16(ver..payload, CCITT, LE)
+#    type 1 = CMDS   : payload = 명령 나열
+#    type 2 = PIXELS : payload = 스트립 픽셀 프레임 (pixel_stream 참고, Command.data로 전달)
+#  명령 (첫 바이트 상위 4비트 op, 하위 4비트 arg):
+#    0x1m            MODE   m = MODES 인덱스
+#    0x2s lv         LEVEL  s = 스트립(A0 B1 C2 D3 *F), lv = 0~100
+#    0x3s lv r g b   COLOR  밝기 + RGB
+#    0x40            ACK    (focus 완료 "DONE")
+#    0x50 t          AT     뒤따르는 명령을 수신측 시계 t초(f64, NaN=즉시)에 실행 (clock_sync)
+#    0x60 t1         PING   송신 시각
+#    0x70 t1 t2 t3   PONG   PING 송신/수신/응답 시각 (NTP 방식 offset 추정)
+#    0x80            CANCEL 아직 실행 시각이 안 된 예약 명령 전부 취소 (효과 중단 시)
+#
+#  - 수신측 Decoder는 바이너리 프레임과 예전 텍스트 줄이 섞여 들어와도 둘 다 Command로 풀어 줌
+#  - UART_PROTOCOL=text 이면 송신도 예전 텍스트 형식 (구버전 라즈3 호환, AT/PING 없음 → 즉시 실행)
+#  - Receiver는 AT 명령을 실행 시각까지 들고 있다가 get()에서 꺼내 주고, PING에는 바로 PONG 응답
+#    start()하면 전용 읽기 스레드가 포트에서 블로킹으로 읽고, get()은 폴링 대신 알림을 기다림
+#
+#  루프백 검사: python uart_proto.py --loopback      (pty 쌍, 손상 프레임 주입)
+#  벤치마크   : python uart_proto.py --bench [-n 20000]
+import os
+import time
+import struct
+import argparse
+import heapq
+import binascii
+import threading
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
+
+PROTOCOL = os.environ.get("UART_PROTOCOL", "binary")   # binary | text
+BAUD = 115200
+
+VERSION = 1
+SOF = 0xA5
+T_CMDS = 1
+T_PIXELS = 2
+
+MODES = ("love", "focus", "healing", "relief", "energy", "stream")
+STRIP_IDS = {"A": 0, "B": 1, "C": 2, "D": 3, "*": 15}
+_ID_TO_STRIP = {v: k for k, v in STRIP_IDS.items()}
+
+OP_MODE, OP_LEVEL, OP_COLOR, OP_ACK, OP_AT, OP_PING, OP_PONG, OP_CANCEL = 1, 2, 3, 4, 5, 6, 7, 8
+
+# 텍스트 명령에서 쓰던 색 이름 (라즈3 COLOR_MAP과 동일)
+COLOR_NAMES = {
+    "yellow": (255, 255, 0),
+    "blue":   (0,   0, 255),
+    "red":    (255, 0,   0),
+    "white":  (255, 255, 255),
+}
+_COLOR_TO_NAME = {v: k for k, v in COLOR_NAMES.items()}
+
+_HEADER = struct.Struct("<BBBB")   # SOF, ver|type, seq, len
+_CRC = struct.Struct("<H")
+_F64 = struct.Struct("<d")
+_F64X3 = struct.Struct("<ddd")
+FRAME_OVERHEAD = _HEADER.size + _CRC.size
+
+
+@dataclass(frozen=True)
+class Command:
+    kind: str                      # "mode" | "strip" | "ack" | "pixels" | "ping" | "pong" | "cancel"
+    strip: str = ""                # A/B/C/D 또는 * (전체)
+    level: int = 100               # 0~100
+    color: Optional[Tuple[int, int, int]] = None   # None이면 수신측 기본 색
+    mode: str = ""
+    data: bytes = b""              # pixels 프레임 payload
+    at: Optional[float] = None     # 수신측 시계 기준 실행 시각 (None이면 즉시)
+    stamps: Tuple[float, ...] = ()  # ping/pong 타임스탬프 (수신 시각은 Receiver가 덧붙임)
+    received: float = field(default=0.0, compare=False, repr=False)   # Receiver가 디코드한 시각
+
+def mode(name: str) -> Command:
+    return Command("mode", mode=name)
+
+def strip(name: str, level: int = 100, color=None) -> Command:
+    return Command("strip", strip=name, level=max(0, min(100, int(level))),
+                   color=tuple(color) if color is not None else None)
+
+def ack() -> Command:
+    return Command("ack")
+
+def ping(t1: float) -> Command:
+    return Command("ping", stamps=(t1,))
+
+def pong(t1: float, t2: float, t3: float) -> Command:
+    return Command("pong", stamps=(t1, t2, t3))
+
+def cancel() -> Command:
+    return Command("cancel")
+
+def timed(at: float, *cmds: Command) -> List[Command]:
+    """명령들에 실행 시각(수신측 시계) 지정"""
+    return [replace(c, at=at) for c in cmds]
+
+
+# ===== 바이너리 =====
+def _crc(data) -> int:
+    return binascii.crc_hqx(data, 0xFFFF)
+
+def encode_commands(cmds: Iterable[Command]) -> bytes:
+    out = bytearray()
+    at = None
+    for c in cmds:
+        if c.at != at:
+            at = c.at
+            out.append(OP_AT << 4)
+            out += _F64.pack(float("nan") if at is None else at)
+        if c.kind == "mode":
+            out.append(OP_MODE << 4 | MODES.index(c.mode))
+        elif c.kind == "ack":
+            out.append(OP_ACK << 4)
+        elif c.kind == "cancel":
+            out.append(OP_CANCEL << 4)
+        elif c.kind == "ping":
+            out.append(OP_PING << 4)
+            out += _F64.pack(c.stamps[0])
+        elif c.kind == "pong":
+            out.append(OP_PONG << 4)
+            out += _F64X3.pack(*c.stamps[:3])
+        elif c.color is None:
+            out += bytes((OP_LEVEL << 4 | STRIP_IDS[c.strip], c.level))
+        else:
+            out += bytes((OP_COLOR << 4 | STRIP_IDS[c.strip], c.level)) + bytes(c.color)
+    return bytes(out)
+
+def decode_commands(payload: bytes) -> List[Command]:
+    cmds, i, at = [], 0, None
+    while i < len(payload):
+        op, arg = payload[i] >> 4, payload[i] & 0x0F
+        if op == OP_AT:
+            (t,) = _F64.unpack_from(payload, i + 1); i += 9
+            at = None if t != t else t
+            continue
+        if op == OP_MODE:
+            cmd = mode(MODES[arg]); i += 1
+        elif op == OP_ACK:
+            cmd = ack(); i += 1
+        elif op == OP_LEVEL:
+            cmd = strip(_ID_TO_STRIP[arg], payload[i + 1]); i += 2
+        elif op == OP_COLOR:
+            cmd = strip(_ID_TO_STRIP[arg], payload[i + 1], payload[i + 2:i + 5]); i += 5
+        elif op == OP_CANCEL:
+            cmd = cancel(); i += 1
+        elif op == OP_PING:
+            cmd = ping(*_F64.unpack_from(payload, i + 1)); i += 9
+        elif op == OP_PONG:
+            cmd = pong(*_F64X3.unpack_from(payload, i + 1)); i += 25
+        else:
+            raise ValueError(f"unknown op {op}")
+        cmds.append(cmd if at is None else replace(cmd, at=at))
+    return cmds
+
+
+class Encoder:
+    """프레임 단위 seq 번호를 붙여 인코딩 (송신측 1개)"""
+    def __init__(self):
+        self.seq = 0
+        self.mode_epoch = 0   # MODE 명령을 보낼 때마다 +1 (pixel_stream이 수신측 상태 초기화를 알아챔)
+        self.lock = threading.Lock()
+
+    def frame(self, ftype: int, payload: bytes) -> bytes:
+        if len(payload) > 255:
+            raise ValueError("payload too long")
+        with self.lock:
+            seq = self.seq
+            self.seq = (self.seq + 1) & 0xFF
+        body = bytes((VERSION << 4 | ftype, seq, len(payload))) + payload
+        return bytes((SOF,)) + body + _CRC.pack(_crc(body))
+
+    def commands(self, cmds: Iterable[Command]) -> bytes:
+        cmds = list(cmds)
+        if any(c.kind == "mode" for c in cmds):
+            with self.lock:
+                self.mode_epoch += 1
+        return self.frame(T_CMDS, encode_commands(cmds))
+
+
+class Decoder:
+    """
+    바이트 스트림 → (type, payload) 프레임 / 텍스트 줄 분리.
+    SOF 재동기화, CRC 오류·seq 누락·잡음 바이트 수를 센다.
+    """
+    def __init__(self):
+        self.buf = bytearray()
+        self.expect_seq: Optional[int] = None
+        self.frames = 0
+        self.text_lines = 0
+        self.crc_errors = 0
+        self.seq_gaps = 0
+        self.noise = 0
+
+    def feed(self, data: bytes) -> List[Tuple[int, object]]:
+        """반환: [(type, payload bytes) 또는 (0, 텍스트 줄 str)]"""
+        self.buf += data
+        out = []
+        buf = self.buf
+        while buf:
+            if buf[0] != SOF:
+                nl = buf.find(b"\n")
+                sof = buf.find(bytes((SOF,)))
+                if sof != -1 and (nl == -1 or sof < nl):
+                    self.noise += sof          # 프레임 앞 끊긴 텍스트/잡음
+                    del buf[:sof]
+                    continue
+                if nl == -1:
+                    break
+                line = bytes(buf[:nl]).decode(errors="ignore").strip()
+                del buf[:nl + 1]
+                if line:
+                    self.text_lines += 1
+                    out.append((0, line))
+                continue
+            if len(buf) < _HEADER.size:
+                break
+            _, vt, seq, size = _HEADER.unpack_from(buf)
+            if vt >> 4 != VERSION:
+                self.noise += 1
+                del buf[:1]
+                continue
+            end = _HEADER.size + size + _CRC.size
+            if len(buf) < end:
+                break
+            body = bytes(buf[1:_HEADER.size + size])
+            (crc,) = _CRC.unpack_from(buf, _HEADER.size + size)
+            if crc != _crc(body):
+                self.crc_errors += 1
+                del buf[:1]                    # SOF 하나 버리고 다음 SOF부터 다시
+                continue
+            del buf[:end]
+            if self.expect_seq is not None and seq != self.expect_seq:
+                self.seq_gaps += (seq - self.expect_seq) & 0xFF   # 빠진 프레임 수
+            self.expect_seq = (seq + 1) & 0xFF
+            self.frames += 1
+            out.append((vt & 0x0F, body[_HEADER.size - 1:]))
+        return out
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, "text_lines": self.text_lines, "crc_errors": self.crc_errors,
+                "seq_gaps": self.seq_gaps, "noise_bytes": self.noise}
+
+
+# ===== 텍스트 (예전 형식) =====
+def parse_text(line: str) -> Optional[Command]:
+    """
+    예전 텍스트 명령 → Command
+      'love' / 'mode:love' → mode,  'DONE' → ack
+      'C,50' 'D|75%'       → 밝기만
+      'C,red' 'D|blue'     → 밝기 100 + 색 이름
+      'C,100,yellow' 'ALL,80,red' '*, 60 , white' → 밝기 + 색 이름 (모르는 이름은 white)
+      'C,255,0,0'          → RGB
+    """
+    s = line.strip()
+    low = s.lower()
+    _, sep, rest = low.partition(":")
+    name = rest.strip() if sep else low
+    if name in MODES:
+        return mode(name)
+    if low == "done":
+        return ack()
+    parts = [p.strip() for p in s.replace("|", ",").split(",") if p.strip()]
+    if len(parts) < 2:
+        return None
+    target = parts[0].upper()
+    target = "*" if target in ("ALL", "*") else target[:1]
+    if target not in STRIP_IDS:
+        return None
+    try:
+        if len(parts) == 2:
+            if parts[1].lower() in COLOR_NAMES:
+                return strip(target, 100, COLOR_NAMES[parts[1].lower()])
+            return strip(target, _level(parts[1]))
+        if len(parts) == 3:
+            return strip(target, _level(parts[1]), COLOR_NAMES.get(parts[2].lower(), COLOR_NAMES["white"]))
+        if len(parts) == 4:
+            rgb = tuple(max(0, min(255, int(p))) for p in parts[1:])
+            return strip(target, 100, rgb)
+    except ValueError:
+        return None
+    return None
+
+def _level(raw: str) -> int:
+    raw = raw[:-1].strip() if raw.endswith("%") else raw
+    return max(0, min(100, int(float(raw))))
+
+def to_text(c: Command) -> str:
+    if c.kind == "mode":
+        return c.mode
+    if c.kind == "ack":
+        return "DONE"
+    target = "ALL" if c.strip == "*" else c.strip
+    if c.color is None:
+        return f"{target},{c.level}"
+    name = _COLOR_TO_NAME.get(c.color)
+    if name:
+        return f"{target},{c.level},{name}"
+    r, g, b = c.color
+    return f"{target},{r},{g},{b}"
+
+def encode_text(cmds: Iterable[Command]) -> bytes:
+    # 텍스트 형식에는 PING/PONG/CANCEL이 없음 (at도 무시 → 받는 즉시 실행)
+    return "".join(to_text(c) + "\n" for c in cmds if c.kind not in ("ping", "pong", "cancel")).encode()
+
+
+# ===== 송수신 헬퍼 =====
+encoder = Encoder()   # 링크 하나에 seq 하나 (명령/픽셀 프레임 공용)
+
+def encode(cmds: Iterable[Command], protocol: str = "") -> bytes:
+    if (protocol or PROTOCOL) == "text":
+        return encode_text(cmds)
+    return encoder.commands(cmds)
+
+def send(uart, *cmds: Command) -> None:
+    """명령 여러 개를 한 번의 write로 (바이너리면 프레임 1개)"""
+    if cmds:
+        uart.write(encode(cmds))   # write 1회 → SharedSerial 잠금 안에서 다른 명령과 섞이지 않음
+
+
+class Receiver:
+    """
+    포트에서 읽어 Command를 하나씩 꺼내 줌 (바이너리/텍스트 자동 구분).
+    at이 붙은 명령은 clock() 기준 그 시각이 될 때까지 보류했다가 get()으로 내보내고,
+    PING은 큐에 넣지 않고 바로 PONG으로 응답 (clock_sync).
+    start() 전: get()이 in_waiting을 interval마다 폴링
+    start() 후: 읽기 스레드가 ser.read()에서 블로킹 → 도착 즉시 디코드, get()은 Condition 대기
+    """
+    def __init__(self, ser, clock: Callable[[], float] = time.monotonic, answer_pings: bool = True):
+        self.ser = ser
+        self.clock = clock
+        self.answer_pings = answer_pings
+        self.decoder = Decoder()
+        self.pending: Deque[Command] = deque()
+        self.timed: List[Tuple[float, int, Command]] = []   # (실행 시각, 도착 순서, 명령) 힙
+        self._order = 0
+        self.bad_lines = 0
+        self.fired = 0          # 실행 시각에 꺼낸 예약 명령 수
+        self.late_sum = 0.0     # 예정 시각 대비 늦게 꺼낸 시간 합/최대 (초)
+        self.late_max = 0.0
+        self.cancelled = 0      # CANCEL로 버린 예약 명령 수
+        self.cv = threading.Condition()
+        self.read_errors = 0
+        self._reader: Optional[threading.Thread] = None
+        self._running = False
+
+    def _queue(self, cmd: Command, now: float) -> None:
+        if cmd.kind == "ping":
+            if self.answer_pings and self.ser is not None:
+                send(self.ser, pong(cmd.stamps[0], now, self.clock()))
+            return
+        if cmd.kind == "cancel":
+            self.cancelled += len(self.timed)
+            self.timed.clear()
+            return
+        if cmd.kind == "pong":
+            cmd = replace(cmd, stamps=cmd.stamps + (now,))
+        cmd = replace(cmd, received=now)
+        if cmd.at is not None:
+            heapq.heappush(self.timed, (cmd.at, self._order, cmd))
+            self._order += 1
+        else:
+            self.pending.append(cmd)
+
+    def _ingest(self, data: bytes) -> None:
+        now = self.clock()   # 수신 시각 (PING의 t2 / PONG의 t4)
+        for ftype, payload in self.decoder.feed(data):
+            if ftype == 0:
+                cmd = parse_text(payload)
+                if cmd is None:
+                    self.bad_lines += 1
+                else:
+                    self._queue(cmd, now)
+            elif ftype == T_CMDS:
+                try:
+                    cmds = decode_commands(payload)
+                except (ValueError, IndexError, KeyError, struct.error):
+                    self.bad_lines += 1
+                    continue
+                for cmd in cmds:
+                    self._queue(cmd, now)
+            elif ftype == T_PIXELS:
+                self.pending.append(Command("pixels", data=payload, received=now))
+
+    def _pop_due(self) -> Optional[Command]:
+        if not self.timed or self.timed[0][0] > self.clock():
+            return None
+        at, _, cmd = heapq.heappop(self.timed)
+        late = self.clock() - at
+        self.fired += 1
+        self.late_sum += late
+        self.late_max = max(self.late_max, late)
+        return cmd
+
+    def start(self) -> "Receiver":
+        """전용 읽기 스레드 시작 (한 포트에 Receiver 하나만)"""
+        if self._reader is None:
+            self._running = True
+            self._reader = threading.Thread(target=self._read_loop, name="uart-reader", daemon=True)
+            self._reader.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._reader is not None:
+            self._reader.join(1.0)
+            self._reader = None
+
+    def _read_loop(self) -> None:
+        while self._running:
+            try:
+                data = self.ser.read(1)          # 1바이트 올 때까지 (포트 timeout까지) 블로킹
+                if data:
+                    n = self.ser.in_waiting
+                    if n:
+                        data += self.ser.read(n)
+            except Exception:
+                self.read_errors += 1            # 포트 닫힘 등 → 잠깐 쉬고 재시도
+                time.sleep(0.1)
+                continue
+            if data:
+                with self.cv:
+                    self._ingest(data)
+                    self.cv.notify_all()
+
+    def _next(self) -> Optional[Command]:
+        cmd = self._pop_due()
+        if cmd is None and self.pending:
+            cmd = self.pending.popleft()
+        return cmd
+
+    def poll(self) -> None:
+        """지금 와 있는 바이트만 읽음 (블로킹 없음)"""
+        n = self.ser.in_waiting
+        if n:
+            self._ingest(self.ser.read(n))
+
+    def get(self, timeout: Optional[float] = 0.0, interval: float = 0.005) -> Optional[Command]:
+        """명령 1개. timeout=None이면 올 때까지 대기. 실행 시각이 된 예약 명령이 먼저"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._reader is not None:
+            with self.cv:
+                while True:
+                    cmd = self._next()
+                    if cmd is not None:
+                        return cmd
+                    wait = None if deadline is None else deadline - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        return None
+                    if self.timed:
+                        due = max(0.0, self.timed[0][0] - self.clock())
+                        wait = due if wait is None else min(wait, due)
+                    self.cv.wait(wait)
+        while True:
+            cmd = self._pop_due()
+            if cmd is not None:
+                return cmd
+            if not self.pending:
+                self.poll()
+            if self.pending:
+                return self.pending.popleft()
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None
+            wait = interval
+            if self.timed:
+                # 예약 시각에 맞춰 깨어남 (폴링 간격만큼 늦지 않게)
+                wait = min(wait, max(0.0, self.timed[0][0] - self.clock()))
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            time.sleep(wait)
+
+    def _take(self, kind: str) -> Optional[Command]:
+        for i, cmd in enumerate(self.pending):
+            if cmd.kind == kind:
+                del self.pending[i]
+                return cmd
+        return None
+
+    def wait_for(self, kind: str, timeout: Optional[float] = None,
+                 interval: float = 0.005) -> Optional[Command]:
+        """
+        kind 명령이 올 때까지 대기 (focus의 ACK, clock_sync의 PONG).
+        다른 종류는 버리지 않고 pending에 남겨 둠 → 같은 Receiver를 여러 스레드가 나눠 기다릴 수 있음
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._reader is not None:
+            with self.cv:
+                while True:
+                    cmd = self._take(kind)
+                    if cmd is not None:
+                        return cmd
+                    wait = None if deadline is None else deadline - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        return None
+                    self.cv.wait(wait)
+        while True:
+            self.poll()
+            cmd = self._take(kind)
+            if cmd is not None:
+                return cmd
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None
+            time.sleep(interval if deadline is None else min(interval, deadline - now))
+
+    def discard(self, kind: str) -> int:
+        """
+        pending에 남은 kind 명령을 전부 버림. 반환: 버린 수
+        (요청 전에 호출 → 시간 초과 뒤 늦게 온 응답 / 중단된 이전 요청의 응답을 새 응답으로 오인하지 않음)
+        """
+        if self._reader is None:
+            self.poll()
+        with self.cv:
+            kept = [c for c in self.pending if c.kind != kind]
+            dropped = len(self.pending) - len(kept)
+            self.pending.clear()
+            self.pending.extend(kept)
+            return dropped
+
+    def clear(self) -> None:
+        with self.cv:
+            self.pending.clear()
+            self.timed.clear()
+
+    def timing_stats(self) -> dict:
+        return {"scheduled": len(self.timed), "fired": self.fired, "cancelled": self.cancelled,
+                "late_mean_ms": 1000.0 * self.late_sum / self.fired if self.fired else 0.0,
+                "late_max_ms": 1000.0 * self.late_max}
+
+
+# ===== pty 루프백 / 벤치마크 =====
+def open_pty_pair():
+    """(쓰기 fd, 읽기 fd) — 라인 디시플린 없는 raw pty"""
+    import pty
+    import tty
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, slave
+
+class FdSerial:
+    """pty fd를 serial.Serial처럼 (in_waiting/read/write/readline)"""
+    def __init__(self, fd: int, timeout: float = 0.1):
+        import select
+        self.fd = fd
+        self.timeout = timeout
+        self._select = select.select
+        self._buf = bytearray()
+
+    @property
+    def in_waiting(self) -> int:
+        while self._select([self.fd], [], [], 0)[0]:
+            chunk = os.read(self.fd, 4096)
+            if not chunk:
+                break
+            self._buf += chunk
+        return len(self._buf)
+
+    def read(self, n: int = 1) -> bytes:
+        if not self._buf and self._select([self.fd], [], [], self.timeout)[0]:
+            self._buf += os.read(self.fd, 4096)
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    def readline(self) -> bytes:
+        end = time.monotonic() + self.timeout
+        while b"\n" not in self._buf and time.monotonic() < end:
+            if self._select([self.fd], [], [], max(0.0, end - time.monotonic()))[0]:
+                self._buf += os.read(self.fd, 4096)
+        nl = self._buf.find(b"\n")
+        n = nl + 1 if nl >= 0 else len(self._buf)
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            n = os.write(self.fd, view)
+            view = view[n:]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self.in_waiting
+        self._buf.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _sample_batches() -> List[List[Command]]:
+    """실제 효과들이 보내는 명령 묶음"""
+    red, yellow = COLOR_NAMES["red"], COLOR_NAMES["yellow"]
+    return [
+        [strip("C", 50), strip("D", 50)],                              # love 한 단계
+        [strip("C", 100, (0, 0, 255)), strip("D", 100, (0, 0, 255))],  # energy ON
+        [strip("C", 100, (1, 2, 3)), strip("D", 100, (1, 2, 3))],      # energy 임의 RGB
+        [strip("C", 100, yellow), strip("C", 0, yellow)],              # healing 트리거
+        [mode("relief"), strip("D", 100, red)],                        # relief 트리거
+        [strip("*", 80, red)],
+        [ack()],
+    ]
+
+def loopback(verbose: bool = True, threaded: bool = False) -> bool:
+    """pty 쌍으로 바이너리/텍스트 왕복 + 손상 프레임 주입 검사 (threaded: 읽기 스레드 경로)"""
+    wfd, rfd = open_pty_pair()
+    tx, rx = FdSerial(wfd), Receiver(FdSerial(rfd))
+    if threaded:
+        rx.start()
+    enc = Encoder()
+    batches = _sample_batches()
+    expected: List[Command] = []
+    # 0) AT/PING/PONG 인코딩 왕복 (예약 실행은 clock_sync 검사에서)
+    extra = timed(12.5, strip("C", 60), mode("relief")) + [strip("D", 1), ping(1.25), pong(1.0, 2.0, 3.0), cancel()]
+    ok = decode_commands(encode_commands(extra)) == extra
+
+    # 1) 바이너리 배치 왕복
+    for b in batches:
+        tx.write(enc.commands(b))
+        expected.extend(b)
+    # 2) 예전 텍스트 줄 섞어서
+    legacy = ["healing", "C,100,yellow", "D|75%|blue", "ALL,80,red", "C,255,0,0", "C|red", "D,50", "mode:love", "DONE"]
+    tx.write(("\n".join(legacy) + "\n").encode())
+    expected.extend(parse_text(l) for l in legacy)
+    # 3) CRC 손상 프레임 1개 + 빠진 seq 1개 → 다음 프레임은 정상 수신
+    bad = bytearray(enc.commands([strip("C", 10)]))
+    bad[-3] ^= 0xFF
+    tx.write(bytes(bad))
+    enc.commands([strip("C", 20)])         # 보내지 않음 (seq 누락)
+    good = [strip("D", 30), strip("C", 40)]
+    tx.write(enc.commands(good))
+    expected.extend(good)
+
+    got = []
+    while len(got) < len(expected):
+        cmd = rx.get(timeout=1.0)
+        if cmd is None:
+            break
+        got.append(cmd)
+    stats = rx.decoder.stats()
+    ok = ok and got == expected and stats["crc_errors"] == 1 and stats["seq_gaps"] == 2
+    rx.stop()
+    if verbose:
+        print(f"[{'reader thread' if threaded else 'poll'}] decoded {len(got)}/{len(expected)} commands, stats={stats}")
+        for want, have in zip(expected, got):
+            if want != have:
+                print(f"  mismatch: want={want} got={have}")
+        print("PASS" if ok else "FAIL")
+    tx.close()
+    rx.ser.close()
+    return ok
+
+def benchmark(n: int = 20000) -> None:
+    batches = _sample_batches()
+    ncmd = sum(len(b) for b in batches)
+    print(f"{'protocol':8s} {'B/cmd':>6s} {'wire cmd/s@115200':>18s} {'enc+dec cmd/s':>14s} "
+          f"{'pty MB/s':>9s} {'pty cmd/s':>10s}")
+    for proto in ("text", "binary"):
+        enc = Encoder()
+        if proto == "text":
+            frames = [encode_text(b) for b in batches]
+        else:
+            frames = [enc.commands(b) for b in batches]
+        per_cmd = sum(len(f) for f in frames) / ncmd
+
+        # CPU: 인코딩 + 디코딩(Receiver 경로)
+        dec = Receiver(None)
+        rounds = max(1, n // ncmd)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for b in batches:
+                data = encode_text(b) if proto == "text" else enc.commands(b)
+                dec._ingest(data)
+            dec.pending.clear()
+        cpu_rate = rounds * ncmd / (time.perf_counter() - t0)
+
+        # pty 루프백 처리량 (쓰기 스레드 → 읽기/디코드)
+        wfd, rfd = open_pty_pair()
+        tx, rx = FdSerial(wfd), Receiver(FdSerial(rfd))
+        blob = b"".join(frames)
+        total_cmds = rounds * ncmd
+        writer = threading.Thread(target=lambda: [tx.write(blob) for _ in range(rounds)], daemon=True)
+        t0 = time.perf_counter()
+        writer.start()
+        count = 0
+        while count < total_cmds and rx.get(timeout=2.0) is not None:
+            count += 1
+        dt = time.perf_counter() - t0
+        writer.join(1)
+        tx.close(); rx.ser.close()
+
+        wire_rate = BAUD / 10 / per_cmd
+        print(f"{proto:8s} {per_cmd:6.2f} {wire_rate:18.0f} {cpu_rate:14.0f} "
+              f"{len(blob) * rounds / dt / 1e6:9.2f} {count / dt:10.0f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="UART 프레임 프로토콜 루프백 검사 / 벤치마크")
+    ap.add_argument("--loopback", action="store_true")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("-n", type=int, default=20000)
+    args = ap.parse_args()
+    if args.loopback or not args.bench:
+        loopback()
+        loopback(threaded=True)
+    if args.bench:
+        benchmark(args.n)
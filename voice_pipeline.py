@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# 녹음 → STT → 감정 분류를 한 프로세스 안에서 실행하는 파이프라인
+#  - 녹음 데이터는 메모리 링 버퍼에만 두고 인식기로 바로 전달 (SD카드 WAV 왕복 없음)
+#  - WAV 파일은 디버그 덤프가 필요할 때만 기록
+#  - STT_STREAMING=1이면 녹음 중에 프레임을 스트리밍 인식으로 흘려 녹음/인식을 겹침
+import os
+import time
+import subprocess
+from typing import Callable, List, Optional, Tuple
+
+from audio_capture import EndpointConfig, PcmRingBuffer, record_with_endpoint, write_wav, format_metrics
+from stt_engine import create_backend, StreamingSession, last_transcript
+from emotion_service import CachedClassifier, load_classifier, classify_or_wait, emotion_labels
+from transcript_store import TranscriptStore
+from result_channel import EmotionResult, emotions
+
+# 환경변수 VOICE_DEBUG_WAV=<경로> 설정 시 녹음본을 파일로도 남김
+DEBUG_WAV_PATH = os.environ.get("VOICE_DEBUG_WAV")
+STREAMING = os.environ.get("STT_STREAMING", "0") == "1"
+
+# 녹음 버퍼/STT 백엔드는 1회 생성 후 재사용
+_buffer = None
+_backend = None
+_local_classifier = None
+_transcripts = TranscriptStore()
+# 마지막 녹음 종료/인식 완료 시각 (EmotionResult 타임스탬프용)
+_timings = {"captured_at": 0.0, "recognized_at": 0.0}
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+def get_mic_device():
+    result = subprocess.run("arecord -l" , shell = True , capture_output= True , text= True)
+    for line in result.stdout.splitlines():
+        if 'card' in line:
+            card_number = line.split()[1].split(':')[0]
+            return f"plughw:{card_number},0"
+    return None
+
+def record_to_memory(cfg: EndpointConfig = None, dump_path: Optional[str] = DEBUG_WAV_PATH,
+                     on_frame: Optional[Callable[[bytes], None]] = None):
+    """마이크에서 끝점까지 녹음. 반환: (pcm memoryview, CaptureMetrics)"""
+    global _buffer
+    cfg = cfg or EndpointConfig()
+    if _buffer is None:
+        _buffer = PcmRingBuffer(cfg.max_duration + 1.0)
+    pcm, metrics = record_with_endpoint(get_mic_device(), cfg, _buffer, on_frame)
+    print(f"[record] {format_metrics(metrics)}")
+    if dump_path:
+        write_wav(dump_path, pcm)
+    return pcm, metrics
+
+def _store_transcripts(transcripts: List[str]) -> Optional[str]:
+    for transcript in transcripts:
+        print("인식 결과:", transcript)
+    _transcripts.append(transcripts)
+    return last_transcript(transcripts)
+
+def transcribe(pcm) -> Optional[str]:
+    t0 = time.perf_counter()
+    transcripts = get_backend().recognize(pcm)
+    _timings["recognized_at"] = time.time()
+    print(f"[stt] {len(transcripts)} result(s) in {(time.perf_counter() - t0) * 1000:.0f}ms")
+    return _store_transcripts(transcripts)
+
+def listen(on_capture_end: Optional[Callable[[], None]] = None) -> Optional[str]:
+    """
+    녹음 + 인식. 녹음이 끝나는 순간 on_capture_end()를 호출 (LED 전환 등).
+    스트리밍 모드면 인식이 녹음과 동시에 진행되어 끝점 직후 결과가 나옴.
+    """
+    if not STREAMING:
+        pcm, _ = record_to_memory()
+        _timings["captured_at"] = time.time()
+        if on_capture_end:
+            on_capture_end()
+        return transcribe(pcm)
+
+    session = StreamingSession(get_backend()).start()
+    _, metrics = record_to_memory(on_frame=session.feed)
+    _timings["captured_at"] = time.time()
+    if on_capture_end:
+        on_capture_end()
+    transcripts = session.finish()
+    _timings["recognized_at"] = time.time()
+    print(f"[stt] streaming: {len(transcripts)} result(s), "
+          f"{(session.finished_at - metrics.ended_at) * 1000:.0f}ms after endpoint")
+    return _store_transcripts(transcripts)
+
+def predict_emotion(text: str) -> Tuple[int, float]:
+    # 상주 서비스가 워밍업 중이면 기다림 (여기서 모델을 또 로드하면 라즈베리파이 메모리/CPU를 두 배로 씀)
+    result = classify_or_wait(text)
+    if result is not None:
+        return result
+    # 상주 서비스 프로세스가 없거나 죽었을 때만 이 프로세스에서 한 번만 로드해 재사용
+    global _local_classifier
+    if _local_classifier is None:
+        _local_classifier = CachedClassifier(load_classifier())
+    return _local_classifier.predict_emotion(text)
+
+def classify_and_store(text: str) -> EmotionResult:
+    """분류 결과를 result_channel.emotions로 발행 (파일은 RESULT_MIRROR=1일 때만 미러)"""
+    label, confidence = predict_emotion(text)
+    result = EmotionResult(
+        label=label,
+        name=emotion_labels.get(label),
+        prob=confidence,
+        transcript=text,
+        captured_at=_timings["captured_at"],
+        recognized_at=_timings["recognized_at"],
+    )
+    print(f"{result.name} ({confidence:.2f})")
+    emotions.publish(result)
+    return result